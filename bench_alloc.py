@@ -0,0 +1,271 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Memory and allocation benchmark for the record classes.
+#
+# For every record class in recheaders this measures, scaled to one million records:
+#     construct_bytes     bytes still allocated by the constructed record objects
+#     construct_blocks    memory blocks (objects) allocated by construction
+#     encode_peak         high-water mark of transient memory while encoding one record
+#     encode_leak         bytes left allocated after the records were encoded and dropped
+#     gc_collections      garbage collections triggered, per generation
+#     seconds             time to construct and encode (measured without tracemalloc)
+# and can write a synthetic lot to track the peak RSS of a long-running writer:
+#
+#     python -m stdfwriter.bench_alloc --records 20000
+#     python -m stdfwriter.bench_alloc --lot-parts 1000000 --max-rss-mb 64
+#
+# Thresholds given on the command line are checked against the results; the exit status is 1
+# when any of them is exceeded so the benchmark can gate a CI job.
+
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from .recheaders import *
+
+
+SAMPLES = {
+    "FAR": lambda: FAR(CPU_TYPE=2, STDF_VER=4),
+    "ATR": lambda: ATR(MOD_TIM=1546102685, CMD_LINE="stdf_filter --drop DTR"),
+    "VUR": lambda: VUR(UPD_NAM=["Scan:2007.1"]),
+    "MIR": lambda: MIR(SETUP_T=1546102685, START_T=1546102693, STAT_NUM=1, LOT_ID="ABCDEFG", PART_TYP="XXXXXA",
+                       NODE_NAM="XXXXX34", TSTR_TYP="Test_Type", JOB_NAM="ABCDEFGHIJKLMNI.txt"),
+    "MRR": lambda: MRR(FINISH_T=1546105693),
+    "PCR": lambda: PCR(HEAD_NUM=1, SITE_NUM=0, PART_CNT=1526, RTST_CNT=0, ABRT_CNT=0, GOOD_CNT=1272),
+    "HBR": lambda: HBR(HEAD_NUM=255, SITE_NUM=0, HBIN_NUM=1, HBIN_CNT=20613, HBIN_PF="P", HBIN_NAM="PASS"),
+    "SBR": lambda: SBR(HEAD_NUM=255, SITE_NUM=0, SBIN_NUM=1, SBIN_CNT=20613, SBIN_PF="P", SBIN_NAM="PASS"),
+    "PMR": lambda: PMR(PMR_INDX=1, CHAN_TYP=65535, CHAN_NAM="2.b2", PHY_NAM="Test", LOG_NAM="AC", HEAD_NUM=0, SITE_NUM=1),
+    "PGR": lambda: PGR(GRP_INDX=32768, GRP_NAM="DC", INDX_CNT=16, PMR_INDX=list(range(58, 74))),
+    "PLR": lambda: PLR(GRP_CNT=4, GRP_INDX=[1, 2, 3, 32768], GRP_MODE=[0] * 4, GRP_RADX=[0] * 4,
+                       PGM_CHAR=["*********"] * 4, RTN_CHAR=["+++++"] * 4, PGM_CHAL=[], RTN_CHAL=[]),
+    "RDR": lambda: RDR(NUM_BINS=2, RTST_BIN=[3, 4]),
+    "SDR": lambda: SDR(HEAD_NUM=0, SITE_GRP=255, SITE_CNT=16, SITE_NUM=list(range(16)), CARD_ID="AAAA-BB-CC-DD",
+                       LOAD_ID="6680"),
+    "PSR": lambda: PSR(PSR_INDX=1, PSR_NAM="scan_seq", PAT_BGN=[0, 4096], PAT_END=[4095, 8191],
+                       PAT_FILE=["chain.stil", "stuck_at.stil"]),
+    "NMR": lambda: NMR(PMR_INDX=[1, 2, 3], ATPG_NAM=["si0", "so0", "clk"]),
+    "CNR": lambda: CNR(CHN_NUM=1, BIT_POS=17, CELL_NAM="core/u_alu/q_reg_17"),
+    "SSR": lambda: SSR(SSR_NAM="scan_struct", CHN_LIST=[1, 2]),
+    "CDR": lambda: CDR(CDR_INDX=1, CHN_NAM="chain0", CHN_LEN=2048, SIN_PIN=1, SOUT_PIN=2, M_CLKS=[3], INV_VAL=0),
+    "WIR": lambda: WIR(HEAD_NUM=1, START_T=1546920469, WAFER_ID="20"),
+    "WRR": lambda: WRR(HEAD_NUM=1, FINISH_T=1546920536, PART_CNT=24957, RTST_CNT=0, ABRT_CNT=0, GOOD_CNT=20613,
+                       WAFER_ID="20"),
+    "WCR": lambda: WCR(WF_FLAT="U", CENTER_X=0, CENTER_Y=0, POS_X="R", POS_Y="D"),
+    "PIR": lambda: PIR(HEAD_NUM=1, SITE_NUM=3),
+    "PRR": lambda: PRR(HEAD_NUM=1, SITE_NUM=3, PART_FLG=0, NUM_TEST=6, HARD_BIN=1, SOFT_BIN=1, X_COORD=53,
+                       Y_COORD=14, TEST_T=1546105693, PART_ID="1"),
+    "TSR": lambda: TSR(HEAD_NUM=255, SITE_NUM=255, TEST_TYP="P", TEST_NUM=2, EXEC_CNT=24957, FAIL_CNT=0, ALRM_CNT=0,
+                       TEST_NAM="Leakage", SEQ_NAME="LEAK"),
+    "PTR": lambda: PTR(TEST_NUM=1, HEAD_NUM=1, SITE_NUM=3, TEST_FLG=0, PARM_FLG=0, RESULT=0.030896000564098358,
+                       TEST_TXT="Test Item Name is ???", OPT_FLAG=0b11001110, UNITS="s", C_RESFMT="%5.2g",
+                       C_LLMFMT="%5.2g", C_HLMFMT="%5.2g"),
+    "MPR": lambda: MPR(TEST_NUM=1, HEAD_NUM=1, SITE_NUM=3, TEST_FLG=0, PARM_FLG=0, RTN_ICNT=8, RSLT_CNT=8,
+                       RTN_STAT=[0] * 4, RTN_RSLT=[0.5] * 8, RTN_INDX=list(range(1, 9)), TEST_TXT="Multi"),
+    "FTR": lambda: FTR(TEST_NUM=1, HEAD_NUM=1, SITE_NUM=3, TEST_FLG=0, RTN_INDX=[1, 2], RTN_STAT=[0x12],
+                       PGM_INDX=[5], PGM_STAT=[1], RTN_ICNT=2, PGM_ICNT=1, VECT_NAM="pat1"),
+    "STR": lambda: STR(TEST_NUM=100, HEAD_NUM=1, SITE_NUM=3, PSR_REF=1, TEST_TXT="scan_stuck_at", CYC_CNT=8192,
+                       CYC_OFST=[17, 2049, 4100], PMR_INDX=[2, 2, 2], EXP_DATA=[1, 0, 1], CAP_DATA=[0, 1, 0],
+                       BIT_POS=[17, 1, 4]),
+    "BPS": lambda: BPS(SEQ_NAME="Flow"),
+    "EPS": lambda: EPS(),
+    "GDR": lambda: GDR(FLD_CNT=3, GEN_DATA={10: "AB", 1: 255, 5: 510}),
+    "DTR": lambda: DTR(TEXT_DAT="datalog sampling rate changed"),
+}
+
+PER_MILLION = 1000000
+
+
+class _GCCounter:
+    """Count the garbage collections started, per generation, while installed in gc.callbacks."""
+
+    def __init__(self):
+        self.counts = [0, 0, 0]
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self.counts[info["generation"]] += 1
+
+    def __enter__(self):
+        gc.callbacks.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        gc.callbacks.remove(self)
+
+
+def measure(factory, n=20000):
+    """Measure the allocations made by constructing and encoding n records from factory().
+
+    Returns:
+        dict of the figures described at the top of this module, scaled to one million records
+    """
+    scale = PER_MILLION / n
+    start = time.perf_counter()
+    for _ in range(n):
+        factory().encode()
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    records = [None] * n  # allocate the list up front so it is not counted as record memory
+    with _GCCounter() as collections:
+        tracemalloc.start()
+        base_bytes = tracemalloc.get_traced_memory()[0]
+        base_blocks = sys.getallocatedblocks()
+        for i in range(n):
+            records[i] = factory()
+        construct_bytes = tracemalloc.get_traced_memory()[0] - base_bytes
+        construct_blocks = sys.getallocatedblocks() - base_blocks
+
+        encode_peak = 0
+        before = tracemalloc.get_traced_memory()[0]
+        for record in records:
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            record.encode()
+            encode_peak = max(encode_peak, tracemalloc.get_traced_memory()[1] - current)
+        del records
+        gc.collect()
+        encode_leak = tracemalloc.get_traced_memory()[0] - before + construct_bytes
+        tracemalloc.stop()
+
+    return {
+        "construct_bytes": int(construct_bytes * scale),
+        "construct_blocks": int(construct_blocks * scale),
+        "encode_peak": encode_peak,
+        "encode_leak": max(int(encode_leak * scale), 0),
+        "gc_collections": [int(c * scale) for c in collections.counts],
+        "seconds": seconds * scale,
+    }
+
+
+def peak_rss():
+    """Return the peak resident set size of this process in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def write_lot(inf, parts=1000000, tests=10, sites=16):
+    """Write a synthetic lot: headers, parts tested on sites in parallel, summaries and MRR.
+
+    Returns:
+        dict with the number of records written, the elapsed seconds and the peak RSS growth
+    """
+    rss_before = peak_rss()
+    start = time.perf_counter()
+    count = 0
+    header = [SAMPLES[name]() for name in ("FAR", "MIR", "SDR", "WCR", "WIR")]
+    for record in header:
+        record.write_record(inf)
+    count += len(header)
+    for first in range(0, parts, sites):
+        touchdown = range(min(sites, parts - first))
+        for site in touchdown:
+            PIR(HEAD_NUM=1, SITE_NUM=site).write_record(inf)
+        for test in range(tests):
+            for site in touchdown:
+                PTR(TEST_NUM=test, HEAD_NUM=1, SITE_NUM=site, TEST_FLG=0, PARM_FLG=0, RESULT=0.5 * site,
+                    TEST_TXT="Test Item Name is ???", UNITS="s").write_record(inf)
+        for site in touchdown:
+            PRR(HEAD_NUM=1, SITE_NUM=site, PART_FLG=0, NUM_TEST=tests, HARD_BIN=1, SOFT_BIN=1,
+                PART_ID=str(first + site)).write_record(inf)
+        count += len(touchdown) * (tests + 2)
+    footer = [SAMPLES[name]() for name in ("WRR", "TSR", "HBR", "SBR", "PCR", "MRR")]
+    for record in footer:
+        record.write_record(inf)
+    count += len(footer)
+    rss_after = peak_rss()
+    return {
+        "records": count,
+        "seconds": time.perf_counter() - start,
+        "peak_rss": rss_after,
+        "rss_growth": rss_after - rss_before if rss_after is not None else None,
+    }
+
+
+def check_thresholds(results, lot=None, max_construct_bytes=None, max_gc_per_million=None, max_leak=None,
+                     max_rss_mb=None):
+    """Compare benchmark results against thresholds.
+
+    Args:
+        results: {record name: measure() result}
+        lot: write_lot() result, if the lot benchmark was run
+        max_construct_bytes: limit on construct_bytes per million records
+        max_gc_per_million: limit on the total collections (all generations) per million records
+        max_leak: limit on encode_leak per million records
+        max_rss_mb: limit on the lot's peak RSS growth in MiB
+
+    Returns:
+        list of messages, one per exceeded threshold (empty when everything is within limits)
+    """
+    failures = []
+    for name, result in sorted(results.items()):
+        if max_construct_bytes is not None and result["construct_bytes"] > max_construct_bytes:
+            failures.append("{}: construct_bytes {} > {}".format(name, result["construct_bytes"], max_construct_bytes))
+        if max_gc_per_million is not None and sum(result["gc_collections"]) > max_gc_per_million:
+            failures.append("{}: gc_collections {} > {}".format(name, sum(result["gc_collections"]), max_gc_per_million))
+        if max_leak is not None and result["encode_leak"] > max_leak:
+            failures.append("{}: encode_leak {} > {}".format(name, result["encode_leak"], max_leak))
+    if max_rss_mb is not None and lot is not None and lot["rss_growth"] is not None:
+        if lot["rss_growth"] > max_rss_mb * 1024 * 1024:
+            failures.append("lot: rss_growth {:.1f} MiB > {} MiB".format(lot["rss_growth"] / 1048576.0, max_rss_mb))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="STDF writer memory and allocation benchmark")
+    parser.add_argument("--records", type=int, default=20000, help="records measured per record type")
+    parser.add_argument("--types", nargs="*", default=sorted(SAMPLES), help="record types to measure")
+    parser.add_argument("--lot-parts", type=int, default=0, help="also write a synthetic lot of this many parts")
+    parser.add_argument("--lot-output", default=os.devnull, help="file the synthetic lot is written to")
+    parser.add_argument("--max-construct-bytes", type=int)
+    parser.add_argument("--max-gc-per-million", type=int)
+    parser.add_argument("--max-leak", type=int)
+    parser.add_argument("--max-rss-mb", type=float)
+    args = parser.parse_args(argv)
+
+    lot = None
+    if args.lot_parts:  # run first so the record measurements do not inflate the RSS figure
+        with open(args.lot_output, "wb") as inf:
+            lot = write_lot(inf, parts=args.lot_parts)
+        print("lot: {records} records in {seconds:.1f}s, peak RSS {peak_rss}, growth {rss_growth}".format(**lot))
+
+    print("{:<5}{:>16}{:>17}{:>12}{:>12}{:>20}{:>9}".format(
+        "rec", "construct_bytes", "construct_blocks", "encode_peak", "encode_leak", "gc (gen0/1/2)", "sec"))
+    results = {}
+    for name in args.types:
+        result = results[name] = measure(SAMPLES[name], args.records)
+        print("{:<5}{construct_bytes:>16}{construct_blocks:>17}{encode_peak:>12}{encode_leak:>12}{gc:>20}"
+              "{seconds:>9.2f}".format(name, gc="/".join(map(str, result["gc_collections"])), **result))
+    print("(all figures per {} records)".format(PER_MILLION))
+
+    failures = check_thresholds(results, lot, args.max_construct_bytes, args.max_gc_per_million, args.max_leak,
+                                args.max_rss_mb)
+    for failure in failures:
+        print("REGRESSION " + failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
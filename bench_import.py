@@ -0,0 +1,103 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Import time benchmark for the record classes.
+#
+# Every measurement runs in a fresh interpreter, timing `import recheaders` plus the record
+# classes a scenario looks up:
+#     eager       all record classes, what every import cost before the classes were loaded lazily
+#     part_flow   FAR, MIR, PIR, PTR, PRR and MRR, a typical short-lived per-touchdown helper
+#     import      the module alone
+# Both with compiled bytecode available (the usual installed case) and without it (read-only
+# installs, PYTHONDONTWRITEBYTECODE), where every loaded module is compiled from source:
+#
+#     python -m stdfwriter.bench_import --runs 30
+
+
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+
+SCENARIOS = {
+    "eager": "r.load_all()",
+    "part_flow": "[getattr(r, n) for n in ('FAR', 'MIR', 'PIR', 'PTR', 'PRR', 'MRR')]",
+    "import": "",
+}
+
+_CHILD = """
+import importlib, io, struct, sys, time  # the standard library modules recheaders uses are not timed
+start = time.perf_counter()
+import {package}.recheaders as r
+{lookup}
+print(time.perf_counter() - start)
+"""
+
+
+def _package_dir():
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def time_import(lookup, bytecode=True, runs=20):
+    """Time an import scenario in fresh interpreters.
+
+    Args:
+        lookup: Python statement run after `import recheaders as r`
+        bytecode: whether compiled bytecode may be used (and written)
+        runs: number of interpreters started
+
+    Returns:
+        list of elapsed seconds, one per run
+    """
+    package_dir = _package_dir()
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([os.path.dirname(package_dir), env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    code = _CHILD.format(package=os.path.basename(package_dir), lookup=lookup)
+    with tempfile.TemporaryDirectory() as empty:
+        if bytecode:
+            compileall.compile_dir(package_dir, quiet=1)
+            flags = []
+        else:  # look for bytecode in an empty directory and never write any: always compile
+            flags = ["-B", "-X", "pycache_prefix=" + empty]
+        results = []
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-s"] + flags + ["-c", code], env=env,
+                                 check=True, capture_output=True, text=True).stdout
+            results.append(float(out))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="recheaders import time benchmark")
+    parser.add_argument("--runs", type=int, default=20, help="interpreters started per measurement")
+    args = parser.parse_args(argv)
+
+    print("{:<10}{:>16}{:>16}".format("scenario", "bytecode (ms)", "source (ms)"))
+    medians = {}
+    for name, lookup in SCENARIOS.items():
+        medians[name] = [statistics.median(time_import(lookup, bytecode, args.runs)) * 1000 for bytecode in (True, False)]
+        print("{:<10}{:>16.2f}{:>16.2f}".format(name, *medians[name]))
+    eager = medians["eager"]
+    for name in ("part_flow", "import"):
+        print("{} vs eager: {:.1f}x faster with bytecode, {:.1f}x from source".format(
+            name, eager[0] / medians[name][0], eager[1] / medians[name][1]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Bulk encoding of many records of one type from columns of field values.
+#
+#     from stdfwriter import bulk
+#     from stdfwriter.recheaders import HBR
+#
+#     bulk.write_bulk(inf, HBR, {"HEAD_NUM": 255, "SITE_NUM": 0, "HBIN_NUM": bins, "HBIN_CNT": counts,
+#                                "HBIN_PF": "P", "HBIN_NAM": names})
+#
+# The rows can be given as a NumPy structured array (one field per column), a dict of columns
+# (NumPy arrays, sequences, or a scalar shared by all rows) or an iterable of tuples holding the
+# constructor arguments of the record class in order. Fields left out take the default of the
+# record class's constructor.
+#
+# The encoder is driven by the class's field_names. Records made only of fixed-width fields,
+# C*1, C*n and B*n are encoded column by column with NumPy: every fixed-width column is cast to
+# its STDF data type once and C*n columns are length-prefixed as whole arrays, then all columns
+# are scattered into one output buffer. Records with array (kx) or V*n fields, and every record
+# when NumPy is not installed, are encoded one record at a time through the record class.
+#
+# In strict validation mode the columns are checked with validate.check_columns before anything
+# is encoded. With validation off, integer values out of range wrap around as NumPy casts do,
+# where the per-record path raises struct.error.
+#
+# encode_mpr encodes the MPRs of one test for all sites of a touchdown from a sites x pins array
+# of results (and one of states). The MPRs all have the same length: one of them is encoded
+# through the MPR class as a template, copied once per site into a 2-D byte array, and the
+# per-site fields, the nibble-packed states and the results cast to R4 in one operation are
+# written into their columns. RTN_INDX and the other shared fields are encoded only once.
+
+
+import inspect
+import itertools
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, every record class then takes the per-record path
+    np = None
+
+from . import validate
+
+
+DTYPES = {
+    "B1": "u1",
+    "N1": "u1",
+    "U1": "u1",
+    "U2": "u2",
+    "U4": "u4",
+    "U8": "u8",
+    "I1": "i1",
+    "I2": "i2",
+    "I4": "i4",
+    "I8": "i8",
+    "R4": "f4",
+    "R8": "f8",
+}  # native byte order, as struct uses for Record.encode
+TEXT_TYPES = ("C1", "Cn", "Bn")
+
+_plans = {}
+
+
+def _plan(cls):
+    """Constructor parameters and defaults of a record class, and whether it can be vectorized."""
+    plan = _plans.get(cls)
+    if plan is None:
+        params = [p for p in inspect.signature(cls.__init__).parameters.values() if p.name != "self"]
+        defaults = {p.name: p.default for p in params if p.default is not inspect.Parameter.empty}
+        vectorized = np is not None and all(typ in DTYPES or typ in TEXT_TYPES for _, typ in cls.field_names)
+        plan = _plans[cls] = ([p.name for p in params], defaults, vectorized)
+    return plan
+
+
+def _is_scalar(value):
+    return isinstance(value, (str, bytes)) or not hasattr(value, "__len__")
+
+
+def to_columns(cls, rows):
+    """Normalize bulk input to a dict of columns.
+
+    Args:
+        cls: the record class
+        rows: NumPy structured array, dict of columns, or iterable of constructor argument tuples
+
+    Returns:
+        (columns, n): dict of field name to column or scalar, and the number of rows
+    """
+    names, defaults, _ = _plan(cls)
+    if np is not None and isinstance(rows, np.ndarray) and rows.dtype.names:
+        columns = {name: rows[name] for name in rows.dtype.names}
+        n = len(rows)
+    elif isinstance(rows, dict):
+        columns = dict(rows)
+        lengths = [len(col) for col in columns.values() if not _is_scalar(col)]
+        n = lengths[0] if lengths else 1
+    else:
+        rows = list(rows)
+        n = len(rows)
+        columns = {}
+        for i, name in enumerate(names):
+            if all(len(row) > i for row in rows):
+                columns[name] = [row[i] for row in rows]
+            elif name in defaults and any(len(row) > i for row in rows):
+                # tuples shorter than the argument list leave the trailing arguments to their defaults
+                columns[name] = [row[i] if len(row) > i else defaults[name] for row in rows]
+    unknown = set(columns) - set(names)
+    if unknown:
+        raise TypeError("{} has no field {}".format(cls.__name__, ", ".join(sorted(unknown))))
+    for name in names:
+        if name not in columns:
+            if name not in defaults:
+                raise TypeError("{} bulk input is missing the required field {}".format(cls.__name__, name))
+            columns[name] = defaults[name]
+    return columns, n
+
+
+def _fixed_column(value, dtype, n):
+    """Column cast to dtype, as an (n, itemsize) uint8 array."""
+    dtype = np.dtype(dtype)
+    if _is_scalar(value):
+        return np.broadcast_to(np.array(value, dtype=dtype).reshape(1).view(np.uint8), (n, dtype.itemsize))
+    arr = np.ascontiguousarray(np.asarray(value).astype(dtype, copy=False))
+    return arr.view(np.uint8).reshape(n, dtype.itemsize)
+
+
+def _text_column(value, n, name, binary=False):
+    """Column of strings as (lengths, (n, width) uint8 array of the bytes, zero padded).
+
+    A fixed-width 'S' array has no lengths of its own: its values end at the first trailing NUL.
+    The lengths of B*n values (binary) given as bytes objects are taken from the objects, so their
+    trailing NULs are kept.
+    """
+    if _is_scalar(value):
+        lens, data = _text_column([value], 1, name, binary)
+        return np.broadcast_to(lens, (n,)), np.broadcast_to(data, (n, data.shape[1]))
+    lens = None
+    if binary and (not isinstance(value, np.ndarray) or value.dtype.kind == "O"):
+        value = [item.encode("latin-1") if isinstance(item, str) else bytes(item) for item in value]
+        lens = np.fromiter(map(len, value), dtype=np.int64, count=len(value))
+        arr = np.array(value, dtype="S")
+    else:
+        arr = np.asarray(value)
+    if arr.dtype.kind == "O":
+        arr = arr.astype(str)
+    arr = np.ascontiguousarray(arr)
+    if arr.dtype.kind == "U":
+        codes = arr.view(np.uint32).reshape(len(arr), arr.itemsize // 4)
+        if (codes > 127).any():
+            raise validate.ValidationError("{} has values that are not ASCII strings".format(name))
+        data = codes.astype(np.uint8)
+    elif arr.dtype.kind == "S":
+        data = arr.view(np.uint8).reshape(len(arr), arr.itemsize)
+    else:
+        raise TypeError("{} must hold strings, not {}".format(name, arr.dtype))
+    if lens is None:
+        lens = np.char.str_len(arr)
+    return lens, data
+
+
+def _encode_columns(cls, columns, n):
+    """Encode n records from the columns with NumPy, into one uint8 array."""
+    # each segment is either a fixed-width block of columns or one length-prefixed column
+    segments = []
+    block = []
+    body_len = np.zeros(n, dtype=np.int64)
+    for name, typ in cls.field_names:
+        value = columns[name]
+        if typ == "C1":
+            lens, data = _text_column(value, n, "{}.{}".format(cls.__name__, name))
+            if n and (lens != 1).any():
+                raise validate.ValidationError("{}.{} has values that are not one character".format(cls.__name__, name))
+            block.append(data[:, :1])
+            body_len += 1
+        elif typ in DTYPES:
+            data = _fixed_column(value, DTYPES[typ], n)
+            block.append(data)
+            body_len += data.shape[1]
+        else:
+            lens, data = _text_column(value, n, "{}.{}".format(cls.__name__, name), typ == "Bn")
+            if n and lens.max() > validate.CN_MAX:
+                raise validate.ValidationError("{}.{} has values longer than {} bytes".format(
+                    cls.__name__, name, validate.CN_MAX))
+            if block:
+                segments.append(np.hstack(block))
+                block = []
+            segments.append((lens, data))
+            body_len += lens + 1
+    if block:
+        segments.append(np.hstack(block))
+
+    if n and body_len.max() > validate.REC_LEN_MAX:
+        raise validate.ValidationError("{} records longer than {} bytes".format(cls.__name__, validate.REC_LEN_MAX))
+    header = np.empty((n, 4), dtype=np.uint8)
+    header[:, :2] = body_len.astype(np.uint16).view(np.uint8).reshape(n, 2)
+    header[:, 2] = cls.rec_typ
+    header[:, 3] = cls.rec_sub
+    if segments and not isinstance(segments[0], tuple):
+        segments[0] = np.hstack([header, segments[0]])
+    else:
+        segments.insert(0, header)
+
+    total = body_len + 4
+    out = np.empty(int(total.sum()), dtype=np.uint8)
+    pos = np.cumsum(total) - total  # offset of each record, advanced field by field
+    for segment in segments:
+        if isinstance(segment, tuple):
+            lens, data = segment
+            out[pos] = lens
+            pos = pos + 1
+            mask = np.arange(data.shape[1]) < lens[:, None]
+            out[(pos[:, None] + np.arange(data.shape[1]))[mask]] = data[mask]
+            pos = pos + lens
+        else:
+            width = segment.shape[1]
+            out[pos[:, None] + np.arange(width)] = segment
+            pos = pos + width
+    return out
+
+
+def encode_bulk(cls, rows):
+    """Encode a batch of records of one type.
+
+    Args:
+        cls: the record class, e.g. HBR
+        rows: NumPy structured array, dict of columns, or iterable of constructor argument tuples
+
+    Returns:
+        bytes of all records, in row order, identical to encoding each record on its own
+
+    Raises:
+        ValidationError: in strict validation mode, if a value does not fit its field; in any
+                         mode if a C*1 value is not one character, or a C*n value or a record is
+                         too long
+    """
+    return bytes(_encode(cls, rows)[0])
+
+
+def write_bulk(inf, cls, rows):
+    """Encode a batch of records of one type and write them to inf in one write.
+
+    Returns:
+        number of records written
+    """
+    data, n = _encode(cls, rows)
+    inf.write(data)
+    return n
+
+
+def _encode(cls, rows):
+    columns, n = to_columns(cls, rows)
+    names, _, vectorized = _plan(cls)
+    if not vectorized:
+        expanded = [itertools.repeat(col, n) if _is_scalar(col) else col for col in (columns[name] for name in names)]
+        return b"".join(cls(*args).encode() for args in zip(*expanded)), n
+    if validate.get_mode() == "strict":
+        validate.check_columns(cls, columns, n)
+    if not n:
+        return b"", 0
+    return memoryview(_encode_columns(cls, columns, n)), n
+
+
+_MPR_SITE_FIELDS = slice(8, 12)  # HEAD_NUM, SITE_NUM, TEST_FLG, PARM_FLG, after the header and TEST_NUM
+_MPR_RTN_STAT = 16  # after RTN_ICNT and RSLT_CNT
+
+
+def _pack_nibbles(states):
+    """RTN_STAT values packed two per byte, the first one in the low nibble."""
+    states = list(states) + [0] * (len(states) % 2)
+    return bytes((states[i] & 0x0F) | (states[i + 1] & 0x0F) << 4 for i in range(0, len(states), 2))
+
+
+def _mpr_records(test_num, results, states, rtn_indx, head_num, site_nums, test_flg, parm_flg, fields):
+    """One MPR object per row of results."""
+    from .recheaders import MPR
+    for i, row in enumerate(results):
+        head, site, tflg, pflg = (value if _is_scalar(value) else value[i]
+                                  for value in (head_num, site_nums, test_flg, parm_flg))
+        row = [float(value) for value in row]
+        if states is None:
+            yield MPR(test_num, head, site, tflg, pflg, 0, len(row), RTN_RSLT=row, RTN_INDX=[], **fields)
+        else:
+            yield MPR(test_num, head, site, tflg, pflg, len(rtn_indx), len(row), RTN_STAT=_pack_nibbles(states[i]),
+                      RTN_RSLT=row, RTN_INDX=list(rtn_indx), **fields)
+
+
+def encode_mpr(test_num, results, states=None, rtn_indx=None, head_num=1, site_nums=None, test_flg=0, parm_flg=0,
+               **fields):
+    """Encode the MPRs of one test for all sites of a touchdown, one MPR per row of results.
+
+    Args:
+        test_num: TEST_NUM
+        results: sites x pins array of RTN_RSLT values
+        states: sites x pins array of RTN_STAT values (0..15), or None; given with rtn_indx
+        rtn_indx: PMR_INDX of each pin of states, the same for all sites
+        head_num, test_flg, parm_flg: one value for all sites or one per site
+        site_nums: SITE_NUM of each row, 0, 1, ... when None
+        fields: other MPR fields, the same for all sites (TEST_TXT, limits, UNITS, ...)
+
+    Returns:
+        bytes of the MPRs, identical to encoding one MPR per site
+
+    Raises:
+        ValidationError: in strict validation mode, if a value does not fit its field
+    """
+    if (states is None) != (rtn_indx is None):
+        raise TypeError("MPR states and rtn_indx are given together")
+    if site_nums is None:
+        site_nums = list(range(len(results)))
+    if np is None:
+        return b"".join([rec.encode() for rec in _mpr_records(test_num, results, states, rtn_indx, head_num,
+                                                               site_nums, test_flg, parm_flg, fields)])
+    from .recheaders import MPR
+    results = np.asarray(results)
+    if results.ndim != 2:
+        raise ValueError("MPR results must be a sites x pins array")
+    n, pins = results.shape
+    icnt = 0 if rtn_indx is None else len(rtn_indx)
+    if states is not None:
+        states = np.asarray(states)
+        if states.shape != (n, icnt):
+            raise ValueError("MPR states must be a sites x {} array".format(icnt))
+    per_site = {"HEAD_NUM": head_num, "SITE_NUM": site_nums, "TEST_FLG": test_flg, "PARM_FLG": parm_flg}
+    if validate.get_mode() == "strict":
+        validate.check_columns(MPR, per_site, n)
+        finite = results[np.isfinite(results)]
+        if finite.size and np.abs(finite).max() > validate.R4_MAX:
+            raise validate.ValidationError("MPR.RTN_RSLT has values too large for R4")
+        if icnt and (states.min() < 0 or states.max() > 0x0F):
+            raise validate.ValidationError("MPR.RTN_STAT has values that do not fit data type N1")
+    if not n:
+        return b""
+    nbytes = (icnt + 1) // 2
+    template = MPR(test_num, 0, 0, 0, 0, icnt, pins, RTN_STAT=bytes(nbytes), RTN_RSLT=np.zeros(pins, np.float32),
+                   RTN_INDX=[] if rtn_indx is None else rtn_indx, **fields)
+    template.cal_rec_len()
+    if template.rec_len > validate.REC_LEN_MAX:  # each MPR is split in its own way
+        return b"".join([rec.encode() for rec in _mpr_records(test_num, results, states, rtn_indx, head_num,
+                                                               site_nums, test_flg, parm_flg, fields)])
+    data = np.frombuffer(template.encode(), dtype=np.uint8)
+    out = np.empty((n, len(data)), dtype=np.uint8)
+    out[:] = data
+    out[:, _MPR_SITE_FIELDS] = np.column_stack([np.broadcast_to(np.asarray(per_site[name]), (n,)).astype(np.uint8)
+                                                for name in ("HEAD_NUM", "SITE_NUM", "TEST_FLG", "PARM_FLG")])
+    if icnt:
+        nibbles = np.zeros((n, nbytes * 2), dtype=np.uint8)
+        nibbles[:, :icnt] = states.astype(np.uint8) & 0x0F
+        out[:, _MPR_RTN_STAT:_MPR_RTN_STAT + nbytes] = nibbles[:, 0::2] | nibbles[:, 1::2] << 4
+    pos = _MPR_RTN_STAT + nbytes
+    out[:, pos:pos + 4 * pins] = np.ascontiguousarray(results, dtype=np.float32).view(np.uint8).reshape(n, 4 * pins)
+    return out.tobytes()
+
+
+def write_mpr(inf, test_num, results, states=None, rtn_indx=None, **kwargs):
+    """Encode the MPRs of one test for all sites (see encode_mpr) and write them to inf in one write.
+
+    Returns:
+        number of records written
+    """
+    inf.write(encode_mpr(test_num, results, states, rtn_indx, **kwargs))
+    return len(results)
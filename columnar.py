@@ -0,0 +1,227 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Columnar read-back of test results into NumPy arrays, one set of arrays per test.
+#
+#     from stdfwriter import columnar
+#
+#     index = columnar.build_index("lot.stdf")        # one pass over the record headers
+#     ptr = columnar.read_ptr_columns("lot.stdf", index)
+#     ptr[1000]["RESULT"], ptr[1000]["SITE_NUM"]      # all results of test 1000, in file order
+#
+# Only the fixed-width prefix of PTR (TEST_NUM .. RESULT, 12 bytes) and MPR (TEST_NUM ..
+# RSLT_CNT, then RTN_STAT/RTN_RSLT) is decoded, as one gather over all records of the type at
+# once; the C*n fields and optional fields after them are never touched. The part a result belongs
+# to is the ordinal of the last PIR on the same head and site before it (-1 if there is none).
+#
+# The index (offset, REC_LEN, REC_TYP, REC_SUB of every record) is the only per-record Python
+# loop; it can be kept with numpy.save and passed back in to skip the header walk.
+
+
+import mmap
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional for the package, this module needs it
+    np = None
+
+from .reader import TruncatedRecordError
+
+
+HEADER_DTYPE = [("rec_len", "u2"), ("rec_typ", "u1"), ("rec_sub", "u1")]  # as reader.HEADER
+INDEX_DTYPE = [("offset", "i8"), ("rec_len", "u2"), ("rec_typ", "u1"), ("rec_sub", "u1")]
+PTR_PREFIX = [("TEST_NUM", "u4"), ("HEAD_NUM", "u1"), ("SITE_NUM", "u1"), ("TEST_FLG", "u1"),
+              ("PARM_FLG", "u1"), ("RESULT", "f4")]  # native byte order, packed
+MPR_PREFIX = [("TEST_NUM", "u4"), ("HEAD_NUM", "u1"), ("SITE_NUM", "u1"), ("TEST_FLG", "u1"),
+              ("PARM_FLG", "u1"), ("RTN_ICNT", "u2"), ("RSLT_CNT", "u2")]
+COLUMNS = ("RESULT", "HEAD_NUM", "SITE_NUM", "TEST_FLG", "PART")
+
+_REC_LEN = struct.Struct("H")
+_PIR_KEY = (5, 10)
+_PTR_KEY = (15, 10)
+_MPR_KEY = (15, 15)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("the columnar reader needs NumPy")
+
+
+def _open(source):
+    """Buffer of a whole STDF file: source is a path, or already a bytes-like object."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as inf:
+            if os.fstat(inf.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ)
+    return source
+
+
+def build_index(source):
+    """Walk the record headers of an STDF file.
+
+    Args:
+        source: file path, or the file contents as a bytes-like object
+
+    Returns:
+        NumPy structured array with offset (of the header), rec_len, rec_typ and rec_sub per record
+
+    Raises:
+        TruncatedRecordError: if the file ends in the middle of a record
+    """
+    _require_numpy()
+    buf = _open(source)
+    size = len(buf)
+    rec_len = _REC_LEN.unpack_from
+    offsets = []
+    append = offsets.append
+    offset = 0
+    while offset + 4 <= size:  # only the chain of offsets is walked here, the headers are read below
+        append(offset)
+        offset += 4 + rec_len(buf, offset)[0]
+    if offset != size:
+        raise TruncatedRecordError(offsets.pop() if offset > size else offset)
+    index = np.empty(len(offsets), dtype=INDEX_DTYPE)
+    index["offset"] = offsets
+    if len(offsets):
+        headers = _gather(np.frombuffer(buf, dtype=np.uint8), index["offset"], HEADER_DTYPE)
+        for name in ("rec_len", "rec_typ", "rec_sub"):
+            index[name] = headers[name]
+    return index
+
+
+def _select(index, key):
+    return index[(index["rec_typ"] == key[0]) & (index["rec_sub"] == key[1])]
+
+
+def _gather(data, offsets, dtype):
+    """Decode the fixed-width prefix at offsets (of the record bodies) as a structured array."""
+    dtype = np.dtype(dtype)
+    raw = data[offsets[:, None] + np.arange(dtype.itemsize)]
+    return raw.view(dtype).reshape(len(offsets))
+
+
+def part_ordinals(data, index, rec_offsets, heads, sites):
+    """Ordinal of the part (PIR) each record belongs to.
+
+    Args:
+        data: file contents as a uint8 array
+        index: the record index
+        rec_offsets: header offsets of the records, ascending
+        heads, sites: HEAD_NUM and SITE_NUM of the records
+
+    Returns:
+        int64 array, the 0-based ordinal in the file of the last PIR on the same head and site
+        before each record, or -1
+    """
+    pir = _select(index, _PIR_KEY)
+    pir = pir[pir["rec_len"] >= 2]
+    pir_offsets = pir["offset"]
+    pir_sites = data[pir_offsets[:, None] + 4 + np.arange(2)].astype(np.int64)
+    pir_keys = pir_sites[:, 0] * 256 + pir_sites[:, 1]
+    rec_keys = heads.astype(np.int64) * 256 + sites
+    n_pir = len(pir_offsets)
+    # merge PIRs and records in file order, then sort by head/site keeping file order inside each
+    keys = np.concatenate([pir_keys, rec_keys])
+    positions = np.concatenate([pir_offsets, rec_offsets])
+    span = n_pir + 1
+    values = np.concatenate([pir_keys * span + np.arange(n_pir), rec_keys * span - 1])
+    order = np.lexsort((positions, keys))
+    running = np.maximum.accumulate(values[order])
+    base = keys[order] * span
+    ordinals = np.empty_like(running)
+    ordinals[order] = np.where(running >= base, running - base, -1)
+    return ordinals[n_pir:]
+
+
+def _split_by_test(test_nums, columns, tests):
+    """Group column values by test number; every column of a test is a contiguous array."""
+    if tests is not None:
+        keep = np.isin(test_nums, np.asarray(list(tests), dtype=np.uint32))
+        test_nums = test_nums[keep]
+        columns = {name: col[keep] for name, col in columns.items()}
+    order = np.argsort(test_nums, kind="stable")
+    test_nums = test_nums[order]
+    columns = {name: np.ascontiguousarray(col[order]) for name, col in columns.items()}
+    uniq, starts = np.unique(test_nums, return_index=True)
+    ends = np.append(starts[1:], len(test_nums))
+    return {int(test): {name: col[start:end] for name, col in columns.items()}
+            for test, start, end in zip(uniq, starts, ends)}
+
+
+def read_ptr_columns(source, index=None, tests=None):
+    """Decode the PTRs of a file into per-test columns.
+
+    Args:
+        source: file path, or the file contents as a bytes-like object
+        index: the file's build_index() result, built when not given
+        tests: test numbers to keep, all tests when None
+
+    Returns:
+        dict of TEST_NUM to a dict of COLUMNS (RESULT, HEAD_NUM, SITE_NUM, TEST_FLG, PART) arrays,
+        in file order; PTRs shorter than the 12 byte prefix are skipped
+    """
+    _require_numpy()
+    buf = _open(source)
+    if index is None:
+        index = build_index(buf)
+    data = np.frombuffer(buf, dtype=np.uint8)
+    ptr = _select(index, _PTR_KEY)
+    ptr = ptr[ptr["rec_len"] >= np.dtype(PTR_PREFIX).itemsize]
+    fields = _gather(data, ptr["offset"] + 4, PTR_PREFIX)
+    columns = {
+        "RESULT": fields["RESULT"],
+        "HEAD_NUM": fields["HEAD_NUM"],
+        "SITE_NUM": fields["SITE_NUM"],
+        "TEST_FLG": fields["TEST_FLG"],
+        "PART": part_ordinals(data, index, ptr["offset"], fields["HEAD_NUM"], fields["SITE_NUM"]),
+    }
+    return _split_by_test(fields["TEST_NUM"], columns, tests)
+
+
+def read_mpr_columns(source, index=None, tests=None):
+    """Decode the MPRs of a file into per-test columns, one row per RTN_RSLT element.
+
+    Returns:
+        dict of TEST_NUM to a dict of COLUMNS arrays plus RSLT_INDX, the position of each result
+        in its record's RTN_RSLT array
+    """
+    _require_numpy()
+    buf = _open(source)
+    if index is None:
+        index = build_index(buf)
+    data = np.frombuffer(buf, dtype=np.uint8)
+    mpr = _select(index, _MPR_KEY)
+    mpr = mpr[mpr["rec_len"] >= np.dtype(MPR_PREFIX).itemsize]
+    fields = _gather(data, mpr["offset"] + 4, MPR_PREFIX)
+    # RTN_RSLT follows RTN_STAT, RTN_ICNT nibbles packed two per byte
+    rslt_start = mpr["offset"] + 4 + np.dtype(MPR_PREFIX).itemsize + (fields["RTN_ICNT"].astype(np.int64) + 1) // 2
+    counts = fields["RSLT_CNT"].astype(np.int64)
+    fits = rslt_start + 4 * counts <= mpr["offset"] + 4 + mpr["rec_len"]
+    counts = np.where(fits, counts, 0)  # records cut short of their results are skipped
+    rows = np.repeat(np.arange(len(mpr)), counts)
+    element = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    starts = rslt_start[rows] + 4 * element
+    results = data[starts[:, None] + np.arange(4)].view(np.float32).reshape(len(rows))
+    part = part_ordinals(data, index, mpr["offset"], fields["HEAD_NUM"], fields["SITE_NUM"])
+    columns = {
+        "RESULT": results,
+        "HEAD_NUM": fields["HEAD_NUM"][rows],
+        "SITE_NUM": fields["SITE_NUM"][rows],
+        "TEST_FLG": fields["TEST_FLG"][rows],
+        "PART": part[rows],
+        "RSLT_INDX": element.astype(np.uint16),
+    }
+    return _split_by_test(fields["TEST_NUM"][rows], columns, tests)
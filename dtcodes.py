@@ -11,7 +11,11 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 
+import array
+import functools
+import io
 import struct
+import sys
 
 
 def _write_dtype_C1(file, data):
@@ -39,7 +43,7 @@ def _write_dtype_U4(file, data):
 
 
 def _write_dtype_U8(file, data):
-    file.write(struct.pack("H", data))
+    file.write(struct.pack("Q", data))
 
 
 def _write_dtype_I1(file, data):
@@ -72,45 +76,108 @@ def _write_dtype_header(file, len, typ, sub):
     _write_dtype_U1(file, sub)
 
 
-def _write_nbytes(file, data, n):
-    file.write(struct.pack("{}s".format(n), data.encode('ascii')))
+def _encode_Cn(data):
+    return bytes((len(data),)) + data.encode('ascii')
+
+
+# Encoded C*n strings, length byte included. The same test names, units and formats are written
+# for every part, so most C*n fields are served from here with one lookup.
+CN_CACHE_SIZE = 4096
+
+_encode_Cn_cached = functools.lru_cache(maxsize=CN_CACHE_SIZE)(_encode_Cn)
+
+
+def set_cn_cache_size(maxsize):
+    """Replace the C*n cache by an empty one holding up to maxsize strings (0: no caching)."""
+    global _encode_Cn_cached
+    _encode_Cn_cached = functools.lru_cache(maxsize=maxsize)(_encode_Cn)
+
+
+def cn_cache_info():
+    """Hits, misses, maxsize and current size of the C*n cache, as functools.lru_cache reports them."""
+    return _encode_Cn_cached.cache_info()
+
+
+def clear_cn_cache():
+    _encode_Cn_cached.cache_clear()
 
 
 def _write_dtype_Cn(file, data):
-    _write_dtype_B1(file, len(data))
-    if len(data):
-        _write_nbytes(file, data, len(data))
+    if len(data) > 255:
+        raise struct.error("C*n string longer than 255 bytes")
+    file.write(_encode_Cn_cached(data))
 
 
 def _write_dtype_Bn(file, data):
-    data = str(data)  # change to string type, then we can use _write_dtype_Cn
-    if data:
-        [_write_dtype_Cn(file, d) for d in data]
-    else:
-        _write_dtype_B1(file, len(data))
+    if isinstance(data, str):
+        data = data.encode('latin-1')
+    _write_dtype_B1(file, len(data))
+    if len(data):
+        file.write(bytes(data))
 
 
 def _write_dtype_Dn(file, data):
-    if data:
-        _write_dtype_U2(file, len(data)*8)
-        [_write_dtype_U1(file, d) for d in data]
-    else:
-        _write_dtype_U2(file, len(data))
+    _write_dtype_U2(file, len(data)*8)
+    if len(data):
+        file.write(bytes(data))
+
+
+def _write_dtype_Sn(file, data):
+    data = data.encode('ascii')
+    _write_dtype_U2(file, len(data))
+    file.write(data)
+
+
+# kx arrays are packed with one call for the whole array: a struct format with a repeat count
+# for sequences, a cast and tobytes() for NumPy arrays, and a plain copy for buffers (bytes,
+# array.array, memoryview) whose items already have the element format.
+UF_FORMATS = {1: "B", 2: "H", 4: "I", 8: "Q"}  # U*f element size to struct format
+
+
+def _pack_array(fmt, data, n):
+    n = int(n)
+    if n <= 0:
+        return b""
+    if hasattr(data, "dtype"):
+        return data[:n].astype(fmt, copy=False).tobytes()
+    if isinstance(data, (bytes, bytearray, memoryview, array.array)):
+        view = memoryview(data)
+        if view.format == fmt and view.ndim == 1:
+            return view[:n].tobytes()
+    return struct.pack("{}{}".format(n, fmt), *data[:n])
 
 
 def _write_dtype_xU1(file, data, n):
-    for i in range(int(n)):
-        _write_dtype_U1(file, data[i])
+    file.write(_pack_array("B", data, n))
 
 
 def _write_dtype_xU2(file, data, n):
-    for i in range(int(n)):
-        _write_dtype_U2(file, data[i])
+    file.write(_pack_array("H", data, n))
+
+
+def _write_dtype_xU4(file, data, n):
+    file.write(_pack_array("I", data, n))
+
+
+def _write_dtype_xU8(file, data, n):
+    file.write(_pack_array("Q", data, n))
 
 
 def _write_dtype_xR4(file, data, n):
-    for i in range(int(n)):
-        _write_dtype_R4(file, data[i])
+    file.write(_pack_array("f", data, n))
+
+
+def _write_dtype_xUf(file, data, n, size):
+    if int(n):
+        file.write(_pack_array(UF_FORMATS[size], data, n))
+
+
+def _write_dtype_xCf(file, data, n, size):
+    """Fixed length strings, padded with spaces to size bytes."""
+    items = [data[i].encode('ascii') for i in range(int(n))]
+    if any(len(item) > size for item in items):
+        raise struct.error("C*f string longer than {} bytes".format(size))
+    file.write(b"".join(item.ljust(size) for item in items))
 
 
 def _write_dtype_xCn(file, data, n):
@@ -118,18 +185,22 @@ def _write_dtype_xCn(file, data, n):
         _write_dtype_Cn(file, data[i])
 
 
+def _write_dtype_xSn(file, data, n):
+    for i in range(int(n)):
+        _write_dtype_Sn(file, data[i])
+
+
 def _write_dtype_xBn(file, data, n):
     for i in range(int(n)):
         _write_dtype_Bn(file, data[i])
 
 
 def _write_dtype_xN1(file, data, n):
-    for i in range(int(int(n)/2 + int(n) % 2)):
-        _write_dtype_U1(file, data[i])
+    _write_dtype_xU1(file, data, (int(n) + 1) // 2)  # two nibbles per byte
 
 
 _VN_map = {  # first byte is vn map key, following bytes is data
-    0: lambda file, data: [_write_dtype_B1(file, 0), _write_dtype_B1(file, data)],
+    0: lambda file, data: _write_dtype_B1(file, 0),  # pad field, no data
     1: lambda file, data: [_write_dtype_B1(file, 1), _write_dtype_U1(file, data)],
     2: lambda file, data: [_write_dtype_B1(file, 2), _write_dtype_U2(file, data)],
     3: lambda file, data: [_write_dtype_B1(file, 3), _write_dtype_U4(file, data)],
@@ -145,6 +216,123 @@ _VN_map = {  # first byte is vn map key, following bytes is data
 }
 
 
+# V*n fields (GDR GEN_DATA) are encoded from tables rather than through _VN_map: a field is
+# its type code followed by the data, and the data of 2, 4 and 8 byte numbers must start on an
+# even offset in the record, which takes a pad field (code 0, no data) before the code when the
+# code would start on an even offset.
+VN_FORMATS = {1: "B", 2: "H", 3: "I", 4: "b", 5: "h", 6: "i", 7: "f", 8: "d", 13: "B"}
+VN_ALIGNED = frozenset((2, 3, 5, 6, 7, 8))
+VN_CODES = {"u1": 1, "u2": 2, "u4": 3, "i1": 4, "i2": 5, "i4": 6, "f4": 7, "f8": 8}  # NumPy dtype to code
+
+_VN_STRUCTS = {code: struct.Struct("=B" + fmt) for code, fmt in VN_FORMATS.items()}
+_VN_PADDED = {code: struct.Struct("=xB" + fmt) for code, fmt in VN_FORMATS.items() if code in VN_ALIGNED}
+
+
+def vn_items(fields):
+    """(code, value) pairs of a V*n field value.
+
+    The value is a dict of code to value (one value per code), or a sequence whose items are
+    (code, value) pairs or NumPy arrays; an array stands for one field per element, with the code
+    of its dtype unless it is given as the value of a (code, array) pair.
+    """
+    if isinstance(fields, dict):
+        return fields.items()
+    return [(_vn_code(item.dtype), item) if hasattr(item, "dtype") else item for item in fields]
+
+
+def _vn_code(dtype):
+    code = VN_CODES.get(dtype.kind + str(dtype.itemsize))
+    if code is None:
+        raise ValueError("no V*n data type code for arrays of {}".format(dtype))
+    return code
+
+
+def _vn_data_len(code, value):
+    if code in VN_FORMATS:
+        return struct.calcsize(VN_FORMATS[code])
+    if code == 0:
+        return 0
+    if code == 10 or code == 11:
+        return len(value) + 1
+    if code == 12:
+        return len(value) + 2
+    raise ValueError("unknown V*n data type code {}".format(code))
+
+
+def vn_layout(fields, offset):
+    """Length and field count of a V*n value, pad fields included.
+
+    Args:
+        fields: the V*n value, see vn_items
+        offset: offset of the first field from the start of the record (header included)
+
+    Returns:
+        (length in bytes, number of fields)
+    """
+    length = count = 0
+    for code, value in vn_items(fields):
+        size = _vn_data_len(code, value)
+        pad = code in VN_ALIGNED and (offset + length) % 2 == 0
+        if hasattr(value, "dtype"):
+            # the first element is padded as a single field would be; the code byte and even sized
+            # data of an element leave the next one on an even offset, so every later one is padded
+            n = len(value)
+            if n:
+                later = n - 1 if code in VN_ALIGNED else 0
+                length += n * (1 + size) + pad + later
+                count += n + pad + later
+        else:
+            length += 1 + size + pad
+            count += 1 + pad
+    return length, count
+
+
+def _encode_vn_array(code, value, pad):
+    """Fields of the elements of an array, every element but the first padded if the code is aligned
+    (the first one if pad is true)."""
+    np = sys.modules["numpy"]  # arrays only come from NumPy, which is then already imported
+    fmt = "=" + VN_FORMATS[code]
+    aligned = code in VN_ALIGNED
+    names = ([("pad", "u1")] if aligned else []) + [("code", "u1"), ("value", fmt)]
+    packed = np.zeros(len(value), dtype=names)
+    packed["code"] = code
+    packed["value"] = value
+    data = packed.tobytes()
+    return data if pad or not aligned else data[1:]
+
+
+def encode_vn(fields, offset):
+    """Encode a V*n value into one buffer, inserting the pad fields needed for alignment.
+
+    Args:
+        fields: the V*n value, see vn_items
+        offset: offset of the first field from the start of the record (header included)
+
+    Returns:
+        bytes
+    """
+    pieces = []
+    append = pieces.append
+    pos = offset
+    for code, value in vn_items(fields):
+        pad = code in VN_ALIGNED and pos % 2 == 0
+        if hasattr(value, "dtype"):
+            data = _encode_vn_array(code, value, pad)
+        elif code in VN_FORMATS:
+            data = (_VN_PADDED if pad else _VN_STRUCTS)[code].pack(code, value)
+        elif code == 0:
+            data = b"\x00"
+        elif code == 10:
+            data = b"\x0a" + _encode_Cn_cached(value)
+        else:
+            out = io.BytesIO()
+            write_record_map["Bn" if code == 11 else "Dn"](out, value)
+            data = bytes((code,)) + out.getvalue()
+        append(data)
+        pos += len(data)
+    return b"".join(pieces)
+
+
 write_record_map = {
     "C1": _write_dtype_C1,
     "B1": _write_dtype_B1,
@@ -161,9 +349,15 @@ write_record_map = {
     "Cn": _write_dtype_Cn,
     "Bn": _write_dtype_Bn,
     "Dn": _write_dtype_Dn,
+    "Sn": _write_dtype_Sn,
     "kxU1": _write_dtype_xU1,
     "kxU2": _write_dtype_xU2,
+    "kxU4": _write_dtype_xU4,
+    "kxU8": _write_dtype_xU8,
+    "kxUf": _write_dtype_xUf,
     "kxCn": _write_dtype_xCn,
+    "kxCf": _write_dtype_xCf,
+    "kxSn": _write_dtype_xSn,
     "kxN1": _write_dtype_xN1,
     "kxR4": _write_dtype_xR4,
     "Vn": _VN_map,
@@ -0,0 +1,274 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Crash-safe writing: whole records only, group-commit fsync, and recovery of an interrupted file.
+#
+#     from stdfwriter.durable import DurableWriter, recover
+#
+#     out = DurableWriter("lot.stdf", sync_records=1000, sync_interval=0.5)
+#     FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+#     ...
+#     out.finish()             # summary records from the accumulated counts, MRR, sync, close
+#
+#     recover("lot.stdf")      # after a crash: trim the torn tail, append summaries and MRR
+#
+# Records written to a DurableWriter are held in memory and reach the file together at a commit:
+# one write of whole records followed by one fdatasync, every sync_records records or when a
+# write comes sync_interval seconds after the last commit. A crash loses at most the records since
+# the last commit, and a file cut during a commit write ends in a partial record that recovery
+# removes. The writer keeps a SummaryAccumulator of everything committed and saves it every
+# checkpoint_interval seconds to <path>.ckpt (replaced atomically), so recovery only has to read
+# the records after the checkpoint to rebuild the summary counts.
+#
+# Opening a DurableWriter on an existing file recovers it without finishing it and appends to it.
+
+
+import collections
+import json
+import os
+import time
+
+from .reader import HEADER, TruncatedRecordError, read_records
+from .recheaders import MRR, PRR
+from .summary import SummaryAccumulator
+
+
+CHECKPOINT_SUFFIX = ".ckpt"
+
+RecoveryReport = collections.namedtuple("RecoveryReport", "size trimmed replayed closed_parts summary_records finished")
+
+ABORTED_PART_FLG = 0x14  # PRR PART_FLG of the parts recovery closes: abnormal end, no pass/fail indication
+
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+
+def _fsync_dir(path):
+    """Make a new or renamed directory entry durable (POSIX; not possible on Windows)."""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _load_checkpoint(path, size):
+    """Checkpointed (offset, SummaryAccumulator), or (0, empty accumulator) if there is no usable one."""
+    try:
+        with open(path + CHECKPOINT_SUFFIX) as inf:
+            state = json.load(inf)
+        if state["size"] <= size:
+            return state["size"], SummaryAccumulator.from_dict(state["summary"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return 0, SummaryAccumulator()
+
+
+def save_checkpoint(path, size, summary):
+    """Atomically replace the checkpoint of path with the summary of its first size bytes."""
+    tmp = path + CHECKPOINT_SUFFIX + ".tmp"
+    with open(tmp, "w") as out:
+        json.dump({"size": size, "summary": summary.to_dict()}, out)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, path + CHECKPOINT_SUFFIX)
+    _fsync_dir(path)
+
+
+def _recover(path):
+    """Trim a torn tail and rebuild the summary counts.
+
+    Returns:
+        (size of the whole records, SummaryAccumulator of them, bytes trimmed, records replayed)
+    """
+    size = os.path.getsize(path)
+    start, summary = _load_checkpoint(path, size)
+    end = start
+    replayed = 0
+    with open(path, "rb") as inf:
+        inf.seek(start)
+        feed = summary.feed
+        try:
+            for rec_typ, rec_sub, body in read_records(inf):
+                feed(rec_typ, rec_sub, body)
+                end += 4 + len(body)
+                replayed += 1
+        except TruncatedRecordError:
+            pass
+    if end < size:
+        with open(path, "r+b") as out:
+            out.truncate(end)
+            os.fsync(out.fileno())
+    return end, summary, size - end, replayed
+
+
+def recover(path, finish=True, per_site=True, finish_t=None, abort_bin=0):
+    """Make an interrupted STDF file whole again.
+
+    The file is cut back to its last whole record. If finish is set and the file has no MRR, a
+    PRR closes every part left without one (as an abnormal end, in hardware bin abort_bin), then
+    the summary records (TSR, HBR, SBR, PCR) computed from the part and test records and an MRR
+    are appended, and the checkpoint is removed.
+
+    Args:
+        path: the STDF file
+        finish: append the closing PRRs, summary records and MRR
+        per_site: summary records per head and site as well as for all sites
+        finish_t: MRR FINISH_T, the current time when None
+        abort_bin: HARD_BIN of the PRRs closing interrupted parts
+
+    Returns:
+        RecoveryReport(size, trimmed, replayed, closed_parts, summary_records, finished): the
+        final file size, the bytes cut off, the records read after the checkpoint, the PRRs and
+        summary records appended and whether an MRR was appended
+    """
+    size, summary, trimmed, replayed = _recover(path)
+    if not finish or summary.mrr_seen or size == 0:
+        return RecoveryReport(size, trimmed, replayed, 0, 0, False)
+    recs = [PRR(HEAD_NUM=head, SITE_NUM=site, PART_FLG=ABORTED_PART_FLG, NUM_TEST=0, HARD_BIN=abort_bin)
+            for head, site in sorted(summary.open_parts)]
+    closed = len(recs)
+    for rec in recs:
+        summary.add_part(rec.field_values["HEAD_NUM"], rec.field_values["SITE_NUM"], ABORTED_PART_FLG, abort_bin)
+    recs += summary.records(per_site)
+    recs.append(MRR(FINISH_T=int(time.time()) if finish_t is None else finish_t))
+    with open(path, "ab") as out:
+        out.write(b"".join(rec.encode() for rec in recs))
+        out.flush()
+        os.fsync(out.fileno())
+        size = out.tell()
+    try:
+        os.remove(path + CHECKPOINT_SUFFIX)
+    except OSError:
+        pass
+    return RecoveryReport(size, trimmed, replayed, closed, len(recs) - closed - 1, True)
+
+
+class DurableWriter:
+    """Output file that only ever exposes whole records, synced in groups.
+
+    Records call write_record(inf) with an instance of this class as inf.
+
+    Attributes:
+        path: the STDF file, appended to if it exists
+        sync_records: commit after this many records
+        sync_interval: commit on the first write this many seconds after the last commit
+        checkpoint_interval: save the summary checkpoint at the first commit this many seconds
+                             after the last one (None: never)
+        summary: SummaryAccumulator of the committed records
+        size: bytes of the file that are committed
+        recovery: RecoveryReport of the existing file, None for a new one
+
+    Methods:
+        write: take the bytes of whole or partial records
+        commit: write the pending records and fdatasync the file
+        finish: write the summary records and the MRR, then close
+        close: commit and close
+
+    Raises:
+        ValueError: if path is a finished file, ending with an MRR
+    """
+
+    def __init__(self, path, sync_records=1000, sync_interval=1.0, checkpoint_interval=30.0):
+        self.path = path
+        self.sync_records = sync_records
+        self.sync_interval = sync_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.recovery = None
+        if os.path.exists(path):
+            self.size, self.summary, trimmed, replayed = _recover(path)
+            if self.summary.mrr_seen:
+                raise ValueError("{} is finished (it has an MRR), records cannot be appended to it".format(path))
+            self.recovery = RecoveryReport(self.size, trimmed, replayed, 0, 0, False)
+        else:
+            self.size, self.summary = 0, SummaryAccumulator()
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0), 0o666)
+        if self.recovery is None:
+            _fsync_dir(path)
+        self._records = []  # (rec_typ, rec_sub, bytes of the whole record) waiting for the next commit
+        self._pending = b""  # bytes of an incomplete record
+        self._last_commit = self._last_checkpoint = time.monotonic()
+
+    def write(self, data):
+        buf = memoryview(self._pending + data if self._pending else data)
+        size = len(buf)
+        offset = 0
+        records = self._records
+        while offset + 4 <= size:
+            rec_len, rec_typ, rec_sub = HEADER.unpack_from(buf, offset)
+            end = offset + 4 + rec_len
+            if end > size:
+                break
+            records.append((rec_typ, rec_sub, bytes(buf[offset:end])))
+            offset = end
+        self._pending = bytes(buf[offset:])
+        if len(records) >= self.sync_records or time.monotonic() - self._last_commit >= self.sync_interval:
+            self.commit()
+        return len(data)
+
+    def commit(self):
+        """Write the records received so far to the file in one write and fdatasync it."""
+        now = time.monotonic()
+        if self._records:
+            data = b"".join(rec for _, _, rec in self._records)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+            _fdatasync(self._fd)
+            feed = self.summary.feed
+            for rec_typ, rec_sub, rec in self._records:
+                feed(rec_typ, rec_sub, memoryview(rec)[4:])
+            self.size += len(data)
+            self._records = []
+            if self.checkpoint_interval is not None and now - self._last_checkpoint >= self.checkpoint_interval:
+                save_checkpoint(self.path, self.size, self.summary)
+                self._last_checkpoint = now
+        self._last_commit = now
+
+    def flush(self):
+        self.commit()
+
+    def finish(self, per_site=True, **mrr_fields):
+        """Write the summary records of everything written so far and the MRR, then close.
+
+        Args:
+            per_site: summary records per head and site as well as for all sites
+            mrr_fields: MRR fields, FINISH_T defaults to the current time
+        """
+        self.commit()
+        mrr_fields.setdefault("FINISH_T", int(time.time()))
+        for rec in self.summary.records(per_site) + [MRR(**mrr_fields)]:
+            rec.write_record(self)
+        self.close()
+        try:
+            os.remove(self.path + CHECKPOINT_SUFFIX)
+        except OSError:
+            pass
+
+    def close(self):
+        """Commit and close; the bytes of an incomplete last record are dropped."""
+        if self._fd is None:
+            return
+        self.commit()
+        os.close(self._fd)
+        self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,292 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Filtering and transforming existing STDF files, copying the records left alone as raw bytes.
+#
+#     from stdfwriter import filters
+#
+#     filters.filter_file("lot.stdf", "lot_small.stdf",
+#                         filters.DropRecords("DTR", "GDR"),
+#                         filters.DropTests(range(9000, 9100)),
+#                         filters.StampATR("stdf_filter --strip-dtr"))
+#
+# Only the record headers of the file are read in Python. Each transform names the record types
+# it targets; a record of those types is given to the transforms as a recview view, which decodes
+# the fields the transform looks at and nothing else. A transform returns the view unchanged to
+# keep the record, None to drop it, or records (recheaders objects or views) to put in its place.
+# Records kept unchanged, and every record of a type no transform targets, are never decoded or
+# encoded: the byte ranges between the records that changed are copied from the input to the
+# output with os.copy_file_range (the kernel copies, or shares, the blocks), else os.sendfile,
+# else a write of a memoryview of the mmap'ed input. Replacement records are encoded by their
+# recheaders class and passed on to the later transforms that target their type.
+#
+# A transform is any object with a types attribute (record names, classes or (REC_TYP, REC_SUB))
+# and an apply(view) method; MapRecords wraps a function taking and returning record objects.
+
+
+import collections
+import errno
+import mmap
+import os
+import struct
+import time
+
+from . import recheaders
+from .recview import view_class
+from .reader import HEADER, TruncatedRecordError
+
+
+FilterReport = collections.namedtuple("FilterReport", "records transformed changed size")
+
+_WRITE_BATCH = 1 << 20
+_LEN_CODE = struct.Struct("HH")  # REC_LEN, then REC_TYP and REC_SUB as one U2
+_FALLBACK_ERRNOS = frozenset(getattr(errno, name) for name in ("EXDEV", "EINVAL", "ENOSYS", "EOPNOTSUPP", "EBADF",
+                                                               "ESPIPE") if hasattr(errno, name))
+
+
+def _type_keys(types):
+    """(REC_TYP, REC_SUB) of record types given as names, classes or keys."""
+    keys = set()
+    for typ in types:
+        if isinstance(typ, str):
+            typ = getattr(recheaders, typ)
+        keys.add(typ if isinstance(typ, tuple) else (typ.rec_typ, typ.rec_sub))
+    return frozenset(keys)
+
+
+class DropRecords:
+    """Leave out every record of the given types, e.g. DropRecords("DTR", "GDR")."""
+
+    def __init__(self, *types):
+        self.types = types
+
+    def apply(self, view):
+        return None
+
+
+class DropTests:
+    """Leave out the results (and TSRs) of the given TEST_NUMs.
+
+    Attributes:
+        test_nums(frozenset): TEST_NUMs dropped
+        types: record types whose TEST_NUM is checked
+    """
+
+    def __init__(self, test_nums, types=("PTR", "MPR", "FTR", "STR", "TSR")):
+        self.test_nums = frozenset(test_nums)
+        self.types = types
+
+    def apply(self, view):
+        return None if view.TEST_NUM in self.test_nums else view
+
+
+class StampATR:
+    """Add an ATR after the FAR and the ATRs already in the file (before the first VUR or MIR).
+
+    Attributes:
+        CMD_LINE: the ATR command line, naming the program that changed the file
+        MOD_TIM: the ATR modification time, the time the filter runs when None
+    """
+
+    types = ("VUR", "MIR")
+
+    def __init__(self, CMD_LINE, MOD_TIM=None):
+        self.CMD_LINE = CMD_LINE
+        self.MOD_TIM = MOD_TIM
+        self._done = False
+
+    def apply(self, view):
+        if self._done:
+            return view
+        self._done = True
+        mod_tim = int(time.time()) if self.MOD_TIM is None else self.MOD_TIM
+        return [recheaders.ATR(MOD_TIM=mod_tim, CMD_LINE=self.CMD_LINE), view]
+
+
+class MapRecords:
+    """Apply a function to the records of the given types, decoded into record objects.
+
+    The function takes a record object (PTR, ...) and returns it, a changed copy, None to drop it,
+    or a list of records to put in its place. The record is encoded again even if unchanged.
+    """
+
+    def __init__(self, types, function):
+        self.types = types
+        self.function = function
+
+    def apply(self, view):
+        return self.function(view.to_record())
+
+
+def _as_view(item):
+    if hasattr(item, "body"):
+        return item
+    data = item.encode()
+    views = []
+    offset = 0
+    while offset < len(data):  # a long record may have been split into several
+        rec_len, rec_typ, rec_sub = HEADER.unpack_from(data, offset)
+        views.append(view_class(rec_typ, rec_sub)(data[offset + 4:offset + 4 + rec_len]))
+        offset += 4 + rec_len
+    return views
+
+
+class _Output:
+    """Destination of filter_file: copies byte ranges of the input, writes new records."""
+
+    def __init__(self, dst, src_fd, src_buf):
+        if isinstance(dst, (str, bytes, os.PathLike)):
+            self._file = open(dst, "wb")
+            self._own = True
+        else:
+            self._file = dst
+            self._own = False
+        try:
+            self._fd = self._file.fileno()
+        except (AttributeError, OSError):
+            self._fd = None
+        self._src_fd = src_fd
+        self._src = src_buf
+        if self._fd is None:
+            self._copy = "write"
+        else:
+            self._copy = next((name for name in ("copy_file_range", "sendfile") if hasattr(os, name)), "write")
+        self._batch = bytearray()
+        self.size = 0
+
+    def write(self, data):
+        self._batch += data
+        self.size += len(data)
+        if len(self._batch) >= _WRITE_BATCH:
+            self._write_batch()
+
+    def _write_batch(self):
+        if self._batch:
+            self._file.write(self._batch)
+            self._batch = bytearray()
+
+    def copy(self, start, stop):
+        """Copy bytes start..stop of the input."""
+        if start >= stop:
+            return
+        self._write_batch()
+        self.size += stop - start
+        if self._copy != "write":
+            self._file.flush()  # the bytes written so far go first
+        while start < stop and self._copy != "write":
+            try:
+                if self._copy == "copy_file_range":
+                    done = os.copy_file_range(self._src_fd, self._fd, stop - start, start)
+                else:
+                    done = os.sendfile(self._fd, self._src_fd, start, stop - start)
+            except OSError as exc:
+                if exc.errno not in _FALLBACK_ERRNOS:
+                    raise
+                # not supported for these files: try the next method
+                self._copy = "sendfile" if self._copy == "copy_file_range" and hasattr(os, "sendfile") else "write"
+                continue
+            if done == 0:
+                break
+            start += done
+        if start < stop:
+            with memoryview(self._src)[start:stop] as chunk:
+                self._file.write(chunk)
+
+    def close(self):
+        self._write_batch()
+        if self._own:
+            self._file.close()
+        elif hasattr(self._file, "flush"):
+            self._file.flush()
+
+
+def filter_file(src, dst, *transforms):
+    """Copy an STDF file through transforms.
+
+    Args:
+        src: path of the input file
+        dst: path of the output file, or a binary file opened for writing (it must not be src)
+        transforms: objects with types and apply(view), applied in order
+
+    Returns:
+        FilterReport(records, transformed, changed, size): records read, records given to a
+        transform, records of the input dropped or replaced, bytes written
+
+    Raises:
+        TruncatedRecordError: if the input ends in the middle of a record; the records before it
+                              have been written
+    """
+    targets = [(_type_keys(transform.types), transform) for transform in transforms]
+    targeted = frozenset().union(*[keys for keys, _ in targets])
+    # REC_TYP and REC_SUB read as one little-endian U2: typ | sub << 8, no tuple per record
+    targeted_codes = frozenset(typ | sub << 8 for typ, sub in targeted)
+    records = transformed = changed = 0
+    with open(src, "rb") as inf:
+        size = os.fstat(inf.fileno()).st_size
+        buf = mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        data = memoryview(buf)
+        out = _Output(dst, inf.fileno(), buf)
+        try:
+            unpack = _LEN_CODE.unpack_from
+            offset = kept = 0
+            while offset + 4 <= size:
+                rec_len, code = unpack(buf, offset)
+                end = offset + 4 + rec_len
+                if end > size:
+                    break
+                records += 1
+                if code in targeted_codes:
+                    transformed += 1
+                    view = view_class(code & 0xFF, code >> 8)(data[offset + 4:end])
+                    items = _apply(targets, view)
+                    if len(items) != 1 or items[0] is not view:
+                        out.copy(kept, offset)
+                        kept = end
+                        changed += all(item is not view for item in items)
+                        for item in items:
+                            out.write(HEADER.pack(len(item.body), item.rec_typ, item.rec_sub))
+                            out.write(item.body)
+                offset = end
+            out.copy(kept, offset)
+        finally:
+            out.close()
+            data.release()
+            if size:
+                try:
+                    buf.close()
+                except BufferError:  # views kept by a transform still use the mapping
+                    pass
+        if offset != size:
+            raise TruncatedRecordError(offset)
+    return FilterReport(records, transformed, changed, out.size)
+
+
+def _apply(targets, view):
+    items = [view]
+    for keys, transform in targets:
+        result = []
+        for item in items:
+            if (item.rec_typ, item.rec_sub) not in keys:
+                result.append(item)
+                continue
+            done = transform.apply(item)
+            if done is None:
+                continue
+            for rec in done if isinstance(done, (list, tuple)) else (done,):
+                rec = _as_view(rec)
+                if isinstance(rec, list):
+                    result += rec
+                else:
+                    result.append(rec)
+        items = result
+    return items
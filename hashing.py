@@ -0,0 +1,212 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Content hash of an STDF file computed while it is written, and verification against it.
+#
+#     from stdfwriter.hashing import HashingWriter, verify
+#
+#     with HashingWriter("lot.stdf", algorithm="blake2b", block_size=1 << 24) as out:
+#         FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+#         ...
+#     out.digest               # hex digest of the whole file
+#
+#     verify("lot.stdf")       # re-read the file and compare with lot.stdf.hash.json
+#
+# Everything written goes to the target unchanged and through a running hashlib hash, so the
+# checksum is ready when the file is closed instead of costing a second read of the file. With
+# block_size, each block_size bytes of the output are also hashed on their own: verify() then
+# names the blocks that changed, and can check a byte range without reading the rest of the file.
+#
+# The sidecar file is JSON:
+#     {"file": "lot.stdf", "algorithm": "blake2b", "size": 1234, "digest": "...",
+#      "block_size": 16777216, "blocks": ["...", ...]}
+# and is replaced atomically when the writer is closed.
+
+
+import collections
+import hashlib
+import json
+import os
+
+
+SIDECAR_SUFFIX = ".hash.json"
+
+VerifyReport = collections.namedtuple("VerifyReport", "ok size digest bad_blocks")
+
+
+def _save_sidecar(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as out:
+        json.dump(state, out)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, path)
+
+
+class HashingWriter:
+    """Output wrapper hashing everything written through it.
+
+    Records call write_record(out) with an instance of this class as out.
+
+    Attributes:
+        target: a path (opened for writing) or an object with write(), such as a file, a
+                VectoredSink or a DurableWriter
+        algorithm: a hashlib algorithm name, e.g. "sha256" or "blake2b" (faster in software)
+        block_size: also hash each block of this many bytes on its own (None: whole file only)
+        sidecar: path of the sidecar file written on close; True for <path>.hash.json when the
+                 target is a path or a file with a name, None for no sidecar
+        size: bytes written so far
+        blocks(list): hex digests of the blocks completed so far
+        digest: hex digest of everything written, set by close()
+
+    Methods:
+        write: write bytes to the target and hash them
+        hexdigest: hex digest of the bytes written so far
+        flush: flush the target
+        close: close the target, set digest and write the sidecar
+    """
+
+    def __init__(self, target, algorithm="sha256", block_size=None, sidecar=True):
+        if isinstance(target, (str, bytes, os.PathLike)):
+            self.path = os.fsdecode(target)
+            self._out = open(self.path, "wb")
+        else:
+            name = getattr(target, "name", None)
+            self.path = name if isinstance(name, str) else None
+            self._out = target
+        self.target = target
+        self.algorithm = algorithm
+        self.block_size = block_size
+        if sidecar is True:
+            sidecar = self.path + SIDECAR_SUFFIX if self.path is not None else None
+        self.sidecar = sidecar
+        self.size = 0
+        self.blocks = []
+        self.digest = None
+        self._hash = hashlib.new(algorithm)
+        self._block = hashlib.new(algorithm) if block_size else None
+        self._block_fill = 0
+
+    def _update_blocks(self, view):
+        while view:
+            take = min(len(view), self.block_size - self._block_fill)
+            self._block.update(view[:take])
+            self._block_fill += take
+            if self._block_fill == self.block_size:
+                self.blocks.append(self._block.hexdigest())
+                self._block = hashlib.new(self.algorithm)
+                self._block_fill = 0
+            view = view[take:]
+
+    def write(self, data):
+        written = self._out.write(data)
+        if not isinstance(data, bytes):
+            data = memoryview(data).cast("B")
+        self._hash.update(data)
+        size = len(data)
+        self.size += size
+        if self._block is not None:
+            if self._block_fill + size < self.block_size:
+                self._block.update(data)
+                self._block_fill += size
+            else:
+                self._update_blocks(memoryview(data))
+        return written
+
+    def hexdigest(self):
+        """Hex digest of the bytes written so far; writing can go on."""
+        return self._hash.hexdigest()
+
+    def flush(self):
+        self._out.flush()
+
+    def close(self):
+        """Close the target, then write the sidecar file if there is one.
+
+        Returns:
+            the hex digest of everything written
+        """
+        if self.digest is not None:
+            return self.digest
+        if self._block is not None and self._block_fill:
+            self.blocks.append(self._block.hexdigest())
+            self._block_fill = 0
+        self.digest = self._hash.hexdigest()
+        self._out.close()
+        if self.sidecar is not None:
+            _save_sidecar(self.sidecar, {
+                "file": os.path.basename(self.path) if self.path is not None else None,
+                "algorithm": self.algorithm,
+                "size": self.size,
+                "digest": self.digest,
+                "block_size": self.block_size,
+                "blocks": self.blocks,
+            })
+        return self.digest
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def verify(path, sidecar=None, start=0, stop=None):
+    """Check a file against the hashes recorded by HashingWriter.
+
+    Without a range, the whole file is read once for its digest and, if the sidecar has them,
+    its block hashes. With a range (and block hashes), only the blocks overlapping
+    [start, stop) are read and checked, and the whole-file digest is not computed.
+
+    Args:
+        path: the file
+        sidecar: the sidecar file, <path>.hash.json when None
+        start, stop: byte range to check (stop None: to the end of the file)
+
+    Returns:
+        VerifyReport(ok, size, digest, bad_blocks): whether everything checked matches, the size
+        of the file, its hex digest (None for a range check) and the byte offsets of the blocks
+        whose hash differs
+    """
+    with open(sidecar if sidecar is not None else path + SIDECAR_SUFFIX) as inf:
+        state = json.load(inf)
+    algorithm = state["algorithm"]
+    block_size = state["block_size"]
+    blocks = state["blocks"] if block_size else []
+    size = os.path.getsize(path)
+    ranged = start > 0 or stop is not None
+    if ranged and not blocks:
+        raise ValueError("a range can only be checked against block hashes")
+    stop = state["size"] if stop is None else min(stop, state["size"])
+    bad = []
+    whole = None if ranged else hashlib.new(algorithm)
+    with open(path, "rb") as inf:
+        if block_size:
+            first = start // block_size if ranged else 0
+            last = -(-stop // block_size) if ranged else len(blocks)
+            inf.seek(first * block_size)
+            for index in range(first, last):
+                data = inf.read(block_size)
+                if whole is not None:
+                    whole.update(data)
+                if index >= len(blocks) or hashlib.new(algorithm, data).hexdigest() != blocks[index]:
+                    bad.append(index * block_size)
+            if whole is not None:
+                for data in iter(lambda: inf.read(1 << 20), b""):  # bytes past the recorded size
+                    whole.update(data)
+        else:
+            for data in iter(lambda: inf.read(1 << 20), b""):
+                whole.update(data)
+    digest = None if whole is None else whole.hexdigest()
+    ok = not bad and (ranged or (size == state["size"] and digest == state["digest"]))
+    return VerifyReport(ok, size, digest, bad)
@@ -0,0 +1,101 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Encoded header sections kept in a file per test program.
+#
+# The pin map (PMR, PGR, PLR), the scan description records and the like are the same for every
+# lot tested with a program. The first lot builds and encodes them, later ones read the bytes:
+#
+#     from stdfwriter.headercache import cached_section
+#
+#     def pin_map():
+#         return [PMR(...) for ...] + [PGR(...), ...] + [PLR(...)]
+#
+#     FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+#     MIR(...).write_record(out)
+#     out.write(cached_section("/var/cache/stdf/prog_a.hdr", pin_map, key="prog_a rev 7"))
+#
+# key identifies what the section was built from (program name and revision, a hash of the pin
+# map source, ...): a file saved under another key is built again and replaced. The file layout:
+#     magic  8 bytes   b"STDFHDR\x01"
+#     header =HII      key length, data length, CRC-32 of the data
+#     key              UTF-8
+#     data             the encoded records
+# A missing, foreign or damaged file is treated as absent, and a cache that cannot be written
+# (read-only directory, full disk) only costs the saving.
+
+
+import os
+import struct
+import zlib
+
+
+MAGIC = b"STDFHDR\x01"
+
+_HEADER = struct.Struct("=HII")
+
+
+def load_section(path, key=""):
+    """Encoded records saved at path under key, or None."""
+    try:
+        with open(path, "rb") as inf:
+            blob = inf.read()
+    except OSError:
+        return None
+    start = len(MAGIC) + _HEADER.size
+    if len(blob) < start or not blob.startswith(MAGIC):
+        return None
+    key_len, data_len, crc = _HEADER.unpack_from(blob, len(MAGIC))
+    data = blob[start + key_len:]
+    if blob[start:start + key_len] != key.encode("utf-8") or len(data) != data_len or zlib.crc32(data) != crc:
+        return None
+    return data
+
+
+def save_section(path, data, key=""):
+    """Atomically replace the file at path with the encoded records data, saved under key."""
+    key = key.encode("utf-8")
+    tmp = "{}.{}.tmp".format(path, os.getpid())
+    try:
+        with open(tmp, "wb") as out:
+            out.write(MAGIC + _HEADER.pack(len(key), len(data), zlib.crc32(data)) + key)
+            out.write(data)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def cached_section(path, build, key=""):
+    """Encoded bytes of the records build() returns, read from path when it has them.
+
+    Args:
+        path: the cache file, one per test program
+        build: function returning the records of the section, called when the cache has no
+               usable copy of them
+        key: identity of the section; a cache saved under another key is replaced
+
+    Returns:
+        bytes of the encoded records
+    """
+    data = load_section(path, key)
+    if data is None:
+        data = b"".join([rec.encode() for rec in build()])
+        try:
+            save_section(path, data, key)
+        except OSError:
+            pass
+    return data
@@ -0,0 +1,215 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Opt-in timing and byte counters for the record writer.
+#
+# Nothing in this module costs anything until enable() is called: the instrumented functions are
+# swapped into the record classes and into write_record_map only while instrumentation is on, and
+# disable() puts the originals back.
+#
+#     from stdfwriter import instrument
+#
+#     instrument.enable(log_interval=60)  # optionally log a summary line every 60 seconds
+#     ...                                 # create and write records as usual
+#     stats = instrument.snapshot()
+#     instrument.disable()
+#
+# Time is collected per record type for four phases, each exclusive of the others:
+#     construct       record object creation (__init__)
+#     cal_rec_len     record length calculation
+#     encode          packing the fields into bytes
+#     write           handing the encoded bytes to the output file
+# The dtcodes encoders are timed per data type as well (this time is part of the encode phase).
+# Counters are meant for a single writer thread.
+
+
+import logging
+import time
+
+from .dtcodes import write_record_map
+from .recheaders import Record, load_all
+
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("construct", "cal_rec_len", "encode", "write")
+
+_enabled = False
+_saved = []  # (owner, name, original value or None) to restore on disable
+_records = {}
+_encoders = {}
+_started = 0.0
+_nested = 0.0  # time spent in instrumented calls made by the call currently being timed
+_log_interval = None
+_last_log = 0.0
+
+
+def _record_entry(name):
+    entry = _records.get(name)
+    if entry is None:
+        entry = _records[name] = dict.fromkeys(PHASES, 0.0)
+        entry["count"] = 0
+        entry["bytes"] = 0
+    return entry
+
+
+def _timed(phase, func):
+    def wrapper(self, *args, **kwargs):
+        global _nested
+        outer = _nested
+        _nested = 0.0
+        start = time.perf_counter()
+        try:
+            result = func(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            entry = _record_entry(type(self).__name__)
+            entry[phase] += elapsed - _nested
+            _nested = outer + elapsed
+        if phase == "encode":
+            entry["count"] += 1
+            entry["bytes"] += len(result)
+        elif phase == "write" and _log_interval is not None:
+            _maybe_log()
+        return result
+    wrapper.__name__ = func.__name__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _timed_encoder(dtype, func):
+    counter = _encoders.setdefault(dtype, [0, 0.0])
+
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            counter[0] += 1
+            counter[1] += time.perf_counter() - start
+    wrapper.__name__ = func.__name__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+def _record_classes(cls=Record):
+    for sub in cls.__subclasses__():
+        yield sub
+        yield from _record_classes(sub)
+
+
+def _swap(owner, name, value):
+    if isinstance(owner, dict):
+        _saved.append((owner, name, owner[name]))
+        owner[name] = value
+    else:
+        _saved.append((owner, name, owner.__dict__.get(name)))
+        setattr(owner, name, value)
+
+
+def _maybe_log():
+    global _last_log
+    now = time.perf_counter()
+    if now - _last_log >= _log_interval:
+        _last_log = now
+        logger.info(format_snapshot(snapshot()))
+
+
+def enable(log_interval=None):
+    """Swap the instrumented functions in.
+
+    Args:
+        log_interval: if given, log a one-line summary (logger "<package>.instrument", level INFO)
+                      at most once every log_interval seconds while records are being written
+    """
+    global _enabled, _started, _log_interval, _last_log
+    if _enabled:
+        return
+    methods = (("__init__", "construct"), ("cal_rec_len", "cal_rec_len"), ("encode", "encode"),
+               ("write_record", "write"))
+    load_all()  # record classes are imported lazily, make sure all of them get instrumented
+    for cls in _record_classes():
+        for name, phase in methods:
+            _swap(cls, name, _timed(phase, getattr(cls, name)))
+    for dtype, func in list(write_record_map.items()):
+        if callable(func):
+            _swap(write_record_map, dtype, _timed_encoder(dtype, func))
+    _log_interval = log_interval
+    _started = _last_log = time.perf_counter()
+    _enabled = True
+
+
+def disable():
+    """Put the original functions back. Collected counters are kept until reset()."""
+    global _enabled, _log_interval
+    while _saved:
+        owner, name, value = _saved.pop()
+        if isinstance(owner, dict):
+            owner[name] = value
+        elif value is None:
+            delattr(owner, name)
+        else:
+            setattr(owner, name, value)
+    _log_interval = None
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """Clear all counters."""
+    global _started
+    _records.clear()
+    for counter in _encoders.values():
+        counter[0] = 0
+        counter[1] = 0.0
+    _started = time.perf_counter()
+
+
+def snapshot():
+    """Return a copy of the collected counters.
+
+    Returns:
+        dict with keys
+            enabled: whether instrumentation is currently on
+            elapsed: seconds since enable() or the last reset()
+            records: {record name: {"count", "bytes", "construct", "cal_rec_len", "encode", "write"}}
+            encoders: {data type: {"count", "time"}}
+            totals: the record counters summed over all record types
+    """
+    records = {name: dict(entry) for name, entry in _records.items()}
+    totals = dict.fromkeys(PHASES, 0.0)
+    totals["count"] = 0
+    totals["bytes"] = 0
+    for entry in records.values():
+        for key in totals:
+            totals[key] += entry[key]
+    return {
+        "enabled": _enabled,
+        "elapsed": time.perf_counter() - _started if _started else 0.0,
+        "records": records,
+        "encoders": {dtype: {"count": c[0], "time": c[1]} for dtype, c in _encoders.items() if c[0]},
+        "totals": totals,
+    }
+
+
+def format_snapshot(snap):
+    """Format a snapshot() result as a single log line."""
+    totals = snap["totals"]
+    phases = " ".join("{}={:.3f}s".format(p, totals[p]) for p in PHASES)
+    busiest = sorted(snap["records"].items(), key=lambda kv: -sum(kv[1][p] for p in PHASES))[:3]
+    top = ", ".join("{}:{}".format(name, entry["count"]) for name, entry in busiest)
+    return "stdf records={} bytes={} {} top=[{}]".format(totals["count"], totals["bytes"], phases, top)
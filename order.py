@@ -0,0 +1,252 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Streaming check of the STDF record order rules.
+#
+# RecordOrderChecker is a state machine fed one record at a time; it keeps only the current
+# stage of the file plus the heads/sites with an open part or wafer, so each record costs O(1)
+# and a file of any size can be checked in one pass. The rules checked are:
+#     FAR first, then any ATRs and VURs, then the MIR
+#     RDR (at most one) directly after the MIR, then the SDRs, all before any other record
+#     no record other than FAR, ATR, VUR and MIR before the MIR; nothing after the MRR; MRR last
+#     PIR/PRR pairs per head and site: no PIR while that site has an open part, no PRR without
+#     a PIR, and PTR/MPR/FTR/STR only inside a part of their head and site
+#     WIR/WRR pairs per head
+#
+# The checker can run over an existing file (check_file) or in front of the output file while
+# writing (OrderCheckingWriter).
+
+
+import collections
+
+from .reader import HEADER, read_records
+from .recheaders import record_names
+
+
+class RecordOrderError(ValueError):
+    """A record breaks the STDF record order rules (raised in strict mode)."""
+
+
+OrderViolation = collections.namedtuple("OrderViolation", "index record message")
+
+_START, _FAR, _MIR, _RDR, _SDR, _BODY, _END = range(7)
+
+_FAR_KEY = (0, 10)
+_ATR_KEY = (0, 20)
+_VUR_KEY = (0, 30)
+_MIR_KEY = (1, 10)
+_MRR_KEY = (1, 20)
+_RDR_KEY = (1, 70)
+_SDR_KEY = (1, 80)
+_WIR_KEY = (2, 10)
+_WRR_KEY = (2, 20)
+_PIR_KEY = (5, 10)
+_PRR_KEY = (5, 20)
+# PTR, MPR, FTR: HEAD_NUM and SITE_NUM follow the U4 TEST_NUM; STR: the B1 CONT_FLG and the TEST_NUM
+_TEST_KEYS = {(15, 10): 4, (15, 15): 4, (15, 20): 4, (15, 30): 5}
+
+
+def _record_name(key):
+    return record_names.get(key) or "record({}, {})".format(*key)
+
+
+class RecordOrderChecker:
+    """State machine checking the order of records as they stream past.
+
+    Attributes:
+        strict: raise RecordOrderError on the first violation instead of collecting it
+        violations(list): OrderViolation(index, record name, message) for each rule broken,
+                          at most max_violations of them are kept
+        violation_count: number of violations seen, including those not kept
+        count: number of records fed so far
+
+    Methods:
+        feed: check the next record
+        finish: check the end of the stream and return all violations
+    """
+
+    def __init__(self, strict=False, max_violations=1000):
+        self.strict = strict
+        self.max_violations = max_violations
+        self.violations = []
+        self.violation_count = 0
+        self.count = 0
+        self._stage = _START
+        self._parts = set()
+        self._wafers = set()
+
+    def _violation(self, key, message):
+        violation = OrderViolation(self.count, _record_name(key), message)
+        if self.strict:
+            raise RecordOrderError("record {} ({}): {}".format(*violation))
+        self.violation_count += 1
+        if len(self.violations) < self.max_violations:
+            self.violations.append(violation)
+
+    def feed(self, rec_typ, rec_sub, body=b""):
+        """Check one record.
+
+        Args:
+            rec_typ, rec_sub: the record header
+            body: the record data, only the first 7 bytes are used (head and site numbers)
+        """
+        key = (rec_typ, rec_sub)
+        stage = self._stage
+        if stage == _END:
+            self._violation(key, "record after the MRR")
+        elif key == _FAR_KEY:
+            if stage != _START:
+                self._violation(key, "FAR is not the first record")
+            else:
+                self._stage = _FAR
+        elif stage == _START:
+            self._violation(key, "the first record is not a FAR")
+            self._stage = _FAR
+            self.feed(rec_typ, rec_sub, body)
+            return
+        elif key == _ATR_KEY or key == _VUR_KEY:
+            if stage != _FAR:
+                self._violation(key, "{} not between the FAR and the MIR".format(_record_name(key)))
+        elif key == _MIR_KEY:
+            if stage != _FAR:
+                self._violation(key, "more than one MIR")
+            else:
+                self._stage = _MIR
+        elif stage == _FAR:
+            self._violation(key, "record before the MIR")
+        elif key == _RDR_KEY:
+            if stage != _MIR:
+                self._violation(key, "RDR not directly after the MIR")
+            else:
+                self._stage = _RDR
+        elif key == _SDR_KEY:
+            if stage > _SDR:
+                self._violation(key, "SDR after the initial sequence")
+            else:
+                self._stage = _SDR
+        elif key == _MRR_KEY:
+            self._close_all(key)
+            self._stage = _END
+        else:
+            self._stage = _BODY
+            if key == _PIR_KEY or key == _PRR_KEY or key in _TEST_KEYS:
+                self._feed_part(key, body)
+            elif key == _WIR_KEY or key == _WRR_KEY:
+                self._feed_wafer(key, body)
+        self.count += 1
+
+    def _feed_part(self, key, body):
+        at = _TEST_KEYS.get(key, 0)
+        if len(body) < at + 2:
+            self._violation(key, "record too short for HEAD_NUM and SITE_NUM")
+            return
+        site = (body[at], body[at + 1])
+        if key == _PIR_KEY:
+            if site in self._parts:
+                self._violation(key, "PIR for head {} site {} while a part is open there".format(*site))
+            self._parts.add(site)
+        elif key == _PRR_KEY:
+            if site not in self._parts:
+                self._violation(key, "PRR for head {} site {} without a PIR".format(*site))
+            self._parts.discard(site)
+        elif site not in self._parts:
+            self._violation(key, "test result for head {} site {} outside a PIR/PRR pair".format(*site))
+
+    def _feed_wafer(self, key, body):
+        if not body:
+            self._violation(key, "record too short for HEAD_NUM")
+            return
+        head = body[0]
+        if key == _WIR_KEY:
+            if head in self._wafers:
+                self._violation(key, "WIR for head {} while a wafer is open there".format(head))
+            self._wafers.add(head)
+        else:
+            if head not in self._wafers:
+                self._violation(key, "WRR for head {} without a WIR".format(head))
+            self._wafers.discard(head)
+
+    def _close_all(self, key):
+        for site in sorted(self._parts):
+            self._violation(key, "no PRR for the PIR of head {} site {}".format(*site))
+        for head in sorted(self._wafers):
+            self._violation(key, "no WRR for the WIR of head {}".format(head))
+        self._parts.clear()
+        self._wafers.clear()
+
+    def finish(self):
+        """Check the end of the stream.
+
+        Returns:
+            list of all violations kept
+        """
+        if self._stage == _START:
+            self._violation(_FAR_KEY, "no records")
+        elif self._stage != _END:
+            self._violation(_MRR_KEY, "the last record is not an MRR")
+        return self.violations
+
+
+def check_file(inf, strict=False, max_violations=1000):
+    """Check the record order of an STDF file opened in binary mode, in one pass.
+
+    Returns:
+        list of OrderViolation
+    """
+    checker = RecordOrderChecker(strict, max_violations)
+    feed = checker.feed
+    for rec_typ, rec_sub, body in read_records(inf):
+        feed(rec_typ, rec_sub, body)
+    return checker.finish()
+
+
+class OrderCheckingWriter:
+    """Output file wrapper checking the order of the records written through it.
+
+    Records call write_record(inf) with an instance of this class as inf. In strict mode a record
+    breaking the order rules raises RecordOrderError before any of its bytes reach the file.
+
+        out = OrderCheckingWriter(open("lot.stdf", "wb"), strict=True)
+        FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+        ...
+        out.close()  # checks that the MRR was the last record
+    """
+
+    def __init__(self, inf, strict=False, max_violations=1000):
+        self.inf = inf
+        self.checker = RecordOrderChecker(strict, max_violations)
+        self._pending = b""  # bytes of an incomplete record
+
+    @property
+    def violations(self):
+        return self.checker.violations
+
+    def write(self, data):
+        buf = memoryview(self._pending + data if self._pending else data)
+        size = len(buf)
+        offset = 0
+        while offset + 4 <= size:
+            rec_len, rec_typ, rec_sub = HEADER.unpack_from(buf, offset)
+            if offset + 4 + rec_len > size:
+                break
+            self.checker.feed(rec_typ, rec_sub, buf[offset + 4:offset + 4 + min(rec_len, 6)])
+            offset += 4 + rec_len
+        self._pending = bytes(buf[offset:])
+        return self.inf.write(data)
+
+    def flush(self):
+        self.inf.flush()
+
+    def close(self):
+        self.checker.finish()
+        self.inf.close()
@@ -0,0 +1,162 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Pin map records (PMR, PGR, PLR) built from a channel table and group definitions.
+#
+#     import csv
+#     from stdfwriter.pinmap import PinMap
+#
+#     with open("channels.csv", newline="") as inf:   # PMR_INDX,CHAN_TYP,CHAN_NAM,PHY_NAM,LOG_NAM,...
+#         pins = PinMap(csv.DictReader(inf),
+#                       groups={"DC": [58, 59, 60, 61], "POOL": [6, 7]},
+#                       pin_list=[(1, 0, 0, "*********", "+++++"), ("DC", 0, 0, "*", "+")])
+#     pins.write(out)                 # every PMR, then the PGRs, then the PLR
+#
+# The channel table holds the PMR fields, one row per channel, in any form bulk.encode_bulk takes
+# (NumPy structured array, dict of columns, tuples of PMR constructor arguments), or as rows of
+# dicts such as csv.DictReader gives (numeric fields may then be strings). Groups are a dict of
+# GRP_NAM to member PMR_INDX list, given GRP_INDX 32768, 32769, ... in order, or
+# (GRP_INDX, GRP_NAM, members) tuples. A pin list entry is (GRP_INDX, GRP_MODE, GRP_RADX,
+# PGM_CHAR, RTN_CHAR, PGM_CHAL, RTN_CHAL), the trailing fields optional, and may name a group
+# instead of giving its GRP_INDX.
+#
+# The indexes are checked when the PinMap is made: PMR_INDX unique in 1..32767, GRP_INDX unique
+# in 32768..65535, group members existing PMR_INDX, pin list entries existing PMR or group
+# indexes. The PMRs are encoded together by bulk.encode_bulk (with NumPy, column by column), the
+# PGRs and the PLR as records; a PLR too long for one record is split into several.
+#
+# A PinMap has encode(), so cached_section() can keep it in the header cache of the program:
+#
+#     out.write(headercache.cached_section(path, lambda: [PinMap(...)], key="prog rev 7"))
+
+
+import collections.abc
+
+from . import bulk
+from .recheaders import PGR, PLR, PMR
+from .validate import ValidationError
+
+
+PMR_INDX_MAX = 32767
+GRP_INDX_MIN = 32768  # group indexes follow the PMR indexes
+GRP_INDX_MAX = 65535
+
+_INT_TYPES = ("U1", "U2")
+
+
+def _channel_columns(channels):
+    """Channel table as bulk input; rows of dicts become columns, numeric strings numbers."""
+    if isinstance(channels, dict) or hasattr(channels, "dtype"):
+        return channels
+    rows = list(channels)
+    if not rows or not isinstance(rows[0], collections.abc.Mapping):
+        return rows
+    names = set().union(*rows)
+    columns = {}
+    for name, typ in PMR.field_names:
+        if name not in names:
+            continue
+        column = [row.get(name) for row in rows]
+        if None in column or ("" in column and typ in _INT_TYPES):
+            raise ValidationError("PMR.{} is missing from some channel rows".format(name))
+        columns[name] = [int(value) for value in column] if typ in _INT_TYPES else column
+    unknown = names - {name for name, _ in PMR.field_names}
+    if unknown:
+        raise TypeError("PMR has no field {}".format(", ".join(sorted(unknown))))
+    return columns
+
+
+def _as_list(column, n):
+    if isinstance(column, (str, bytes)) or not hasattr(column, "__len__"):
+        return [column] * n
+    if hasattr(column, "tolist"):  # NumPy array
+        return column.tolist()
+    return list(column)
+
+
+class PinMap:
+    """PMR, PGR and PLR records of a test program.
+
+    Attributes:
+        channels(dict): PMR field name -> column or value shared by all channels
+        count: number of channels (PMRs)
+        pmr_indexes(list): PMR_INDX of each channel, in table order
+        groups(list): (GRP_INDX, GRP_NAM, member PMR_INDX list) of each PGR
+        group_index(dict): GRP_NAM -> GRP_INDX
+        pin_list(list): (GRP_INDX, GRP_MODE, GRP_RADX, PGM_CHAR, RTN_CHAR, PGM_CHAL, RTN_CHAL)
+                        of each entry of the PLR
+
+    Methods:
+        records: the PGR and PLR records
+        encode: all the records as bytes
+        write: write all the records to a file
+    """
+
+    def __init__(self, channels, groups=(), pin_list=()):
+        self.channels, self.count = bulk.to_columns(PMR, _channel_columns(channels))
+        self.pmr_indexes = [int(i) for i in _as_list(self.channels["PMR_INDX"], self.count)]
+        if isinstance(groups, dict):
+            groups = [(GRP_INDX_MIN + i, name, members) for i, (name, members) in enumerate(groups.items())]
+        self.groups = [(int(index), name, [int(i) for i in members]) for index, name, members in groups]
+        self.group_index = {name: index for index, name, _ in self.groups}
+        self.pin_list = []
+        for entry in pin_list:
+            entry = tuple(entry) + (0, 0, "", "", "", "")[len(entry) - 1:]
+            if isinstance(entry[0], str):
+                if entry[0] not in self.group_index:
+                    raise ValidationError("PLR entry names the unknown group {!r}".format(entry[0]))
+                entry = (self.group_index[entry[0]],) + entry[1:]
+            self.pin_list.append(entry)
+        self._check()
+
+    def _check(self):
+        pins = set()
+        for index in self.pmr_indexes:
+            if not 1 <= index <= PMR_INDX_MAX:
+                raise ValidationError("PMR_INDX {} is not in 1..{}".format(index, PMR_INDX_MAX))
+            if index in pins:
+                raise ValidationError("PMR_INDX {} is used by more than one channel".format(index))
+            pins.add(index)
+        indexes = set(pins)
+        for index, name, members in self.groups:
+            if not GRP_INDX_MIN <= index <= GRP_INDX_MAX:
+                raise ValidationError("PGR {!r} GRP_INDX {} is not in {}..{}".format(name, index, GRP_INDX_MIN,
+                                                                                    GRP_INDX_MAX))
+            if index in indexes:
+                raise ValidationError("GRP_INDX {} is used by more than one group".format(index))
+            indexes.add(index)
+            unknown = sorted(set(members) - pins)
+            if unknown:
+                raise ValidationError("PGR {!r} has members that are not PMR indexes: {}".format(name, unknown[:10]))
+        unknown = sorted({entry[0] for entry in self.pin_list} - indexes)
+        if unknown:
+            raise ValidationError("PLR entries refer to unknown pin or group indexes: {}".format(unknown[:10]))
+
+    def records(self):
+        """The PGR and PLR records; the PMRs are only encoded in bulk."""
+        recs = [PGR(GRP_INDX=index, INDX_CNT=len(members), GRP_NAM=name, PMR_INDX=members)
+                for index, name, members in self.groups]
+        if self.pin_list:
+            columns = list(zip(*self.pin_list))
+            fields = dict(zip(("GRP_INDX", "GRP_MODE", "GRP_RADX", "PGM_CHAR", "RTN_CHAR"), columns))
+            if any(columns[5]) or any(columns[6]):  # empty arrays at the end of the record are left out
+                fields.update(PGM_CHAL=columns[5], RTN_CHAL=columns[6])
+            recs.append(PLR(GRP_CNT=len(self.pin_list), **{name: list(col) for name, col in fields.items()}))
+        return recs
+
+    def encode(self):
+        """Every PMR, then the PGRs, then the PLR (several if it is too long for one), as bytes."""
+        return bulk.encode_bulk(PMR, self.channels) + b"".join([rec.encode() for rec in self.records()])
+
+    def write(self, inf):
+        inf.write(self.encode())
@@ -0,0 +1,213 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Datalog policy: which test results (PTR, MPR, FTR) are written, with summaries of all of them.
+#
+#     from stdfwriter.policy import DatalogPolicy
+#
+#     out = DatalogPolicy(open("lot.stdf", "wb"), every_nth=10, failures=True)
+#     FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+#     ...
+#     out.log(PTR(TEST_NUM=1, HEAD_NUM=1, SITE_NUM=0, TEST_FLG=0, PARM_FLG=0, RESULT=0.5))
+#     ...
+#     MRR(FINISH_T=now).write_record(out)   # preceded by TSR, HBR, SBR, PCR of every result
+#     out.close()
+#
+# A test result is written when any of the selections given matches it:
+#     every_nth   all results of every Nth part (the first part, part N+1, ...), counted at PIR
+#     failures    results with TEST_FLG bit 7 (failed) set
+#     test_nums   results of the listed TEST_NUMs
+# With none of them given every result is selected. max_rate then caps the selected results at
+# that many per second (a token bucket holding one second of results). The first result of each
+# TEST_NUM and record type is always written: it carries the test's limits and units, which the
+# following results of the test are allowed to leave out.
+#
+# Every result, written or not, is counted in a SummaryAccumulator. With summaries on, the TSR,
+# HBR, SBR and PCR records of those counts are written just before the MRR, and summary records
+# written by the caller are left out. All other records go to the output unchanged.
+#
+# Records given to log() are only encoded when they are written; encoded records can also be
+# written as usual (rec.write_record(out)), in which case suppressed results were encoded for
+# nothing but still cost no I/O.
+
+
+import struct
+import time
+
+from .reader import HEADER
+from .summary import SummaryAccumulator
+
+
+SUMMARY_KEYS = frozenset([(10, 30), (1, 40), (1, 50), (1, 30)])  # TSR, HBR, SBR, PCR
+
+_TEST_TYPES = {(15, 10): "P", (15, 15): "M", (15, 20): "F"}
+_PIR_KEY = (5, 10)
+_MRR_KEY = (1, 20)
+
+_TEST = struct.Struct("=IBBB")  # TEST_NUM, HEAD_NUM, SITE_NUM, TEST_FLG
+
+
+class DatalogPolicy:
+    """Output wrapper writing a selection of the test results and summaries of all of them.
+
+    Records call write_record(out) with an instance of this class as out, or are given to log().
+
+    Attributes:
+        out: the output, an object with write() (file, VectoredSink, DurableWriter, ...)
+        every_nth: write the results of every Nth part (None: no part sampling)
+        failures: write the failed results
+        test_nums: TEST_NUMs whose results are written (None: no test selection)
+        max_rate: at most this many selected results per second (None: no limit)
+        summaries: write summary records of all results before the MRR, leaving out the caller's
+        per_site: summary records per head and site as well as for all sites
+        summary: SummaryAccumulator of every record seen
+        logged: test results written so far
+        suppressed: test results left out so far
+
+    Methods:
+        write: take the bytes of whole or partial records
+        log: take a record object, encoding it only if it is written
+        selects: whether a test result is written
+        flush: flush the output
+        close: close the output
+    """
+
+    def __init__(self, out, every_nth=None, failures=False, test_nums=None, max_rate=None, summaries=True,
+                 per_site=True):
+        self.out = out
+        self.every_nth = every_nth
+        self.failures = failures
+        self.test_nums = frozenset(test_nums) if test_nums is not None else None
+        self.max_rate = max_rate
+        self.summaries = summaries
+        self.per_site = per_site
+        self.summary = SummaryAccumulator()
+        self.logged = 0
+        self.suppressed = 0
+        self._select_all = every_nth is None and not failures and test_nums is None
+        self._parts = 0
+        self._sampled = {}  # (head, site): whether the results of the part open there are written
+        self._first = set()  # (rec_sub, TEST_NUM) of the tests with a result written
+        self._tokens = max_rate
+        self._refilled = time.monotonic()
+        self._pending = b""
+        self._dropped = False  # whether the last test result written to write() was suppressed
+
+    def selects(self, rec_sub, test_num, head, site, test_flg):
+        """Whether a test result is written; a result that is takes a token of the rate limit.
+
+        Args:
+            rec_sub: REC_SUB of the result, 10 (PTR), 15 (MPR) or 20 (FTR)
+            test_num, head, site, test_flg: its TEST_NUM, HEAD_NUM, SITE_NUM and TEST_FLG
+        """
+        if (rec_sub, test_num) not in self._first:
+            self._first.add((rec_sub, test_num))
+            return True
+        if self._select_all:
+            pass
+        elif self.test_nums is not None and test_num in self.test_nums:
+            pass
+        elif self.failures and test_flg & 0x80:
+            pass
+        elif self.every_nth is None or not self._sampled.get((head, site), True):
+            return False
+        if self.max_rate is None:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.max_rate, self._tokens + (now - self._refilled) * self.max_rate)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _start_part(self, head, site):
+        if self.every_nth is not None:
+            self._sampled[(head, site)] = self._parts % self.every_nth == 0
+        self._parts += 1
+
+    def _finish(self):
+        for rec in self.summary.records(self.per_site):
+            self.out.write(rec.encode())
+
+    def write(self, data):
+        buf = memoryview(self._pending + data if self._pending else data)
+        size = len(buf)
+        offset = kept = 0
+        while offset + 4 <= size:
+            rec_len, rec_typ, rec_sub = HEADER.unpack_from(buf, offset)
+            end = offset + 4 + rec_len
+            if end > size:
+                break
+            key = (rec_typ, rec_sub)
+            body = buf[offset + 4:end]
+            continued = self.summary.feed(rec_typ, rec_sub, body)
+            drop = False
+            if continued:  # a later record of a split MPR or FTR goes where the first one went
+                drop = self._dropped
+            elif key in _TEST_TYPES and rec_len >= _TEST.size:
+                drop = self._dropped = not self.selects(rec_sub, *_TEST.unpack_from(body))
+                if drop:
+                    self.suppressed += 1
+                else:
+                    self.logged += 1
+            elif key == _PIR_KEY and rec_len >= 2:
+                self._start_part(body[0], body[1])
+            elif self.summaries:
+                if key in SUMMARY_KEYS:
+                    drop = True
+                elif key == _MRR_KEY:
+                    if offset > kept:
+                        self.out.write(buf[kept:offset])
+                    kept = offset
+                    self._finish()
+            if drop:  # write the records kept before this one in one piece
+                if offset > kept:
+                    self.out.write(buf[kept:offset])
+                kept = end
+            offset = end
+        if offset > kept:
+            self.out.write(buf[kept:offset])
+        self._pending = bytes(buf[offset:])
+        return len(data)
+
+    def log(self, rec):
+        """Write a record; a test result that is not selected is counted without being encoded."""
+        test_typ = _TEST_TYPES.get((rec.rec_typ, rec.rec_sub))
+        if test_typ is None or self._pending:
+            return self.write(rec.encode())
+        fv = rec.field_values
+        test_num, head, site, test_flg = fv["TEST_NUM"], fv["HEAD_NUM"], fv["SITE_NUM"], fv["TEST_FLG"]
+        selected = self.selects(rec.rec_sub, test_num, head, site, test_flg)
+        data = rec.encode() if selected else None
+        if test_typ == "P":
+            self.summary.add_test(test_typ, test_num, head, site, test_flg, fv["RESULT"], fv["TEST_TXT"])
+        else:
+            self.summary.add_test(test_typ, test_num, head, site, test_flg)
+        if not selected:
+            self.suppressed += 1
+            return 0
+        self.logged += 1
+        return self.out.write(data)
+
+    def flush(self):
+        self.out.flush()
+
+    def close(self):
+        self.out.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
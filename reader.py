@@ -0,0 +1,59 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Reading STDF files back, record by record.
+#
+# The reader only walks the record headers; record bodies are returned as bytes for the caller to
+# decode. Files are expected to use the byte order this writer produces (CPU_TYPE 2).
+
+
+import struct
+
+
+HEADER = struct.Struct("HBB")  # REC_LEN, REC_TYP, REC_SUB, same layout as write_record_map["Header"]
+
+
+class TruncatedRecordError(EOFError):
+    """The file ends in the middle of a record.
+
+    Attributes:
+        offset: file offset of the first byte of the incomplete record, everything before it is
+                made of whole records
+    """
+
+    def __init__(self, offset):
+        super().__init__("file ends in the middle of the record at offset {}".format(offset))
+        self.offset = offset
+
+
+def read_records(inf):
+    """Yield (rec_typ, rec_sub, body) for each record of an STDF file opened in binary mode.
+
+    Raises:
+        TruncatedRecordError: if the file ends in the middle of a record
+    """
+    offset = 0
+    read = inf.read
+    unpack = HEADER.unpack
+    while True:
+        header = read(4)
+        if len(header) < 4:
+            if header:
+                raise TruncatedRecordError(offset)
+            return
+        rec_len, rec_typ, rec_sub = unpack(header)
+        body = read(rec_len)
+        if len(body) < rec_len:
+            raise TruncatedRecordError(offset)
+        offset += 4 + rec_len
+        yield rec_typ, rec_sub, body
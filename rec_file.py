@@ -0,0 +1,143 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Records describing the STDF file itself (REC_TYP 0).
+# Import the classes from recheaders, which loads this module on first use.
+
+
+from .recheaders import Record
+
+
+class FAR(Record):
+    """
+    Function: Contains the information necessary to determine how to decode the STDF data
+              contained in the file.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (0)
+    REC_SUB         U*1             Record sub-type (10)
+
+    CPU_TYPE        U*1             CPU type that wrote this file
+    STDF_VER        U*1             STDF version number
+    =================================================================================================
+    Notes on Specific Fields:
+    CPU_TYPE        Indicates which type of CPU wrote this STDF file. This information is useful for
+                    determining the CPU-dependent data representation of the integer and floating point
+                    fields in the file’s records. The valid values are:
+                            0 = DEC PDP-11 and VAX processors. F and D floating point formats
+                                will be used. G and H floating point formats will not be used.
+                            1 = Sun 1, 2, 3, and 4 computers.
+                            2 = Sun 386i computers, and IBM PC, IBM PC-AT, and IBM PC-XT
+                                computers.
+                        3-127 = Reserved for future use by Teradyne.
+                      128-255 = Reserved for use by customers.
+                    Acode defined heremay also be valid for otherCPUtypeswhose data formats are fully
+                    compatible with that of the type listed here. Before using one of these codes for a CPU
+                    type not listed here, please check with the Teradyne hotline, which can provide
+                    additional information on CPU compatibility.
+
+    STDF_VER        Identifies the version number of the STDF specification used in generating the data.
+                    This allows data analysis programs to handle STDF specification enhancements.
+
+    Location: Required as the first record of the file.
+    """
+    rec_typ = 0
+    rec_sub = 10
+    field_names = (
+        ('CPU_TYPE', 'U1'),
+        ('STDF_VER', 'U1')
+    )
+    cache_encoding = True
+
+    def __init__(self, CPU_TYPE, STDF_VER):
+        self.field_values = locals()
+
+
+class ATR(Record):
+    """
+    Function: Used to record any operation that alters the contents of the STDF file. The name of the
+              program and all its parameters should be recorded in the ASCII field provided in this
+              record. Typically, this record will be used to track filter programs that have been
+              applied to the data.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (0)
+    REC_SUB         U*1             Record sub-type (20)
+
+    MOD_TIM         U*4             Date and time of STDF file modification
+    CMD_LINE        C*n             Command line of program
+    =================================================================================================
+    Frequency:      Optional. One for each filter or other data transformation program applied to the STDF
+                    data.
+    Location:       Between the File Attributes Record (FAR) and the Master Information Record (MIR).
+                    The filter program that writes the altered STDF file must write its ATR immediately
+                    after the FAR (and hence before any other ATRs that may be in the file). In this way,
+                    multiple ATRs will be in reverse chronological order.
+
+    Possible Use:   Determining whether a particular filter has been applied to the data.
+    """
+    rec_typ = 0
+    rec_sub = 20
+    field_names = (
+        ('MOD_TIM', 'U4'),
+        ('CMD_LINE', 'Cn')
+    )
+    cache_encoding = True
+
+    def __init__(self, MOD_TIM, CMD_LINE):
+        self.field_values = locals()
+
+
+class VUR(Record):
+    """
+    Function: Identifies the updates made to the STDF V4 specification that the file conforms to.
+              A file using the records added by the STDF V4-2007 scan/memory update (PSR, NMR,
+              CNR, SSR, CDR, STR) names that update here.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (0)
+    REC_SUB         U*1             Record sub-type (30)
+
+    UPD_CNT         U*1             Count (k) of version update entries
+    UPD_NAM         kxC*n           Array of version update names
+    =================================================================================================
+    Notes on Specific Fields:
+    UPD_NAM         The name of each update, for example "Scan:2007.1". UPD_CNT defaults to the
+                    length of UPD_NAM.
+
+    Frequency:      Optional. One per data stream.
+    Location:       Between the File Attributes Record (FAR) and the Master Information Record (MIR).
+
+    Possible Use:   Determining which record types a reader has to expect.
+    """
+    rec_typ = 0
+    rec_sub = 30
+    field_names = (
+        ('UPD_CNT', 'U1'),
+        ('UPD_NAM', 'kxCn')
+    )
+    kx_counts = {'UPD_NAM': 'UPD_CNT'}
+    cache_encoding = True
+
+    def __init__(self, UPD_NAM=("Scan:2007.1",), UPD_CNT=None):
+        self.field_values = locals()
+        self.set_counts()
@@ -0,0 +1,207 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Generic data records (REC_TYP 50).
+# Import the classes from recheaders, which loads this module on first use.
+
+
+import struct
+
+from .dtcodes import VN_ALIGNED, VN_FORMATS, pack_len_map, vn_items, vn_layout
+from .recheaders import REC_LEN_MAX, Record, RecordTooLongError
+
+
+class GDR(Record):
+    """
+    Function: Contains information that does not conform to any other record type defined by the
+                STDF specification. Such records are intended to be written under the control of job
+                plans executing on the tester. This data may be used for any purpose that the user
+                desires.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (50)
+    REC_SUB         U*1             Record sub-type (10)
+
+    FLD_CNT         U*2             Count of data fields in record
+    GEN_DATA        V*n             Data type code and data for one field
+                                    (Repeat GEN_DATA for each data field)
+    =================================================================================================
+    Notes on Specific Fields:
+    GEN_DATA        Is repeated FLD_CNT number of times. Each GEN_DATA field consists of a data type code
+                    followed by the actual data. The data type code is the first unsigned byte of the field.
+                    Valid data types are:
+                        0 = B*0 Special pad field, of length 0 (See note below)
+                        1 = U*1 One byte unsigned integer
+                        2 = U*2 Two byte unsigned integer
+                        3 = U*4 Four byte unsigned integer
+                        4 = I*1 One byte signed integer
+                        5 = I*2 Two byte signed integer
+                        6 = I*4 Four byte signed integer
+                        7 = R*4 Four byte floating point number
+                        8 = R*8 Eight byte floating point number
+                        10 = C*n Variable length ASCII character string
+                        (first byte is string length in bytes)
+                        11 = B*n Variable length binary data string
+                        (first byte is string length in bytes)
+                        12 = D*n Bit encoded data
+                        (first two bytes of string are length in bits)
+                        13 = N*1 Unsigned nibble
+    Pad Field (Data Type 0):
+                Data type 0, the special pad field, is used to force alignment of following data types in
+                the record. In particular, itmust be used to ensure even byte alignment of U*2, U*4,
+                I*2, I*4, R*4, and R*8 data types.
+                The GDR is guaranteed to begin on an even byte boundary. The GDR header contains
+                four bytes. The first GEN_DATA field therefore begins on an even byte boundary. It is
+                the responsibility of the designer of a GDR record to provide the pad bytes needed to
+                ensure data boundary alignment for the CPU on which it will run.
+    Example:    The following table describes a sample GDR that contains three data fields of different
+                data types. The assumption is that numeric data of more than one byte must begin on
+                an even boundary. Pad bytes will be used to meet this requirement.
+
+                Data    Code    Alignment Requirement
+                "AB"    10      A variable-length character string can begin on any byte. This field
+                                will contain one data byte, one length byte, and two data bytes, for
+                                a total length of 4 bytes. Because this field begins on an even byte,
+                                the next field also begins on an even byte.
+                255     1       A one-byte numeric value can begin on any byte. This field contains
+                                two bytes, so the next field also begins on an even byte.
+                510     5       A two-byte numeric value must begin on an even byte. This
+                                GEN_DATA fieldwould begin on an even byte; and, because the first
+                                byte is the data code, the actual numeric value would begin on an
+                                odd byte. This field must therefore be preceded by a pad byte.
+                The byte representation for this GDR is as follows. The byte ordering shown here is for
+                sample purposes only. The actual data representation differs between CPUs. The byte
+                values are shown in hexadecimal. The decimal equivalents are given in the description
+                of the bytes.
+                Even Byte       Odd Byte        Description (with Decimal Values)
+                    0c              00          Number of bytes following the header (12)
+                    32              0a          Record type (50); record subtype (10)
+                    04              00          Number of data fields (4)
+                    0a              02          Character string: code (10) and length (2)
+                    41              42          Character string: data bytes (“A” and “B”)
+                    01              ff          1-byte integer: code (1) and data (255 = 0xff)
+                    00              05          Pad byte (0); code (5) for next field
+                    fe              01          2-byte signed integer (510 = 0x01fe)
+    Frequency:      A test data file may contain any number of GDRs.
+    Location:       Anywhere in the data stream after the initial sequence (see page 14).
+    Possible Use:   User-written reports
+    """
+    rec_typ = 50
+    rec_sub = 10
+    field_names = (
+        ('FLD_CNT', 'U2'),
+        ('GEN_DATA', 'Vn')
+    )
+
+    GEN_DATA_OFFSET = 6  # from the start of the record: header and FLD_CNT
+
+    # GEN_DATA is a sequence of (data type code, value) pairs in record order, or a dict of code to
+    # value. A NumPy array, as an item or as the value of a pair, stands for one field per element;
+    # as an item its code is taken from its dtype, e.g. GEN_DATA=[(10, "trim"), np.arange(8, dtype="f4")].
+    # The pad fields aligning 2, 4 and 8 byte numbers are inserted when the record is encoded, and
+    # FLD_CNT is always set to the number of fields written, pads included.
+    def __init__(self, FLD_CNT=None, GEN_DATA=()):
+        self.field_values = locals()
+        self.field_values["FLD_CNT"] = vn_layout(GEN_DATA, self.GEN_DATA_OFFSET)[1]
+
+    def cal_rec_len(self):
+        length, count = vn_layout(self.field_values["GEN_DATA"], self.GEN_DATA_OFFSET)
+        self.field_values["FLD_CNT"] = count
+        self.rec_len = pack_len_map["U2"] + length
+
+    def split(self, max_len=REC_LEN_MAX):
+        """Several GDRs holding the fields of GEN_DATA in order, each with REC_LEN at most max_len.
+
+        Arrays are cut between elements where a record fills up.
+        """
+        self.cal_rec_len()
+        if self.rec_len <= max_len:
+            return [self]
+        room = max_len - pack_len_map["U2"]
+        records = []
+        chunk, length, count = [], 0, 0
+        for code, value in vn_items(self.field_values["GEN_DATA"]):
+            while True:
+                size, n = vn_layout([(code, value)], self.GEN_DATA_OFFSET + length)
+                if length + size <= room and count + n <= 0xFFFF:
+                    chunk.append((code, value))
+                    length += size
+                    count += n
+                    break
+                if hasattr(value, "dtype") and len(value) > 1:
+                    # as many elements as fit, the rest goes to the next record; with an aligned code
+                    # each element takes a pad field but the first one when it starts on an odd offset
+                    step = struct.calcsize(VN_FORMATS[code]) + 1
+                    fields = 1
+                    spare = 0
+                    if code in VN_ALIGNED:
+                        step += 1
+                        fields = 2
+                        spare = (self.GEN_DATA_OFFSET + length) % 2
+                    fit = min((room - length + spare) // step, (0xFFFF - count + spare) // fields)
+                    if fit > 0:
+                        chunk.append((code, value[:fit]))
+                        value = value[fit:]
+                if not chunk:
+                    raise RecordTooLongError("GDR field of {} bytes does not fit in a record".format(size))
+                records.append(GDR(GEN_DATA=chunk))
+                chunk, length, count = [], 0, 0
+        if chunk:
+            records.append(GDR(GEN_DATA=chunk))
+        return records
+
+
+class DTR(Record):
+    """
+    Function: Contains text information that is to be included in the datalog printout. DTRs may be
+                written under the control of a job plan: for example, to highlight unexpected test
+                results. They may also be generated by the tester executive software: for example, to
+                indicate that the datalog sampling rate has changed. DTRs are placed as comments in
+                the datalog listing.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (50)
+    REC_SUB         U*1             Record sub-type (30)
+
+    TEXT_DAT        C*n             ASCII text string
+    =================================================================================================
+    Frequency:      A test data file may contain any number of DTRs.
+    Location:       Anywhere in the data stream after the initial sequence (see page 14).
+    Possible Use:   Datalog
+    """
+    rec_typ = 50
+    rec_sub = 30
+    field_names = (
+        ('TEXT_DAT', 'Cn'),
+    )
+
+    def __init__(self, TEXT_DAT):
+        self.field_values = locals()
+
+    def split(self, max_len=REC_LEN_MAX):
+        """Several DTRs for a text longer than the 255 characters of a C*n, cut every 255 characters."""
+        text = self.field_values["TEXT_DAT"]
+        if len(text) <= 255:
+            return [self]
+        return [DTR(text[i:i + 255]) for i in range(0, len(text), 255)]
+
+    def encode(self):
+        if len(self.field_values["TEXT_DAT"]) > 255:
+            return self._encode_split()
+        return Record.encode(self)
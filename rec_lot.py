@@ -0,0 +1,473 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Records with data collected per lot (REC_TYP 1).
+# Import the classes from recheaders, which loads this module on first use.
+
+
+from .recheaders import Record
+
+
+class MIR(Record):
+    """
+    Function: The MIR and the MRR (Master Results Record) contain all the global information that
+            is to be stored for a tested lot of parts. Each data stream must have exactly one MIR,
+            immediately after the FAR (and the ATRs, if they are used). This will allow any data
+            reporting or analysis programs access to this information in the shortest possible
+            amount of time.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (10)
+
+    SETUP_T         U*4             Date and time of job setup
+    START_T         U*4             Date and time first part tested
+    STAT_NUM        U*1             Tester station number
+    MODE_COD        C*1             Test mode code (e.g. prod, dev) space
+    RTST_COD        C*1             Lot retest code space
+    PROT_COD        C*1             Data protection code space
+    BURN_TIM        U*2             Burn-in time (in minutes) 65,535
+    CMOD_COD        C*1             Command mode code space
+    LOT_ID          C*n             Lot ID (customer specified)
+    PART_TYP        C*n             Part Type (or product ID)
+    NODE_NAM        C*n             Name of node that generated data
+    TSTR_TYP        C*n             Tester type
+    JOB_NAM         C*n             Job name (test program name)
+    JOB_REV         C*n             Job (test program) revision number length byte = 0
+    SBLOT_ID        C*n             Sublot ID length byte = 0
+    OPER_NAM        C*n             Operator name or ID (at setup time) length byte = 0
+    EXEC_TYP        C*n             Tester executive software type length byte = 0
+    EXEC_VER        C*n             Tester exec software version number length byte = 0
+    TEST_COD        C*n             Test phase or step code length byte = 0
+    TST_TEMP        C*n             Test temperature length byte = 0
+    USER_TXT        C*n             Generic user text length byte = 0
+    AUX_FILE        C*n             Name of auxiliary data file length byte = 0
+    PKG_TYP         C*n             Package type length byte = 0
+    FAMLY_ID        C*n             Product family ID length byte = 0
+    DATE_COD        C*n             Date code length byte = 0
+    FACIL_ID        C*n             Test facility ID length byte = 0
+    FLOOR_ID        C*n             Test floor ID length byte = 0
+    PROC_ID         C*n             Fabrication process ID length byte = 0
+    OPER_FRQ        C*n             Operation frequency or step length byte = 0
+    SPEC_NAM        C*n             Test specification name length byte = 0
+    SPEC_VER        C*n             Test specification version number length byte = 0
+    FLOW_ID         C*n             Test flow ID length byte = 0
+    SETUP_ID        C*n             Test setup ID length byte = 0
+    DSGN_REV        C*n             Device design revision length byte = 0
+    ENG_ID          C*n             Engineering lot ID length byte = 0
+    ROM_COD         C*n             ROM code ID length byte = 0
+    SERL_NUM        C*n             Tester serial number length byte = 0
+    SUPR_NAM        C*n             Supervisor name or ID length byte = 0
+    =================================================================================================
+    Frequency:      Always required. One per data stream.
+    Location:       Immediately after the File Attributes Record (FAR) and the Audit Trail Records (ATR),
+                    if ATRs are used.
+
+    Possible Use:   Header information for all reports
+    """
+    rec_typ = 1
+    rec_sub = 10
+    field_names = (
+        ('SETUP_T', 'U4'),
+        ('START_T', 'U4'),
+        ('STAT_NUM', 'U1'),
+        ('MODE_COD', 'C1'),
+        ('RTST_COD', 'C1'),
+        ('PROT_COD', 'C1'),
+        ('BURN_TIM', 'U2'),
+        ('CMOD_COD', 'C1'),
+        ('LOT_ID', 'Cn'),
+        ('PART_TYP', 'Cn'),
+        ('NODE_NAM', 'Cn'),
+        ('TSTR_TYP', 'Cn'),
+        ('JOB_NAM', 'Cn'),
+        ('JOB_REV', 'Cn'),
+        ('SBLOT_ID', 'Cn'),
+        ('OPER_NAM', 'Cn'),
+        ('EXEC_TYP', 'Cn'),
+        ('EXEC_VER', 'Cn'),
+        ('TEST_COD', 'Cn'),
+        ('TST_TEMP', 'Cn'),
+        ('USER_TXT', 'Cn'),
+        ('AUX_FILE', 'Cn'),
+        ('PKG_TYP', 'Cn'),
+        ('FAMLY_ID', 'Cn'),
+        ('DATE_COD', 'Cn'),
+        ('FACIL_ID', 'Cn'),
+        ('FLOOR_ID', 'Cn'),
+        ('PROC_ID', 'Cn'),
+        ('OPER_FRQ', 'Cn'),
+        ('SPEC_NAM', 'Cn'),
+        ('SPEC_VER', 'Cn'),
+        ('FLOW_ID', 'Cn'),
+        ('SETUP_ID', 'Cn'),
+        ('DSGN_REV', 'Cn'),
+        ('ENG_ID', 'Cn'),
+        ('ROM_COD', 'Cn'),
+        ('SERL_NUM', 'Cn'),
+        ('SUPR_NAM', 'Cn')
+    )
+    cache_encoding = True
+
+    def __init__(self, SETUP_T, START_T, STAT_NUM, LOT_ID, PART_TYP, NODE_NAM, TSTR_TYP, JOB_NAM,
+                 MODE_COD=" ", RTST_COD=" ", PROT_COD=" ", BURN_TIM=65535, CMOD_COD=" ", JOB_REV="",
+                 SBLOT_ID="", OPER_NAM="", EXEC_TYP="", EXEC_VER="", TEST_COD="", TST_TEMP="",
+                 USER_TXT="", AUX_FILE="", PKG_TYP="", FAMLY_ID="", DATE_COD="", FACIL_ID="", FLOOR_ID="",
+                 PROC_ID="", OPER_FRQ="", SPEC_NAM="", SPEC_VER="", FLOW_ID="", SETUP_ID="", DSGN_REV="",
+                 ENG_ID="", ROM_COD="", SERL_NUM="", SUPR_NAM=""):
+        self.field_values = locals()
+
+
+class MRR(Record):
+    """
+    Function: The Master Results Record (MRR) is a logical extension of the Master Information
+                Record (MIR). The data can be thought of as belonging with the MIR, but it is not
+                available when the tester writes the MIR information. Each data stream must have
+                exactly one MRR as the last record in the data stream.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (20)
+
+    FINISH_T        U*4             Date and time last part tested
+    DISP_COD        C*1             Lot disposition code space
+    USR_DESC        C*n             Lot description supplied by user length byte = 0
+    EXC_DESC        C*n             Lot description supplied by exec length byte = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    DISP_COD        Supplied by the user to indicate the disposition of the lot of parts (or of the tester itself,
+                    in the case of checker or AEL data). The meaning of DISP_COD values are user-defined.
+                    A valid value is an ASCII alphanumeric character (0 - 9 or A - Z). A space indicates a
+                    missing value.
+    Frequency:      Exactly one MRR required per data stream.
+    Location:       Must be the last record in the data stream.
+
+    Possible Use:   Final Summary Sheet     Merged Summary Sheet
+                    Datalog                 Test Results Synopsis Report
+                    Wafer Map               Trend Plot
+                    Histogram               ADART
+                    Correlation             RTBM
+                    Shmoo Plot              User Data
+                    Repair Report
+    """
+    rec_typ = 1
+    rec_sub = 20
+    field_names = (
+        ('FINISH_T', 'U4'),
+        ('DISP_COD', 'C1'),
+        ('USR_DESC', 'Cn'),
+        ('EXC_DESC', 'Cn')
+    )
+
+    def __init__(self, FINISH_T, DISP_COD=" ", USR_DESC="", EXC_DESC=""):
+        self.field_values = locals()
+
+
+class PCR(Record):
+    """
+    Function: Contains the part count totals for one or all test sites. Each data stream must have at
+                least one PCR to show the part count.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (30)
+
+    HEAD_NUM        U*1             Test head number See note
+    SITE_NUM        U*1             Test site number
+    PART_CNT        U*4             Number of parts tested
+    RTST_CNT        U*4             Number of parts retested 4,294,967,295
+    ABRT_CNT        U*4             Number of aborts during testing 4,294,967,295
+    GOOD_CNT        U*4             Number of good (passed) parts tested 4,294,967,295
+    FUNC_CNT        U*4             Number of functional parts tested 4,294,967,295
+    =================================================================================================
+    Notes on Specific Fields:
+    HEAD_NUM        If this PCR contains a summary of the part counts for all test sites, this field must be
+                    set to 255.
+    GOOD_CNT,
+    FUNC_CNT        A part is considered good when it is binned into one of the “passing” hardware bins. A
+                    part is considered functional when it is good enough to test, whether it passes or not.
+                    Parts that are incomplete or have shorts or opens are considered non-functional.
+    Frequency:      There must be at least one PCR in the file: either one summary PCR for all test sites
+                    (HEAD_NUM = 255), or one PCR for each head/site combination, or both.
+    Location:       Anywhere in the data stream after the initial sequence (see page 14) and before the
+                    MRR.When data is being recorded in real time, this record will usually appear near the
+                    end of the data stream.
+
+    Possible Use:   Final Summary Sheet         Merged Summary Sheet
+                    Site Summary Sheet          Report for Lot Tracking System
+    """
+    rec_typ = 1
+    rec_sub = 30
+    field_names = (
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1'),
+        ('PART_CNT', 'U4'),
+        ('RTST_CNT', 'U4'),
+        ('ABRT_CNT', 'U4'),
+        ('GOOD_CNT', 'U4'),
+        ('FUNC_CNT', 'U4')
+    )
+
+    def __init__(self, HEAD_NUM, SITE_NUM, PART_CNT, RTST_CNT=4294967295, ABRT_CNT=4294967295, GOOD_CNT=4294967295, FUNC_CNT=4294967295):
+        self.field_values = locals()
+
+
+class HBR(Record):
+    """
+    Function: Stores a count of the parts “physically” placed in a particular bin after testing. (In
+                wafer testing, “physical” binning is not an actual transfer of the chip, but rather is
+                represented by a drop of ink or an entry in a wafer map file.) This bin count can be for
+                a single test site (when parallel testing) or a total for all test sites. The STDF
+                specification also supports a Software Bin Record (SBR) for logical binning categories.
+                A part is “physically” placed in a hardware bin after testing. A part can be “logically”
+                associated with a software bin during or after testing.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (40)
+
+    HEAD_NUM        U*1             Test head number See note
+    SITE_NUM        U*1             Test site number
+    HBIN_NUM        U*2             Hardware bin number
+    HBIN_CNT        U*4             Number of parts in bin
+    HBIN_PF         C*1             Pass/fail indication space
+    HBIN_NAM        C*n             Name of hardware bin length byte = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    HEAD_NUM        If this HBR contains a summary of the hardware bin counts for all test sites, this field
+                    must be set to 255.
+    HBIN_NUM        Has legal values in the range 0 to 32767.
+    HBIN_PF         This field indicates whether the hardware bin was a passing or failing bin. Valid values
+                    for this field are:
+                            P = Passingbin
+                            F = Failing bin
+                        space = Unknown
+    Frequency:      One per hardware bin for each site. One per hardware bin for bin totals.
+                    May be included to name unused bins.
+    Location:       Anywhere in the data stream after the initial sequence (see page 14) and before the
+                    MRR. When data is being recorded in real time, this record usually appears near the
+                    end of the data stream.
+
+    Possible Use:   Final Summary Sheet         Merged Summary Sheet
+                    Site Summary Sheet          Report for Lot Tracking System
+    """
+    rec_typ = 1
+    rec_sub = 40
+    field_names = (
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1'),
+        ('HBIN_NUM', 'U2'),
+        ('HBIN_CNT', 'U4'),
+        ('HBIN_PF', 'C1'),
+        ('HBIN_NAM', 'Cn')
+    )
+
+    def __init__(self, HEAD_NUM, SITE_NUM, HBIN_NUM, HBIN_CNT, HBIN_PF=" ", HBIN_NAM=""):
+        self.field_values = locals()
+
+
+class SBR(Record):
+    """
+    Function: Stores a count of the parts associated with a particular logical bin after testing. This
+                bin count can be for a single test site (when parallel testing) or a total for all test sites.
+                The STDF specification also supports a Hardware Bin Record (HBR) for actual physical
+                binning. A part is “physically” placed in a hardware bin after testing. A part can be
+                “logically” associated with a software bin during or after testing.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (40)
+
+    HEAD_NUM        U*1             Test head number See note
+    SITE_NUM        U*1             Test site number
+    SBIN_NUM        U*2             Hardware bin number
+    SBIN_CNT        U*4             Number of parts in bin
+    SBIN_PF         C*1             Pass/fail indication space
+    SBIN_NAM        C*n             Name of hardware bin length byte = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    HEAD_NUM        If this HBR contains a summary of the hardware bin counts for all test sites, this field
+                    must be set to 255.
+    HBIN_NUM        Has legal values in the range 0 to 32767.
+    HBIN_PF         This field indicates whether the hardware bin was a passing or failing bin. Valid values
+                    for this field are:
+                            P = Passingbin
+                            F = Failing bin
+                        space = Unknown
+    Frequency:      One per hardware bin for each site. One per hardware bin for bin totals.
+                    May be included to name unused bins.
+    Location:       Anywhere in the data stream after the initial sequence (see page 14) and before the
+                    MRR. When data is being recorded in real time, this record usually appears near the
+                    end of the data stream.
+
+    Possible Use:   Final Summary Sheet         Merged Summary Sheet
+                    Site Summary Sheet          Report for Lot Tracking System
+    """
+    rec_typ = 1
+    rec_sub = 50
+    field_names = (
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1'),
+        ('SBIN_NUM', 'U2'),
+        ('SBIN_CNT', 'U4'),
+        ('SBIN_PF', 'C1'),
+        ('SBIN_NAM', 'Cn')
+    )
+
+    def __init__(self, HEAD_NUM, SITE_NUM, SBIN_NUM, SBIN_CNT, SBIN_PF=" ", SBIN_NAM=""):
+        self.field_values = locals()
+
+
+class RDR(Record):
+    """
+    Function: Signals that the data in this STDF file is for retested parts. The data in this record,
+                combined with information in the MIR, tells data filtering programs what data to
+                replace when processing retest data.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (70)
+
+    NUM_BINS        U*2             Number (k) of bins being retested
+    RTST_BIN        kxU*2           Array of retest bin numbers             NUM_BINS = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    NUM_BINS,
+    RTST_BIN        NUM_BINS indicates the number of hardware bins being retested and therefore the size
+                    of the RTST_BIN array that follows. If NUM_BINS is zero, then all bins in the lot are being
+                    retested and RTST_BIN is omitted.
+                    The LOT_ID, SUBLOT_ID, and TEST_COD of the current STDF file should match those of
+                    the STDF file that is being retested, so the data can be properly merged at a later time.
+
+    Frequency:      Optional. One per data stream.
+    Location:       If this record is used, it must appear immediately after theMaster Information Record
+                    (MIR).
+
+    Possible Use:   Tells data filtering programs how to handle retest data.
+    """
+    rec_typ = 1
+    rec_sub = 70
+    field_names = (
+        ('NUM_BINS', 'U2'),
+        ('RTST_BIN', 'kxU2')
+    )
+    kx_counts = {'RTST_BIN': 'NUM_BINS'}
+    cache_encoding = True
+
+    def __init__(self, NUM_BINS, RTST_BIN=0):
+        self.field_values = locals()
+
+
+class SDR(Record):
+    """
+     Function: Contains the configuration information for one or more test sites, connected to one test
+               head, that compose a site group.
+
+     Data Fields:
+     Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+     =================================================================================================
+     REC_LEN         U*2             Bytes of data following header
+     REC_TYP         U*1             Record type (1)
+     REC_SUB         U*1             Record sub-type (80)
+
+     HEAD_NUM        U*1             Test head number
+     SITE_GRP        U*1             Site group number
+     SITE_CNT        U*1             Number (k) of test sites in site group
+     SITE_NUM        kxU*1           Array of test site numbers
+     HAND_TYP        C*n             Handler or prober type length byte = 0
+     HAND_ID         C*n             Handler or prober ID length byte = 0
+     CARD_TYP        C*n             Probe card type length byte = 0
+     CARD_ID         C*n             Probe card ID length byte = 0
+     LOAD_TYP        C*n             Load board type length byte = 0
+     LOAD_ID         C*n             Load board ID length byte = 0
+     DIB_TYP         C*n             DIB board type length byte = 0
+     DIB_ID          C*n             DIB board ID length byte = 0
+     CABL_TYP        C*n             Interface cable type length byte = 0
+     CABL_ID         C*n             Interface cable ID length byte = 0
+     CONT_TYP        C*n             Handler contactor type length byte = 0
+     CONT_ID         C*n             Handler contactor ID length byte = 0
+     LASR_TYP        C*n             Laser type length byte = 0
+     LASR_ID         C*n             Laser ID length byte = 0
+     EXTR_TYP        C*n             Extra equipment type field length byte = 0
+     EXTR_ID         C*n             Extra equipment ID length byte = 0
+     =================================================================================================
+     Notes on Specific Fields:
+     SITE_GRP        Specifies a site group number (called a station number on some testers) for the group
+                     of sites whose configuration is defined by this record. Note that this is different from
+                     the station number specified in the MIR, which refers to a software station only.
+                     The value in this field must be unique within the STDF file.
+     SITE_CNT,
+     SITE_NUM        SITE_CNT tells how many sites are in the site group that the current SDR configuration
+                     applies to. SITE_NUM is an array of those site numbers.
+     _TYP fields     These are the type or model number of the interface or peripheral equipment being
+                     used for testing:
+                         HAND_TYP,CARD_TYP,LOAD_TYP,DIB_TYP,
+                         CABL_TYP,CONT_TYP,LASR_TYP,EXTR_TYP
+     _ID fields      These are the IDs or serial numbers of the interface or peripheral equipment being
+                     used for testing:
+                         HAND_ID,CARD_ID,LOAD_ID,DIB_ID,
+                         CABL_ID,CONT_ID,LASR_ID,EXTR_ID
+     Frequency:      One for each site or group of sites that is differently configured.
+     Location:       Immediately after the MIR and RDR (if an RDR is used).
+
+     Possible Use:   Correlation of yield to interface or peripheral equipment
+    """
+    rec_typ = 1
+    rec_sub = 80
+    field_names = (
+        ('HEAD_NUM', 'U1'),
+        ('SITE_GRP', 'U1'),
+        ('SITE_CNT', 'U1'),
+        ('SITE_NUM', 'kxU1'),
+        ('HAND_TYP', 'Cn'),
+        ('HAND_ID', 'Cn'),
+        ('CARD_TYP', 'Cn'),
+        ('CARD_ID', 'Cn'),
+        ('LOAD_TYP', 'Cn'),
+        ('LOAD_ID', 'Cn'),
+        ('DIB_TYP', 'Cn'),
+        ('DIB_ID', 'Cn'),
+        ('CABL_TYP', 'Cn'),
+        ('CABL_ID', 'Cn'),
+        ('CONT_TYP', 'Cn'),
+        ('CONT_ID', 'Cn'),
+        ('LASR_TYP', 'Cn'),
+        ('LASR_ID', 'Cn'),
+        ('EXTR_TYP', 'Cn'),
+        ('EXTR_ID', 'Cn')
+    )
+    kx_counts = {'SITE_NUM': 'SITE_CNT'}
+    cache_encoding = True
+
+    def __init__(self, HEAD_NUM, SITE_GRP, SITE_CNT, SITE_NUM, HAND_TYP="", HAND_ID="",
+                 CARD_TYP="", CARD_ID="", LOAD_TYP="", LOAD_ID="", DIB_TYP="", DIB_ID="", CABL_TYP="",
+                 CABL_ID="", CONT_TYP="", CONT_ID="", LASR_TYP="", LASR_ID="", EXTR_TYP="", EXTR_ID=""):
+        self.field_values = locals()
@@ -0,0 +1,159 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Records with data collected per part (REC_TYP 5).
+# Import the classes from recheaders, which loads this module on first use.
+
+
+from .recheaders import Record
+
+
+class PIR(Record):
+    """
+    Function: Acts as a marker to indicate where testing of a particular part begins for each part
+                tested by the test program. The PIR and the Part Results Record (PRR) bracket all the
+                stored information pertaining to one tested part.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (5)
+    REC_SUB         U*1             Record sub-type (10)
+
+    HEAD_NUM        U*1             Test head number
+    SITE_NUM        U*1             Test site number
+    =================================================================================================
+    Notes on Specific Fields:
+    HEAD_NUM,
+    SITE_NUM        If a test system does not support parallel testing, and does not have a standard way to
+                    identify its single test site or head, then these fields should be set to 1.
+                    When parallel testing, these fields are used to associate individual datalogged results
+                    (FTRs and PTRs) with a PIR/PRR pair. An FTR or PTR belongs to the PIR/PRR pair having
+                    the same values for HEAD_NUM and SITE_NUM.
+    Frequency:      One per part tested.
+    Location:       Anywhere in the data stream after the initial sequence (see page 14), and before the
+                    corresponding PRR.
+                    Sent before testing each part.
+
+    Possible Use:   Datalog
+    """
+    rec_typ = 5
+    rec_sub = 10
+    field_names = (
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1')
+    )
+
+    def __init__(self, HEAD_NUM, SITE_NUM):
+        self.field_values = locals()
+
+
+class PRR(Record):
+    """
+    Function: Contains the result information relating to each part tested by the test program. The
+                PRR and the Part Information Record (PIR) bracket all the stored information
+                pertaining to one tested part.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (5)
+    REC_SUB         U*1             Record sub-type (20)
+
+    HEAD_NUM        U*1             Test head number
+    SITE_NUM        U*1             Test site number
+    PART_FLG        B*1             Part information flag
+    NUM_TEST        U*2             Number of tests executed
+    HARD_BIN        U*2             Hardware bin number
+    SOFT_BIN        U*2             Software bin number                     65535
+    X_COORD         I*2             (Wafer) X coordinate                    -32768
+    Y_COORD         I*2             (Wafer) Y coordinate                    -32768
+    TEST_T          U*4             Elapsed test time in milliseconds       0
+    PART_ID         C*n             Part identification                     length byte = 0
+    PART_TXT        C*n             Part description text                   length byte = 0
+    PART_FIX        B*n             Part repair information                 length byte = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    HEAD_NUM,
+    SITE_NUM        If a test system does not support parallel testing, and does not have a standard way to
+                    identify its single test site or head, then these fields should be set to 1.
+                    When parallel testing, these fields are used to associate individual datalogged results
+                    (FTRs and PTRs) with a PIR/PRR pair. An FTR or PTR belongs to the PIR/PRR pair having
+                    the same values for HEAD_NUM and SITE_NUM.
+    X_COORD,
+    Y_COORD         Have legal values in the range -32767 to 32767. A missing value is indicated by the
+                    value -32768.
+    X_COORD,
+    Y_COORD,
+    PART_ID         Are all optional, but you should provide either the PART_ID or the X_COORD and
+                    Y_COORD in order to make the resultant data useful for analysis.
+    PART_FLG        Contains the following fields:
+                    bit 0: 0 = This is a new part. Its data device does not supersede that of any previous
+                                device.
+                           1 = The PIR, PTR, MPR, FTR, and PRR records that make up the current
+                                sequence (identified as having the same HEAD_NUM and SITE_NUM)
+                                supersede any previous sequence of records with the same PART_ID. (A
+                                repeated part sequence usually indicates a mistested part.)
+                    bit 1: 0 = This is a new part. Its data device does not supersede that of any previous
+                                device.
+                           1 = The PIR, PTR, MPR, FTR, and PRR records that make up the current
+                            sequence (identified as having the same HEAD_NUM and SITE_NUM)
+                            supersede any previous sequence of records with the same X_COORD and
+                            Y_COORD. (A repeated part sequence usually indicates a mistested part.)
+                            Note: Either Bit 0 or Bit 1 can be set, but not both. (It is also valid to have neither
+                            set.)
+                    bit 2: 0 = Part testing completed normally
+                           1 = Abnormal end of testing
+                    bit 3: 0 = Part passed
+                            1 = Part failed
+                    bit 4: 0 = Pass/fail flag (bit 3) is valid
+                            1 = Device completed testing with no pass/fail indication (i.e., bit 3 is invalid)
+                    bits 5 - 7: Reserved for future use — must be 0
+    HARD_BIN        Has legal values in the range 0 to 32767.
+    SOFT_BIN        Has legal values in the range 0 to 32767. A missing value is indicated by the value
+                    65535.
+    PART_FIX        This is an application-specific field for storing device repair information. Itmay be used
+                    for bit-encoded, integer, floating point, or character information. Regardless of the
+                    information stored, the first byte must contain the number of bytes to follow. This field
+                    can be decoded only by an application-specific analysis program. See “Storing Repair
+                    Information” on page 75.
+    Frequency:      One per part tested.
+    Location:       Anywhere in the data stream after the corresponding PIR and before the MRR.
+                    Sent after completion of testing each part.
+
+    Possible Use:   Datalog         Wafer map
+                    RTBM Shmoo      Plot
+                    Repair Data
+    """
+    rec_typ = 5
+    rec_sub = 20
+    field_names = (
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1'),
+        ('PART_FLG', 'B1'),
+        ('NUM_TEST', 'U2'),
+        ('HARD_BIN', 'U2'),
+        ('SOFT_BIN', 'U2'),
+        ('X_COORD', 'I2'),
+        ('Y_COORD', 'I2'),
+        ('TEST_T', 'U4'),
+        ('PART_ID', 'Cn'),
+        ('PART_TXT', 'Cn'),
+        ('PART_FIX', 'Bn')
+    )
+
+    def __init__(self, HEAD_NUM, SITE_NUM, PART_FLG, NUM_TEST, HARD_BIN, SOFT_BIN=65535,
+                 X_COORD=-32768, Y_COORD=-32768, TEST_T=0, PART_ID="", PART_TXT="", PART_FIX=""):
+        self.field_values = locals()
@@ -0,0 +1,224 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Pin mapping records, per lot (REC_TYP 1): PMR, PGR and PLR.
+# Import the classes from recheaders, which loads this module on first use.
+
+
+from .recheaders import REC_LEN_MAX, Record
+
+
+class PMR(Record):
+    """
+    Function: Provides indexing of tester channel names, and maps them to physical and logical pin
+                names. Each PMR defines the information for a single channel/pin combination. See
+                “Using the Pin Mapping Records” on page 77.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (60)
+
+    PMR_INDX        U*2             Unique index associated with pin
+    CHAN_TYP        U*2             Channel type 0
+    CHAN_NAM        C*n             Channel name length byte = 0
+    PHY_NAM         C*n             Physical name of pin length byte = 0
+    LOG_NAM         C*n             Logical name of pin length byte = 0
+    HEAD_NUM        U*1             Head number associated with channel 1
+    SITE_NUM        U*1             Site number associated with channel 1
+    =================================================================================================
+    Notes on Specific Fields:
+    PMR_INDX        This number is used to associate the channel and pin name information with data in
+                    the FTR or MPR. Reporting programs can then look up the PMR index and choose which
+                    of the three associated names they will use.
+                    The range of legal PMR indexes is 1 - 32,767.
+                    The size of the FAIL_PIN and SPIN_MAP arrays in the FTR are directly proportional to
+                    the highest PMR index number. Therefore, it is important to start PMR indexes with a
+                    low number and use consecutive numbers if possible.
+    CHAN_TYP        The channel type values are tester-specific. Please refer to the tester documentation for
+                    a list of the valid tester channel types and codes.
+    HEAD_NUM,
+    SITE_NUM        If a test system does not support parallel testing and does not have a standard way of
+                    identifying its single test site or head, these fields should be set to 1. If missing, the
+                    value of these fields will default to 1.
+    Frequency:      One per channel/pin combination used in the test program.
+                    Reuse of a PMR index number is not permitted.
+    Location:       After the initial sequence (see page 14) and before the first PGR, PLR, FTR, or MPR that
+                    uses this record’s PMR_INDX value.
+
+    Possible Use:   Functional Datalog      Functional Histogram
+    """
+    rec_typ = 1
+    rec_sub = 60
+    field_names = (
+        ('PMR_INDX', 'U2'),
+        ('CHAN_TYP', 'U2'),
+        ('CHAN_NAM', 'Cn'),
+        ('PHY_NAM', 'Cn'),
+        ('LOG_NAM', 'Cn'),
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1')
+    )
+    cache_encoding = True
+
+    def __init__(self, PMR_INDX, CHAN_TYP=0, CHAN_NAM="", PHY_NAM="", LOG_NAM="", HEAD_NUM=1, SITE_NUM=1):
+        self.field_values = locals()
+
+
+class PGR(Record):
+    """
+    Function: Associates a name with a group of pins. See “Using the Pin Mapping Records” on page 77.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (62)
+
+    GRP_INDX        U*2             Unique index associated with pin group
+    GRP_NAM         C*n             Name of pin group                       length byte = 0
+    INDX_CNT        U*2             Count (k) of PMR indexes
+    PMR_INDX        kxU*2           Array of indexes for pins in the group  INDX_CNT = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    GRP_INDX        The range of legal group index numbers is 32,768 - 65,535.
+    INDX_CNT,
+    PMR_INDX        PMR_INDX is an array of PMR indexes whose length is defined by INDX_CNT. The order
+                    of the PMR indexes should be from most significant to least significant bit in the pin
+                    group (regardless of the order of PMR index numbers).
+    Frequency:      One per pin group defined in the test program.
+    Location:       After all the PMRs whose PMR index values are listed in the PMR_INDX array of this
+                    record; and before the first PLR that uses this record’s GRP_INDX value.
+
+    Possible Use:   Functional Datalog
+    """
+    rec_typ = 1
+    rec_sub = 62
+    field_names = (
+        ('GRP_INDX', 'U2'),
+        ('GRP_NAM', 'Cn'),
+        ('INDX_CNT', 'U2'),
+        ('PMR_INDX', 'kxU2')
+    )
+    kx_counts = {'PMR_INDX': 'INDX_CNT'}
+    cache_encoding = True
+
+    def __init__(self, GRP_INDX, INDX_CNT, GRP_NAM="", PMR_INDX=0):
+        self.field_values = locals()
+
+
+class PLR(Record):
+    """
+    Function: Defines the current display radix and operating mode for a pin or pin group. See “Using
+                the Pin Mapping Records” on page 77.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (63)
+
+    GRP_CNT         U*2             Count (k) of pins or pin groups
+    GRP_INDX        kxU*2           Array of pin or pin group indexes
+    GRP_MODE        kxU*2           Operating mode of pin group             0
+    GRP_RADX        kxU*1           Display radix of pin group              0
+    PGM_CHAR        kxC*n           Program state encoding characters       length byte = 0
+    RTN_CHAR        kxC*n           Return state encoding characters        length byte = 0
+    PGM_CHAL        kxC*n           Program state encoding characters       length byte = 0
+    RTN_CHAL        kxC*n           Return state encoding characters        length byte = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    GRP_CNT         GRP_CNT defines the number of pins or pin groups whose radix and mode are being
+                    defined. Therefore, it defines the size of each of the arrays that follow in the record.
+                    GRP_CNT must be greater than zero.
+    GRP_MODE        The following are valid values for the pin group mode:
+                        00 = Unknown
+                        10 = Normal
+                        20 = SCIO (Same Cycle I/O)
+                        21 = SCIO Midband
+                        22 = SCIO Valid
+                        23 = SCIOWindow Sustain
+                        30 = Dual drive (two drive bits per cycle)
+                        31 = Dual drive Midband
+                        32 = Dual drive Valid
+                        33 = Dual drive Window Sustain
+                    Unused pin group modes in the range of 1 through 32,767 are reserved for future use.
+                    Pin group modes 32,768 through 65,535 are available for customer use.
+    GRP_RADX        The following are valid values for the pin group display radix:
+                        0 = Use display program default
+                        2 = Display in Binary
+                        8 = DisplayinOctal
+                        10 = Display in Decimal
+                        16 = Display in Hexadecimal
+                        20 = Display as symbolic
+    PGM_CHAR,
+    PGM_CHAL        These ASCII characters are used to display the programmed state in the FTR or MPR.
+                    Use of these character arrays makes it possible to store tester-dependent display
+                    representations in a tester-independent format. If a single character is used to
+                    represent each programmed state, then only the PGM_CHAR array need be used. If two
+                    characters represent each state, then the first (left) character is stored in PGM_CHAL
+                    and the second (right) character is stored in PGM_CHAR.
+    RTN_CHAR,
+    RTN_CHAL        These ASCII characters are used to display the returned state in the FTR or MPR. Use
+                    of these character arrays makes it possible to store tester-dependent display
+                    representations in a tester-independent format. If a single character is used to
+                    represent each returned state, then only the RTN_CHAR array need be used. If two
+                    characters represent each state, then the first (left) character is stored in RTN_CHAL
+                    and the second (right) character is stored in RTN_CHAR.
+    Note on Missing/Invalid Data Flags:
+        For each field, the missing/invalid data flag applies to each member of the
+        array, not to the array as a whole. Empty arrays (or empty members of
+        arrays) can be omitted if they occur at the end of the record. Otherwise,
+        each array must have the number of members indicated by GRP_CNT. You
+        can then use the field’s missing/invalid data flag to indicate which array
+        members have no data. For example, if GRP_CNT = 3, and if PGM_CHAL
+        contains no data (but RTN_CHAL, which appears after PGM_CHAL, does),
+        then PGM_CHAL should be an array of three missing/invalid data flags: 0,
+        0, 0.
+    Frequency:      One or more whenever the usage of a pin or pin group changes in the test program.
+    Location:       After all the PMRs and PGRs whose PMR index values and pin group index values are
+                    listed in the GRP_INDX array of this record; and before the first FTR that references pins
+                    or pin groups whose modes are defined in this record.
+
+    Possible Use:   Functional Datalog
+    """
+    rec_typ = 1
+    rec_sub = 63
+    field_names = (
+        ('GRP_CNT', 'U2'),
+        ('GRP_INDX', 'kxU2'),
+        ('GRP_MODE', 'kxU2'),
+        ('GRP_RADX', 'kxU1'),
+        ('PGM_CHAR', 'kxCn'),
+        ('RTN_CHAR', 'kxCn'),
+        ('PGM_CHAL', 'kxCn'),
+        ('RTN_CHAL', 'kxCn')
+    )
+    split_fields = ('GRP_INDX', 'GRP_MODE', 'GRP_RADX', 'PGM_CHAR', 'RTN_CHAR', 'PGM_CHAL', 'RTN_CHAL')
+    cache_encoding = True
+
+    def __init__(self, GRP_CNT, GRP_INDX, GRP_MODE=0, GRP_RADX=0, PGM_CHAR="", RTN_CHAR="",
+                 PGM_CHAL="", RTN_CHAL=""):
+        self.field_values = locals()
+
+    def split(self, max_len=REC_LEN_MAX):
+        """Several PLRs, each for some of the groups; GRP_CNT is set to the groups in each."""
+        records = Record.split(self, max_len)
+        if len(records) > 1:
+            for rec in records:
+                rec.field_values['GRP_CNT'] = len(rec.field_values['GRP_INDX'])
+        return records
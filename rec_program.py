@@ -0,0 +1,78 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Records with data collected per program segment (REC_TYP 20).
+# Import the classes from recheaders, which loads this module on first use.
+
+
+from .recheaders import Record
+
+
+class BPS(Record):
+    """
+    Function: Marks the beginning of a new program section (or sequencer) in the job plan.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (20)
+    REC_SUB         U*1             Record sub-type (10)
+
+    SEQ_NAME        C*n             Program section (or sequencer) name     length byte = 0
+    =================================================================================================
+    Frequency:      Optional on each entry into the program segment.
+    Location:       Anywhere after the PIR and before the PRR.
+    Possible        Use: When performing analyses on a particular program segment’s test.
+    """
+    rec_typ = 20
+    rec_sub = 10
+    field_names = (
+        ('SEQ_NAME', 'Cn'),
+    )
+
+    def __init__(self, SEQ_NAME=""):
+        self.field_values = locals()
+
+
+class EPS(Record):
+    """
+    Function: Marks the end of the current program section (or sequencer) in the job plan.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (20)
+    REC_SUB         U*1             Record sub-type (20)
+
+    =================================================================================================
+    Frequency:      Optional on each exit from the program segment.
+    Location:       Following the corresponding BPS and before the PRR in the data stream.
+    Possible Use:
+                    When performing analyses on a particular program segment’s test.
+                    Note that pairs of BPS and EPS records can be nested: for example, when one sequencer
+                    calls another. In this case, the sequence of records could look like this:
+                            BPS         SEQ_NAME = sequence-1
+                            BPS         SEQ_NAME = sequence-2
+                            EPS         (end of sequence-2)
+                            EPS         (end of sequence-1)
+                    Because an EPS record does not contain the name of the sequencer, it should be
+                    assumed that each EPS record matches the last unmatched BPS record.
+    """
+    rec_typ = 20
+    rec_sub = 20
+    field_names = ()
+
+    def __init__(self):
+        self.field_values = locals()
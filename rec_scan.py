@@ -0,0 +1,456 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Scan and memory test records of the STDF V4-2007 update: PSR, NMR, CNR, SSR, CDR (REC_TYP 1)
+# and STR (REC_TYP 15). Import the classes from recheaders, which loads this module on first use.
+#
+# Count fields default to None and are then filled in from the length of their arrays. PSR, NMR,
+# CDR and STR records too long for REC_LEN are written as a chain of records with bit 0 of
+# CONT_FLG set in all but the last (see Record.split).
+
+
+from .recheaders import Record
+
+
+class PSR(Record):
+    """
+    Function: Describes the patterns of a pattern sequence, the cycle ranges they cover and the
+              files they come from. Scan Test Records (STR) refer to it by PSR_INDX.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (90)
+
+    CONT_FLG        B*1             Continuation PSR record exists          bit 0 = 0
+    PSR_INDX        U*2             PSR record index (used by STR records)
+    PSR_NAM         C*n             Symbolic name of the PSR record         length byte = 0
+    OPT_FLG         B*1             Missing flags of PAT_LBL, FILE_UID,
+                                    ATPG_DSC and SRC_ID
+    TOTP_CNT        U*2             Count of pattern sets in all PSRs
+    LOCP_CNT        U*2             Count (k) of pattern sets in this PSR
+    PAT_BGN         kxU*8           Array of cycle numbers of pattern begins
+    PAT_END         kxU*8           Array of cycle numbers of pattern ends
+    PAT_FILE        kxC*n           Array of pattern file names
+    PAT_LBL         kxC*n           Optional pattern symbolic names         OPT_FLG
+    FILE_UID        kxC*n           Optional file identifier codes          OPT_FLG
+    ATPG_DSC        kxC*n           Optional ATPG information               OPT_FLG
+    SRC_ID          kxC*n           Optional PatternInSrcFileID             OPT_FLG
+    =================================================================================================
+    Notes on Specific Fields:
+    CONT_FLG        Bit 0 set: the pattern sets continue in the next PSR with the same PSR_INDX.
+    TOTP_CNT        Defaults to LOCP_CNT, which defaults to the length of PAT_BGN. A PSR split into
+                    continuation records keeps TOTP_CNT and sets LOCP_CNT of each record.
+    PAT_LBL,
+    FILE_UID,
+    ATPG_DSC,
+    SRC_ID          Default to LOCP_CNT empty strings.
+
+    Frequency:      One or more for each pattern sequence.
+    Location:       After the initial sequence and before the first STR that refers to it.
+
+    Possible Use:   Mapping scan failures back to patterns and cycles.
+    """
+    rec_typ = 1
+    rec_sub = 90
+    field_names = (
+        ('CONT_FLG', 'B1'),
+        ('PSR_INDX', 'U2'),
+        ('PSR_NAM', 'Cn'),
+        ('OPT_FLG', 'B1'),
+        ('TOTP_CNT', 'U2'),
+        ('LOCP_CNT', 'U2'),
+        ('PAT_BGN', 'kxU8'),
+        ('PAT_END', 'kxU8'),
+        ('PAT_FILE', 'kxCn'),
+        ('PAT_LBL', 'kxCn'),
+        ('FILE_UID', 'kxCn'),
+        ('ATPG_DSC', 'kxCn'),
+        ('SRC_ID', 'kxCn')
+    )
+    kx_counts = {'PAT_BGN': 'LOCP_CNT', 'PAT_END': 'LOCP_CNT', 'PAT_FILE': 'LOCP_CNT', 'PAT_LBL': 'LOCP_CNT',
+                 'FILE_UID': 'LOCP_CNT', 'ATPG_DSC': 'LOCP_CNT', 'SRC_ID': 'LOCP_CNT'}
+    split_fields = ('PAT_BGN', 'PAT_END', 'PAT_FILE', 'PAT_LBL', 'FILE_UID', 'ATPG_DSC', 'SRC_ID')
+    cache_encoding = True
+
+    def __init__(self, PSR_INDX, PAT_BGN, PAT_END, PAT_FILE, PSR_NAM="", CONT_FLG=0, OPT_FLG=0, TOTP_CNT=None,
+                 LOCP_CNT=None, PAT_LBL=None, FILE_UID=None, ATPG_DSC=None, SRC_ID=None):
+        self.field_values = locals()
+        self.set_counts()
+        fv = self.field_values
+        if TOTP_CNT is None:
+            fv['TOTP_CNT'] = fv['LOCP_CNT']
+        for name in ('PAT_LBL', 'FILE_UID', 'ATPG_DSC', 'SRC_ID'):
+            if fv[name] is None:
+                fv[name] = [""] * int(fv['LOCP_CNT'])
+
+
+class NMR(Record):
+    """
+    Function: Maps PMR indexes to the names the ATPG tools used for the pins.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (91)
+
+    CONT_FLG        B*1             Continuation NMR record exists          bit 0 = 0
+    TOTM_CNT        U*2             Count of PMR indexes and ATPG_NAM
+                                    entries in all NMRs
+    LOCM_CNT        U*2             Count (k) of PMR indexes and ATPG_NAM
+                                    entries in this NMR
+    PMR_INDX        kxU*2           Array of PMR indexes
+    ATPG_NAM        kxC*n           Array of ATPG signal names
+    =================================================================================================
+    Notes on Specific Fields:
+    TOTM_CNT        Defaults to LOCM_CNT, which defaults to the length of PMR_INDX.
+
+    Frequency:      Optional. One or more per data stream.
+    Location:       After the initial sequence and the PMRs it refers to, before the first STR.
+
+    Possible Use:   Reporting scan failures with the ATPG tool's signal names.
+    """
+    rec_typ = 1
+    rec_sub = 91
+    field_names = (
+        ('CONT_FLG', 'B1'),
+        ('TOTM_CNT', 'U2'),
+        ('LOCM_CNT', 'U2'),
+        ('PMR_INDX', 'kxU2'),
+        ('ATPG_NAM', 'kxCn')
+    )
+    kx_counts = {'PMR_INDX': 'LOCM_CNT', 'ATPG_NAM': 'LOCM_CNT'}
+    split_fields = ('PMR_INDX', 'ATPG_NAM')
+    cache_encoding = True
+
+    def __init__(self, PMR_INDX, ATPG_NAM, CONT_FLG=0, TOTM_CNT=None, LOCM_CNT=None):
+        self.field_values = locals()
+        self.set_counts()
+        if TOTM_CNT is None:
+            self.field_values['TOTM_CNT'] = self.field_values['LOCM_CNT']
+
+
+class CNR(Record):
+    """
+    Function: Names a scan cell, by its chain number and bit position in the chain.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (92)
+
+    CHN_NUM         U*2             Chain number (CDR_INDX of the chain)
+    BIT_POS         U*4             Bit position in the chain
+    CELL_NAM        S*n             Scan cell name
+    =================================================================================================
+    Frequency:      Optional. One per scan cell named in the file.
+    Location:       After the initial sequence and before the first STR that refers to the cell.
+
+    Possible Use:   Reporting scan failures by cell name.
+    """
+    rec_typ = 1
+    rec_sub = 92
+    field_names = (
+        ('CHN_NUM', 'U2'),
+        ('BIT_POS', 'U4'),
+        ('CELL_NAM', 'Sn')
+    )
+    cache_encoding = True
+
+    def __init__(self, CHN_NUM, BIT_POS, CELL_NAM):
+        self.field_values = locals()
+
+
+class SSR(Record):
+    """
+    Function: Describes a scan structure: the scan chains (CDRs) that make it up.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (93)
+
+    SSR_NAM         C*n             Name of the STIL scan structure         length byte = 0
+    CHN_CNT         U*2             Count (k) of chains
+    CHN_LIST        kxU*2           Array of CDR_INDX of the chains
+    =================================================================================================
+    Frequency:      Optional. One per scan structure.
+    Location:       After the initial sequence and the CDRs it refers to, before the first STR.
+
+    Possible Use:   Scan diagnosis.
+    """
+    rec_typ = 1
+    rec_sub = 93
+    field_names = (
+        ('SSR_NAM', 'Cn'),
+        ('CHN_CNT', 'U2'),
+        ('CHN_LIST', 'kxU2')
+    )
+    kx_counts = {'CHN_LIST': 'CHN_CNT'}
+    cache_encoding = True
+
+    def __init__(self, CHN_LIST, SSR_NAM="", CHN_CNT=None):
+        self.field_values = locals()
+        self.set_counts()
+
+
+class CDR(Record):
+    """
+    Function: Describes a scan chain: its length, scan in and out pins, clocks and cells.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (1)
+    REC_SUB         U*1             Record sub-type (94)
+
+    CONT_FLG        B*1             Continuation CDR record exists          bit 0 = 0
+    CDR_INDX        U*2             CDR index (used by SSR and STR records)
+    CHN_NAM         C*n             Chain name                              length byte = 0
+    CHN_LEN         U*4             Chain length (number of scan cells)
+    SIN_PIN         U*2             PMR index of the chain's scan in pin
+    SOUT_PIN        U*2             PMR index of the chain's scan out pin
+    MSTR_CNT        U*1             Count (m) of master clocks
+    M_CLKS          mxU*2           Array of PMR indexes of the master clocks
+    SLAV_CNT        U*1             Count (n) of slave clocks
+    S_CLKS          nxU*2           Array of PMR indexes of the slave clocks
+    INV_VAL         U*1             Scan out inversion (0: no, 1: yes)      255
+    LST_CNT         U*2             Count (k) of scan cells in this CDR
+    CELL_LST        kxS*n           Array of scan cell names
+    =================================================================================================
+    Notes on Specific Fields:
+    CONT_FLG        Bit 0 set: CELL_LST continues in the next CDR with the same CDR_INDX.
+
+    Frequency:      Optional. One or more per scan chain.
+    Location:       After the initial sequence and before the first STR that refers to the chain.
+
+    Possible Use:   Scan diagnosis.
+    """
+    rec_typ = 1
+    rec_sub = 94
+    field_names = (
+        ('CONT_FLG', 'B1'),
+        ('CDR_INDX', 'U2'),
+        ('CHN_NAM', 'Cn'),
+        ('CHN_LEN', 'U4'),
+        ('SIN_PIN', 'U2'),
+        ('SOUT_PIN', 'U2'),
+        ('MSTR_CNT', 'U1'),
+        ('M_CLKS', 'kxU2'),
+        ('SLAV_CNT', 'U1'),
+        ('S_CLKS', 'kxU2'),
+        ('INV_VAL', 'U1'),
+        ('LST_CNT', 'U2'),
+        ('CELL_LST', 'kxSn')
+    )
+    kx_counts = {'M_CLKS': 'MSTR_CNT', 'S_CLKS': 'SLAV_CNT', 'CELL_LST': 'LST_CNT'}
+    split_fields = ('CELL_LST',)
+    cache_encoding = True
+
+    def __init__(self, CDR_INDX, CHN_LEN, SIN_PIN, SOUT_PIN, CHN_NAM="", CONT_FLG=0, M_CLKS=(), S_CLKS=(),
+                 INV_VAL=255, CELL_LST=(), MSTR_CNT=None, SLAV_CNT=None, LST_CNT=None):
+        self.field_values = locals()
+        self.set_counts()
+
+
+class STR(Record):
+    """
+    Function: Contains the failures logged by one execution of a scan test, as parallel arrays
+              with one entry per logged failure.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (15)
+    REC_SUB         U*1             Record sub-type (30)
+
+    CONT_FLG        B*1             Continuation STR record exists          bit 0 = 0
+    TEST_NUM        U*4             Test number
+    HEAD_NUM        U*1             Test head number
+    SITE_NUM        U*1             Test site number
+    PSR_REF         U*2             PSR_INDX of the pattern sequence
+    TEST_FLG        B*1             Test flags (fail, alarm, etc.)
+    LOG_TYP         C*n             User defined description of datalog     length byte = 0
+    TEST_TXT        C*n             Descriptive text or label               length byte = 0
+    ALARM_ID        C*n             Name of alarm                           length byte = 0
+    PROG_TXT        C*n             Additional programmed information       length byte = 0
+    RSLT_TXT        C*n             Additional result information           length byte = 0
+    Z_VAL           U*1             Z handling flag
+    FMU_FLG         B*1             MASK_MAP and FAL_MAP flags
+    MASK_MAP        D*n             Bit map of globally masked pins         length bytes = 0
+    FAL_MAP         D*n             Bit map of failures after buffer full   length bytes = 0
+    CYC_CNT         U*8             Total cycles executed in test
+    TOTF_CNT        U*4             Total failures (pin x cycle) detected
+    TOTL_CNT        U*4             Total fails logged across all STRs
+    CYC_BASE        U*8             Cycle offset applied to all CYC_OFST
+    BIT_BASE        U*4             Offset applied to all BIT_POS
+    COND_CNT        U*2             Count (g) of test conditions
+    LIM_CNT         U*2             Count (j) of LIM_INDX and LIM_SPEC
+    CYC_SIZE        U*1             Size (f) of CYC_OFST elements (1,2,4,8)
+    PMR_SIZE        U*1             Size (f) of PMR_INDX elements (1,2)
+    CHN_SIZE        U*1             Size (f) of CHN_NUM elements (1,2,4)
+    PAT_SIZE        U*1             Size (f) of PAT_NUM elements (1,2,4)
+    BIT_SIZE        U*1             Size (f) of BIT_POS elements (1,2,4)
+    U1_SIZE         U*1             Size (f) of USR1 elements (0,1,2,4,8)
+    U2_SIZE         U*1             Size (f) of USR2 elements (0,1,2,4,8)
+    U3_SIZE         U*1             Size (f) of USR3 elements (0,1,2,4,8)
+    UTX_SIZE        U*1             Size (f) of USER_TXT strings
+    CAP_BGN         U*2             Offset added to BIT_POS for CAP_DATA
+    LIM_INDX        jxU*2           Array of PMR indexes with unique limits LIM_CNT = 0
+    LIM_SPEC        jxU*4           Array of 2007.1 limit specifications    LIM_CNT = 0
+    COND_LST        gxC*n           Array of test condition labels          COND_CNT = 0
+    CYCO_CNT        U*2             Count (k) of CYC_OFST
+    CYC_OFST        kxU*f           Array of cycle numbers relative to
+                                    CYC_BASE                                CYCO_CNT = 0
+    PMR_CNT         U*2             Count (k) of PMR_INDX
+    PMR_INDX        kxU*f           Array of PMR indexes of failing pins    PMR_CNT = 0
+    CHN_CNT         U*2             Count (k) of CHN_NUM
+    CHN_NUM         kxU*f           Array of chain numbers of failing bits  CHN_CNT = 0
+    EXP_CNT         U*2             Count (k) of EXP_DATA
+    EXP_DATA        kxU*1           Array of expected values                EXP_CNT = 0
+    CAP_CNT         U*2             Count (k) of CAP_DATA
+    CAP_DATA        kxU*1           Array of captured values                CAP_CNT = 0
+    NEW_CNT         U*2             Count (k) of NEW_DATA
+    NEW_DATA        kxU*1           Array of new data states                NEW_CNT = 0
+    PAT_CNT         U*2             Count (k) of PAT_NUM
+    PAT_NUM         kxU*f           Array of pattern numbers                PAT_CNT = 0
+    BPOS_CNT        U*2             Count (k) of BIT_POS
+    BIT_POS         kxU*f           Array of bit positions relative to
+                                    BIT_BASE                                BPOS_CNT = 0
+    USR1_CNT        U*2             Count (k) of USR1
+    USR1            kxU*f           Array of user defined values            USR1_CNT = 0
+    USR2_CNT        U*2             Count (k) of USR2
+    USR2            kxU*f           Array of user defined values            USR2_CNT = 0
+    USR3_CNT        U*2             Count (k) of USR3
+    USR3            kxU*f           Array of user defined values            USR3_CNT = 0
+    TXT_CNT         U*2             Count (k) of USER_TXT
+    USER_TXT        kxC*f           Array of user defined strings           TXT_CNT = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    CONT_FLG        Bit 0 set: the failure arrays continue in the next STR with the same TEST_NUM,
+                    HEAD_NUM and SITE_NUM. An STR too long for REC_LEN is written as such a chain:
+                    the failure arrays (CYC_OFST through USER_TXT) are cut at the same entry, the
+                    other fields are repeated, except MASK_MAP, FAL_MAP, LIM_INDX, LIM_SPEC and
+                    COND_LST, which are only written in the first record.
+    TOTL_CNT        Defaults to the length of the longest failure array, TOTF_CNT to TOTL_CNT.
+    CYC_OFST ..
+    USER_TXT        NumPy arrays are cast to the element size and written with one copy; U*1
+                    arrays can also be given as bytes. USER_TXT strings are padded with spaces
+                    to UTX_SIZE bytes.
+
+    Frequency:      One or more per scan test execution.
+    Location:       Anywhere in the data stream after the corresponding Part Information Record (PIR)
+                    and before the corresponding Part Result Record (PRR).
+
+    Possible Use:   Scan diagnosis               Failure bitmaps
+    """
+    rec_typ = 15
+    rec_sub = 30
+    field_names = (
+        ('CONT_FLG', 'B1'),
+        ('TEST_NUM', 'U4'),
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1'),
+        ('PSR_REF', 'U2'),
+        ('TEST_FLG', 'B1'),
+        ('LOG_TYP', 'Cn'),
+        ('TEST_TXT', 'Cn'),
+        ('ALARM_ID', 'Cn'),
+        ('PROG_TXT', 'Cn'),
+        ('RSLT_TXT', 'Cn'),
+        ('Z_VAL', 'U1'),
+        ('FMU_FLG', 'B1'),
+        ('MASK_MAP', 'Dn'),
+        ('FAL_MAP', 'Dn'),
+        ('CYC_CNT', 'U8'),
+        ('TOTF_CNT', 'U4'),
+        ('TOTL_CNT', 'U4'),
+        ('CYC_BASE', 'U8'),
+        ('BIT_BASE', 'U4'),
+        ('COND_CNT', 'U2'),
+        ('LIM_CNT', 'U2'),
+        ('CYC_SIZE', 'U1'),
+        ('PMR_SIZE', 'U1'),
+        ('CHN_SIZE', 'U1'),
+        ('PAT_SIZE', 'U1'),
+        ('BIT_SIZE', 'U1'),
+        ('U1_SIZE', 'U1'),
+        ('U2_SIZE', 'U1'),
+        ('U3_SIZE', 'U1'),
+        ('UTX_SIZE', 'U1'),
+        ('CAP_BGN', 'U2'),
+        ('LIM_INDX', 'kxU2'),
+        ('LIM_SPEC', 'kxU4'),
+        ('COND_LST', 'kxCn'),
+        ('CYCO_CNT', 'U2'),
+        ('CYC_OFST', 'kxUf'),
+        ('PMR_CNT', 'U2'),
+        ('PMR_INDX', 'kxUf'),
+        ('CHN_CNT', 'U2'),
+        ('CHN_NUM', 'kxUf'),
+        ('EXP_CNT', 'U2'),
+        ('EXP_DATA', 'kxU1'),
+        ('CAP_CNT', 'U2'),
+        ('CAP_DATA', 'kxU1'),
+        ('NEW_CNT', 'U2'),
+        ('NEW_DATA', 'kxU1'),
+        ('PAT_CNT', 'U2'),
+        ('PAT_NUM', 'kxUf'),
+        ('BPOS_CNT', 'U2'),
+        ('BIT_POS', 'kxUf'),
+        ('USR1_CNT', 'U2'),
+        ('USR1', 'kxUf'),
+        ('USR2_CNT', 'U2'),
+        ('USR2', 'kxUf'),
+        ('USR3_CNT', 'U2'),
+        ('USR3', 'kxUf'),
+        ('TXT_CNT', 'U2'),
+        ('USER_TXT', 'kxCf')
+    )
+    kx_counts = {'LIM_INDX': 'LIM_CNT', 'LIM_SPEC': 'LIM_CNT', 'COND_LST': 'COND_CNT', 'CYC_OFST': 'CYCO_CNT',
+                 'PMR_INDX': 'PMR_CNT', 'CHN_NUM': 'CHN_CNT', 'EXP_DATA': 'EXP_CNT', 'CAP_DATA': 'CAP_CNT',
+                 'NEW_DATA': 'NEW_CNT', 'PAT_NUM': 'PAT_CNT', 'BIT_POS': 'BPOS_CNT', 'USR1': 'USR1_CNT',
+                 'USR2': 'USR2_CNT', 'USR3': 'USR3_CNT', 'USER_TXT': 'TXT_CNT'}
+    kx_sizes = {'CYC_OFST': 'CYC_SIZE', 'PMR_INDX': 'PMR_SIZE', 'CHN_NUM': 'CHN_SIZE', 'PAT_NUM': 'PAT_SIZE',
+                'BIT_POS': 'BIT_SIZE', 'USR1': 'U1_SIZE', 'USR2': 'U2_SIZE', 'USR3': 'U3_SIZE',
+                'USER_TXT': 'UTX_SIZE'}
+    split_fields = ('CYC_OFST', 'PMR_INDX', 'CHN_NUM', 'EXP_DATA', 'CAP_DATA', 'NEW_DATA', 'PAT_NUM', 'BIT_POS',
+                    'USR1', 'USR2', 'USR3', 'USER_TXT')
+    continued_values = {'MASK_MAP': (), 'FAL_MAP': (), 'LIM_CNT': 0, 'LIM_INDX': (), 'LIM_SPEC': (),
+                        'COND_CNT': 0, 'COND_LST': ()}
+
+    def __init__(self, TEST_NUM, HEAD_NUM, SITE_NUM, TEST_FLG=0, CONT_FLG=0, PSR_REF=0, LOG_TYP="", TEST_TXT="",
+                 ALARM_ID="", PROG_TXT="", RSLT_TXT="", Z_VAL=0, FMU_FLG=0, MASK_MAP=(), FAL_MAP=(), CYC_CNT=0,
+                 TOTF_CNT=None, TOTL_CNT=None, CYC_BASE=0, BIT_BASE=0, CYC_SIZE=4, PMR_SIZE=2, CHN_SIZE=1,
+                 PAT_SIZE=2, BIT_SIZE=4, U1_SIZE=0, U2_SIZE=0, U3_SIZE=0, UTX_SIZE=0, CAP_BGN=0, LIM_INDX=(),
+                 LIM_SPEC=(), COND_LST=(), CYC_OFST=(), PMR_INDX=(), CHN_NUM=(), EXP_DATA=(), CAP_DATA=(),
+                 NEW_DATA=(), PAT_NUM=(), BIT_POS=(), USR1=(), USR2=(), USR3=(), USER_TXT=(), COND_CNT=None,
+                 LIM_CNT=None, CYCO_CNT=None, PMR_CNT=None, CHN_CNT=None, EXP_CNT=None, CAP_CNT=None, NEW_CNT=None,
+                 PAT_CNT=None, BPOS_CNT=None, USR1_CNT=None, USR2_CNT=None, USR3_CNT=None, TXT_CNT=None):
+        self.field_values = locals()
+        self.set_counts()
+        fv = self.field_values
+        if TOTL_CNT is None:
+            fv['TOTL_CNT'] = max(self.kx_count(name) for name in self.split_fields)
+        if TOTF_CNT is None:
+            fv['TOTF_CNT'] = fv['TOTL_CNT']
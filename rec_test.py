@@ -0,0 +1,452 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Records with data collected per test in the test program (REC_TYP 10) and per test execution
+# (REC_TYP 15).
+# Import the classes from recheaders, which loads this module on first use.
+
+
+from .recheaders import Record
+
+
+class TSR(Record):
+    """
+    Function: Contains the test execution and failure counts for one parametric or functional test in
+                the test program. Also contains static information, such as test name. The TSR is
+                related to the Functional Test Record (FTR), the Parametric Test Record (PTR), and the
+                Multiple Parametric Test Record (MPR) by test number, head number, and site
+                number.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (10)
+    REC_SUB         U*1             Record sub-type (30)
+
+    HEAD_NUM        U*1             Test head number
+    SITE_NUM        U*1             Test site number
+    TEST_TYP        C*1             Test type space
+    TEST_NUM        U*4             Test number
+    EXEC_CNT        U*4             Number of test executions               4,294,967,295
+    FAIL_CNT        U*4             Number of test failures                 4,294,967,295
+    ALRM_CNT        U*4             Number of alarmed tests                 4,294,967,295
+    TEST_NAM        C*n             Test name                               length byte = 0
+    SEQ_NAME        C*n             Sequencer (program segment/flow) name   length byte = 0
+    TEST_LBL        C*n             Test label or text                      length byte = 0
+    OPT_FLAG        B*1             Optional data flag See note
+    TEST_TIM        R*4             Average test execution time in seconds  OPT_FLAG bit 2 = 1
+    TEST_MIN        R*4             Lowest test result value                OPT_FLAG bit 0 = 1
+    TEST_MAX        R*4             Highest test result value               OPT_FLAG bit 1 = 1
+    TST_SUMS        R*4             Sum of test result values               OPT_FLAG bit 4 = 1
+    TST_SQRS        R*4             Sum of squares of test result values    OPT_FLAG bit 5 = 1
+    =================================================================================================
+    Notes on Specific Fields:
+    HEAD_NUM        If this TSR contains a summary of the test counts for all test sites, this field must be
+                    set to 255.
+    TEST_TYP        Indicates what type of test this summary data is for. Valid values are:
+                        P = Parametric test
+                        F = Functional test
+                        M = Multiple-result parametric test
+                        space = Unknown
+    EXEC_CNT,
+    FAIL_CNT,
+    ALRM_CNT        Are optional, but are strongly recommended because they are needed to compute
+                    values for complete final summary sheets.
+    OPT_FLAG        Contains the following fields:
+                        bit 0 set = TEST_MIN value is invalid
+                        bit 1 set = TEST_MAX value is invalid
+                        bit 2 set = TEST_TIM value is invalid
+                        bit 3 is reserved for future use and must be 1
+                        bit 4 set = TST_SUMS value is invalid
+                        bit 5 set = TST_SQRS value is invalid
+                        bits 6 - 7 are reserved for future use and must be 1
+                        OPT_FLAG is optional if it is the last field in the record.
+    TST_SUMS,
+    TST_SQRS        Are useful in calculating the mean and standard deviation for a single lot or when
+                    combining test data from multiple STDF files.
+    Frequency:      One for each test executed in the test program.
+                    May optionally be used to identify unexecuted tests.
+    Location:       Anywhere in the data stream after the initial sequence (see page 14) and before the
+                    MRR.
+                    When test data is being generated in real-time, these records will appear after the last
+                    PRR.
+
+    Possible Use:   Final Summary Sheet         Datalog
+                    Merged Summary Sheet        Histogram
+                    Wafer Map                   Functional Histogram
+    """
+    rec_typ = 10
+    rec_sub = 30
+    field_names = (
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1'),
+        ('TEST_TYP', 'C1'),
+        ('TEST_NUM', 'U4'),
+        ('EXEC_CNT', 'U4'),
+        ('FAIL_CNT', 'U4'),
+        ('ALRM_CNT', 'U4'),
+        ('TEST_NAM', 'Cn'),
+        ('SEQ_NAME', 'Cn'),
+        ('TEST_LBL', 'Cn'),
+        ('OPT_FLAG', 'B1'),
+        ('TEST_TIM', 'R4'),
+        ('TEST_MIN', 'R4'),
+        ('TEST_MAX', 'R4'),
+        ('TST_SUMS', 'R4'),
+        ('TST_SQRS', 'R4')
+    )
+
+    def __init__(self, HEAD_NUM, SITE_NUM, TEST_NUM, OPT_FLAG=0x00, TEST_TYP=" ", EXEC_CNT=4294967295,
+                 FAIL_CNT=4294967295, ALRM_CNT=4294967295, TEST_NAM="", SEQ_NAME="", TEST_LBL="",
+                 TEST_TIM=-1, TEST_MIN=-1, TEST_MAX=-1, TST_SUMS=-1, TST_SQRS=-1):
+        self.field_values = locals()
+        # if int(OPT_FLAG) & 1:  # bit 0 is set
+        #     self.field_values["TEST_MIN"] = 0
+        # if int(OPT_FLAG) & (1 << 1):  # bit 1 is set
+        #     self.field_values["TEST_MAX"] = 0
+        # if int(OPT_FLAG) & (1 << 2):  # bit 2 is set
+        #     self.field_values["TEST_TIM"] = 0
+        # if int(OPT_FLAG) & (1 << 4):  # bit 4 is set
+        #     self.field_values["TST_SUMS"] = 0
+        # if int(OPT_FLAG) & (1 << 5):  # bit 5 is set
+        #     self.field_values["TST_SQRS"] = 0
+
+
+class PTR(Record):
+    """
+    Function: Contains the results of a single execution of a parametric test in the test program. The
+            first occurrence of this record also establishes the default values for all semi-static
+            information about the test, such as limits, units, and scaling. The PTR is related to the
+            Test Synopsis Record (TSR) by test number, head number, and site number.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (15)
+    REC_SUB         U*1             Record sub-type (10)
+
+    TEST_NUM        U*4             Test number
+    HEAD_NUM        U*1             Test head number
+    SITE_NUM        U*1             Test site number
+    TEST_FLG        B*1             Test flags (fail, alarm, etc.)
+    PARM_FLG        B*1             Parametric test flags (drift, etc.)
+    RESULT          R*4             Test result                             TEST_FLG bit 1 = 1
+    TEST_TXT        C*n             Test description text or label          length byte = 0
+    ALARM_ID        C*n             Name of alarm                           length byte = 0
+    OPT_FLAG        B*1             Optional data flag See note
+    RES_SCAL        I*1             Test results scaling exponent           OPT_FLAG bit 0 = 1
+    LLM_SCAL        I*1             Low limit scaling exponent              OPT_FLAG bit 4 or 6 = 1
+    HLM_SCAL        I*1             High limit scaling exponent             OPT_FLAG bit 5 or 7 = 1
+    LO_LIMIT        R*4             Low test limit value                    OPT_FLAG bit 4 or 6 = 1
+    HI_LIMIT        R*4             High test limit value                   OPT_FLAG bit 5 or 7 = 1
+    UNITS           C*n             Test units                              length byte = 0
+    C_RESFMT        C*n             ANSI C result format string             length byte = 0
+    C_LLMFMT        C*n             ANSI C low limit format string          length byte = 0
+    C_HLMFMT        C*n             ANSI C high limit format string         length byte = 0
+    LO_SPEC         R*4             Low specification limit value           OPT_FLAG bit 2 = 1
+    HI_SPEC         R*4             High specification limit value          OPT_FLAG bit 3 = 1
+    =================================================================================================
+    Notes on Specific Fields:
+    Default Data    All data following the OPT_FLAG field has a special function in the STDF file. The first
+                    PTR for each test will have these fields filled in. These values will be the default for each
+                    subsequent PTR with the same test number: if a subsequent PTR has a value for one of
+                    these fields, it will be used instead of the default, for that one record only; if the field is
+                    blank, the default will be used. This method replaces use of the PDR in STDF V3.
+                    If the PTR is not associated with a test execution (that is, it contains only default
+                    information), bit 4 of the TEST_FLG field must be set, and the PARM_FLG field must be
+                    zero.
+                    Unless the default is being overridden, the default data fields should be omitted in
+                    order to save space in the file.
+                    Note that RES_SCAL, LLM_SCAL, HLM_SCAL, UNITS, C_RESFMT, C_LLMFMT, and
+                    C_HLMFMT are interdependent. If you are overriding the default value of one, make
+                    sure that you also make appropriate changes to the others in order to keep them
+                    consistent.
+                    For character strings, you can override the default with a null value by setting the
+                    string length to 1 and the string itself to a single binary 0.
+    HEAD_NUM,
+    SITE_NUM        If a test system does not support parallel testing, and does not have a standard way of
+                    identifying its single test site or head, these fields should be set to 1.
+                    When parallel testing, these fields are used to associate individual datalogged results
+                    with a PIR/PRR pair. A PTR belongs to the PIR/PRR pair having the same values for
+                    HEAD_NUM and SITE_NUM.
+
+    Frequency:      One per parametric test execution.
+    Location:       Under normal circumstances, the PTR can appear anywhere in the data stream after
+                    the corresponding Part Information Record (PIR) and before the corresponding Part
+                    Result Record (PRR).
+                    In addition, to facilitate conversion from STDF V3, if the first PTR for a test contains
+                    default information only (no test results), it may appear anywhere after the initial
+                    sequence (see page 14), and before the first corresponding PTR, but need not appear
+                    between a PIR and PRR.
+
+    Possible Use:   Datalog
+                    Histogram
+                    Wafer Map
+    """
+    rec_typ = 15
+    rec_sub = 10
+    field_names = (
+        ('TEST_NUM', 'U4'),
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1'),
+        ('TEST_FLG', 'B1'),
+        ('PARM_FLG', 'B1'),
+        ('RESULT', 'R4'),
+        ('TEST_TXT', 'Cn'),
+        ('ALARM_ID', 'Cn'),
+        ('OPT_FLAG', 'B1'),
+        ('RES_SCAL', 'I1'),
+        ('LLM_SCAL', 'I1'),
+        ('HLM_SCAL', 'I1'),
+        ('LO_LIMIT', 'R4'),
+        ('HI_LIMIT', 'R4'),
+        ('UNITS', 'Cn'),
+        ('C_RESFMT', 'Cn'),
+        ('C_LLMFMT', 'Cn'),
+        ('C_HLMFMT', 'Cn'),
+        ('LO_SPEC', 'R4'),
+        ('HI_SPEC', 'R4')
+    )
+
+    def __init__(self, TEST_NUM, HEAD_NUM, SITE_NUM, TEST_FLG, PARM_FLG, RESULT, TEST_TXT="",
+                 ALARM_ID="", OPT_FLAG=0x00, RES_SCAL=0, LLM_SCAL=0, HLM_SCAL=0, LO_LIMIT=float('-inf'),
+                 HI_LIMIT=float('inf'), UNITS="", C_RESFMT="", C_LLMFMT="", C_HLMFMT="", LO_SPEC=0, HI_SPEC=0):
+        self.field_values = locals()
+
+
+class MPR(Record):
+    """
+    Function: Contains the results of a single execution of a parametric test in the test program
+                where that test returns multiple values. The first occurrence of this record also
+                establishes the default values for all semi-static information about the test, such as
+                limits, units, and scaling. The MPR is related to the Test Synopsis Record (TSR) by test
+                number, head number, and site number
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (15)
+    REC_SUB         U*1             Record sub-type (15)
+
+    TEST_NUM        U*4             Test number
+    HEAD_NUM        U*1             Test head number
+    SITE_NUM        U*1             Test site number
+    TEST_FLG        B*1             Test flags (fail, alarm, etc.)
+    PARM_FLG        B*1             Parametric test flags (drift, etc.)
+    RTN_ICNT        U*2             Count (j) of PMR indexes See note
+    RSLT_CNT        U*2             Count (k) of returned results See note
+    RTN_STAT        jxN*1           Array of returned states                RTN_ICNT = 0
+    RTN_RSLT        kxR*4           Array of returned results               RSLT_CNT = 0
+    TEST_TXT        C*n             Descriptive text or label               length byte = 0
+    ALARM_ID        C*n             Name of alarm length byte = 0
+    OPT_FLAG        B*1             Optional data flag See note
+    RES_SCAL        I*1             Test result scaling exponent            OPT_FLAG bit 0 = 1
+    LLM_SCAL        I*1             Test low limit scaling exponent         OPT_FLAG bit 4 or 6 = 1
+    HLM_SCAL        I*1             Test high limit scaling exponent        OPT_FLAG bit 5 or 7 = 1
+    LO_LIMIT        R*4             Test low limit value                    OPT_FLAG bit 4 or 6 = 1
+    HI_LIMIT        R*4             Test high limit value                   OPT_FLAG bit 5 or 7 = 1
+    START_IN        R*4             Starting input value (condition)        OPT_FLAG bit 1 = 1
+    INCR_IN         R*4             Increment of input condition            OPT_FLAG bit 1 = 1
+    RTN_INDX        jxU*2           Array of PMR indexes                    RTN_ICNT = 0
+    UNITS           C*n             Units of returned results               length byte = 0
+    UNITS_IN        C*n             Input condition units                   length byte = 0
+    C_RESFMT        C*n             ANSI C result format string             length byte = 0
+    C_LLMFMT        C*n             ANSI C low limit format string          length byte = 0
+    C_HLMFMT        C*n             ANSI C high limit format string         length byte = 0
+    LO_SPEC         R*4             Low specification limit value           OPT_FLAG bit 2 = 1
+    HI_SPEC         R*4             High specification limit value          OPT_FLAG bit 3 = 1
+    =================================================================================================
+    Notes on Specific Fields:
+    Default         Data All data beginning with the OPT_FLAG field has a special function in the STDF file. The
+                    first MPR for each test will have these fields filled in. These values will be the default
+                    for each subsequent MPR with the same test number: if a subsequent MPR has a value
+                    for one of these fields, it will be used instead of the default, for that one record only; if
+                    the field is blank, the default will be used.
+                    If the MPR is not associated with a test execution (that is, it contains only default
+                    information), bit 4 of the TEST_FLG field must be set, and the PARM_FLG field must be
+                    zero.
+                    Unless the default is being overridden, the default data fields should be omitted in
+                    order to save space in the file.
+                    Note that RES_SCAL, LLM_SCAL, HLM_SCAL, UNITS, C_RESFMT, C_LLMFMT, and
+                    C_HLMFMT are interdependent. If you are overriding the default value of one, make
+                    sure that you also make appropriate changes to the others in order to keep them
+                    consistent.
+                    For character strings, you can override the default with a null value by setting the
+                    string length to 1 and the string itself to a single binary 0.
+    TEST_NUM        The test number does not implicitly increment for successive values in the result array.
+    HEAD_NUM,
+    SITE_NUM        If a test system does not support parallel testing, and does not have a standard way of
+                    identifying its single test site or head, these fields should be set to 1.
+                    When parallel testing, these fields are used to associate individual datalogged results
+                    with a PIR/PRR pair. A PTR belongs to the PIR/PRR pair having the same values for
+                    HEAD_NUM and SITE_NUM.
+
+    Frequency:      One per multiple-result parametric test execution.
+    Location:       Anywhere in the data stream after the corresponding Part Information Record (PIR)
+                    and before the corresponding Part Result Record (PRR).
+
+    Possible Use:   Datalog             Shmoo Plot
+    """
+    rec_typ = 15
+    rec_sub = 15
+    field_names = (
+        ('TEST_NUM', 'U4'),
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1'),
+        ('TEST_FLG', 'B1'),
+        ('PARM_FLG', 'B1'),
+        ('RTN_ICNT', 'U2'),
+        ('RSLT_CNT', 'U2'),
+        ('RTN_STAT', 'kxN1'),
+        ('RTN_RSLT', 'kxR4'),
+        ('TEST_TXT', 'Cn'),
+        ('ALARM_ID', 'Cn'),
+        ('OPT_FLAG', 'B1'),
+        ('RES_SCAL', 'I1'),
+        ('LLM_SCAL', 'I1'),
+        ('HLM_SCAL', 'I1'),
+        ('LO_LIMIT', 'R4'),
+        ('HI_LIMIT', 'R4'),
+        ('START_IN', 'R4'),
+        ('INCR_IN', 'R4'),
+        ('RTN_INDX', 'kxU2'),
+        ('UNITS', 'Cn'),
+        ('UNITS_IN', 'Cn'),
+        ('C_RESFMT', 'Cn'),
+        ('C_LLMFMT', 'Cn'),
+        ('C_HLMFMT', 'Cn'),
+        ('LO_SPEC', 'R4'),
+        ('HI_SPEC', 'R4')
+    )
+    kx_counts = {'RTN_STAT': 'RTN_ICNT', 'RTN_RSLT': 'RSLT_CNT', 'RTN_INDX': 'RTN_ICNT'}
+    split_fields = ('RTN_STAT', 'RTN_RSLT', 'RTN_INDX')  # too many pins: several MPRs for the same test
+
+    def __init__(self, TEST_NUM, HEAD_NUM, SITE_NUM, TEST_FLG, PARM_FLG, RTN_ICNT, RSLT_CNT,
+                 RTN_STAT=0, RTN_RSLT=0, TEST_TXT="", ALARM_ID="", OPT_FLAG=0x00, RES_SCAL=0,
+                 LLM_SCAL=0, HLM_SCAL=0, LO_LIMIT=float('-inf'), HI_LIMIT=float('inf'), START_IN=0,
+                 INCR_IN=0, RTN_INDX=0, UNITS="", UNITS_IN="", C_RESFMT="", C_LLMFMT="", C_HLMFMT="",
+                 LO_SPEC=float('-inf'), HI_SPEC=float('inf')):
+        self.field_values = locals()
+
+
+class FTR(Record):
+    """
+    Function: Contains the results of the single execution of a functional test in the test program. The
+                first occurrence of this record also establishes the default values for all semi-static
+                information about the test. The FTR is related to the Test Synopsis Record (TSR) by test
+                number, head number, and site number.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (15)
+    REC_SUB         U*1             Record sub-type (20)
+
+    TEST_NUM        U*4             Test number
+    HEAD_NUM        U*1             Test head number
+    SITE_NUM        U*1             Test site number
+    TEST_FLG        B*1             Test flags (fail, alarm, etc.)
+    OPT_FLAG        B*1             Optional data flag See note
+    CYCL_CNT        U*4             Cycle count of vector                   OPT_FLAG bit 0 = 1
+    REL_VADR        U*4             Relative vector address                 OPT_FLAG bit 1 = 1
+    REPT_CNT        U*4             Repeat count of vector                  OPT_FLAG bit 2 = 1
+    NUM_FAIL        U*4             Number of pins with 1 or more failures  OPT_FLAG bit 3 = 1
+    XFAIL_AD        I*4             X logical device failure address        OPT_FLAG bit 4 = 1
+    YFAIL_AD        I*4             Y logical device failure address        OPT_FLAG bit 4 = 1
+    VECT_OFF        I*2             Offset from vector of interest O        PT_FLAG bit 5 = 1
+    RTN_ICNT        U*2             Count (j) of return data PMR indexes See note
+    PGM_ICNT        U*2             Count (k) of programmed state indexes See note
+    RTN_INDX        jxU*2           Array of return data PMR indexes        RTN_ICNT = 0
+    RTN_STAT        jxN*1           Array of returned states                RTN_ICNT = 0
+    PGM_INDX        kxU*2           Array of programmed state indexes       PGM_ICNT = 0
+    PGM_STAT        kxN*1           Array of programmed states              PGM_ICNT = 0
+    FAIL_PIN        D*n             Failing pin bitfield                    length bytes = 0
+    VECT_NAM        C*n             Vector module pattern name              length byte = 0
+    TIME_SET        C*n             Time set name                           length byte = 0
+    OP_CODE         C*n             Vector Op Code                          length byte = 0
+    TEST_TXT        C*n             Descriptive text or label               length byte = 0
+    ALARM_ID        C*n             Name of alarm                           length byte = 0
+    PROG_TXT        C*n             Additional programmed information       length byte = 0
+    RSLT_TXT        C*n             Additional result information           length byte = 0
+    PATG_NUM        U*1             Pattern generator number                255
+    SPIN_MAP        D*n             Bit map of enabled comparators          length byte = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    Default Data        All data starting with the PATG_NUM field has a special function in the STDF file. The
+                        first FTR for each test will have these fields filled in. These values will be the default
+                        for each subsequent FTR with the same test number. If a subsequent FTR has a value
+                        for one of these fields, it will be used instead of the default, for that one record only. If
+                        the field is blank, the default will be used. Thismethod replaces use of the FDR in STDF
+                        V3.
+                        Unless the default is being overridden, the default data fields should be omitted in
+                        order to save space in the file.
+    HEAD_NUM,
+    SITE_NUM
+                    If a test system does not support parallel testing, and does not have a standard way of
+                    identifying its single test site or head, these fields should be set to 1.
+                    When parallel testing, these fields are used to associate individual datalogged results
+                    with a PIR/PRR pair. An FTR belongs to the PIR/PRR pair having the same values for
+                    HEAD_NUM and SITE_NUM.
+
+    Frequency:      One or more for each execution of a functional test.
+    Location:       Anywhere in the data stream after the corresponding Part Information Record (PIR)
+                    and before the corresponding Part Result Record (PRR).
+
+    Possible Use:   Datalog Functional      Histogram
+                    Functional Failure Analyzer
+    """
+    rec_typ = 15
+    rec_sub = 20
+    field_names = (
+        ('TEST_NUM', 'U4'),
+        ('HEAD_NUM', 'U1'),
+        ('SITE_NUM', 'U1'),
+        ('TEST_FLG', 'B1'),
+        ('OPT_FLAG', 'B1'),
+        ('CYCL_CNT', 'U4'),
+        ('REL_VADR', 'U4'),
+        ('REPT_CNT', 'U4'),
+        ('NUM_FAIL', 'U4'),
+        ('XFAIL_AD', 'I4'),
+        ('YFAIL_AD', 'I4'),
+        ('VECT_OFF', 'I2'),
+        ('RTN_ICNT', 'U2'),
+        ('PGM_ICNT', 'U2'),
+        ('RTN_INDX', 'kxU2'),
+        ('RTN_STAT', 'kxN1'),
+        ('PGM_INDX', 'kxU2'),
+        ('PGM_STAT', 'kxN1'),
+        ('FAIL_PIN', 'Dn'),
+        ('VECT_NAM', 'Cn'),
+        ('TIME_SET', 'Cn'),
+        ('OP_CODE', 'Cn'),
+        ('TEST_TXT', 'Cn'),
+        ('ALARM_ID', 'Cn'),
+        ('PROG_TXT', 'Cn'),
+        ('RSLT_TXT', 'Cn'),
+        ('PATG_NUM', 'U1'),
+        ('SPIN_MAP', 'Dn')
+    )
+    kx_counts = {'RTN_INDX': 'RTN_ICNT', 'RTN_STAT': 'RTN_ICNT', 'PGM_INDX': 'PGM_ICNT', 'PGM_STAT': 'PGM_ICNT'}
+    split_fields = ('RTN_INDX', 'RTN_STAT', 'PGM_INDX', 'PGM_STAT')  # too many pins: several FTRs
+    continued_values = {'FAIL_PIN': "", 'SPIN_MAP': ""}
+
+    def __init__(self, TEST_NUM, HEAD_NUM, SITE_NUM, TEST_FLG, RTN_INDX, RTN_STAT, PGM_INDX, PGM_STAT,
+                 OPT_FLAG=0x00, CYCL_CNT=0, REL_VADR=0, REPT_CNT=0, NUM_FAIL=0, XFAIL_AD=0, YFAIL_AD=0,
+                 VECT_OFF=0, RTN_ICNT=0, PGM_ICNT=0, FAIL_PIN="", VECT_NAM="", TIME_SET="", OP_CODE="",
+                 TEST_TXT="", ALARM_ID="", PROG_TXT="", RSLT_TXT="", PATG_NUM=255, SPIN_MAP=""):
+        self.field_values = locals()
@@ -0,0 +1,204 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Records with data collected per wafer (REC_TYP 2).
+# Import the classes from recheaders, which loads this module on first use.
+
+
+from .recheaders import Record
+
+
+class WIR(Record):
+    """
+    Function: Acts mainly as a marker to indicate where testing of a particular wafer begins for each
+            wafer tested by the job plan. The WIR and the Wafer Results Record (WRR) bracket all
+            the stored information pertaining to one tested wafer. This record is used only when
+            testing at wafer probe. A WIR/WRR pair will have the same HEAD_NUM and SITE_GRP
+            values
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (2)
+    REC_SUB         U*1             Record sub-type (10)
+
+    HEAD_NUM        U*1             Test head number
+    SITE_GRP        U*1             Site group number                       255
+    START_T         U*4             Date and time first part tested
+    WAFER_ID        C*n             Wafer ID                                length byte = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    SITE_GRP        Refers to the site group in the SDR. This is ameans of relating the wafer information
+                    to the configuration of the equipment used to test it. If this information is not known,
+                    or the tester does not support the concept of site groups, this field should be set to 255.
+    WAFER_ID        Is optional, but is strongly recommended in order to make the resultant data files as
+                    useful as possible.
+    Frequency:      One per wafer tested.
+    Location:       Anywhere in the data stream after the initial sequence (see page 14) and before the
+                    MRR.Sent before testing each wafer.
+
+    Possible Use:   Wafer Summary Sheet         Datalog
+                    Wafer Map
+    """
+    rec_typ = 2
+    rec_sub = 10
+    field_names = (
+        ('HEAD_NUM', 'U1'),
+        ('SITE_GRP', 'U1'),
+        ('START_T', 'U4'),
+        ('WAFER_ID', 'Cn')
+    )
+
+    def __init__(self, HEAD_NUM, START_T, SITE_GRP=255, WAFER_ID=""):
+        self.field_values = locals()
+
+
+class WRR(Record):
+    """
+    Function: Contains the result information relating to each wafer tested by the job plan. The WRR
+                and the Wafer Information Record (WIR) bracket all the stored information pertaining
+                to one tested wafer. This record is used only when testing at wafer probe time. A
+                WIR/WRR pair will have the same HEAD_NUM and SITE_GRP values.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (2)
+    REC_SUB         U*1             Record sub-type (20)
+
+    HEAD_NUM        U*1             Test head number
+    SITE_GRP        U*1             Site group number                       255
+    FINISH_T        U*4             Date and time last part tested
+    PART_CNT        U*4             Number of parts tested
+    RTST_CNT        U*4             Number of parts retested                4,294,967,295
+    ABRT_CNT        U*4             Number of aborts during testing         4,294,967,295
+    GOOD_CNT        U*4             Number of good (passed) parts tested    4,294,967,295
+    FUNC_CNT        U*4             Number of functional parts tested       4,294,967,295
+    WAFER_ID        C*n             Wafer ID length byte = 0
+    FABWF_ID        C*n             Fab wafer ID                            length byte = 0
+    FRAME_ID        C*n             Wafer frame ID                          length byte = 0
+    MASK_ID         C*n             Wafer mask ID                           length byte = 0
+    USR_DESC        C*n             Wafer description supplied by user      length byte = 0
+    EXC_DESC        C*n             Wafer description supplied by exec      length byte = 0
+    =================================================================================================
+    Notes on Specific Fields:
+    SITE_GRP        Refers to the site group in the SDR. This is ameans of relating the wafer information
+                    to the configuration of the equipment used to test it. If this information is not known,
+                    or the tester does not support the concept of site groups, this field should be set to 255.
+    WAFER_ID        Is optional, but is strongly recommended in order to make the resultant data files as
+                    useful as possible. A Wafer ID in the WRR supersedes any Wafer ID found in the WIR.
+    FABWF_ID        Is the ID of the wafer when it was in the fabrication process. This facilitates tracking
+                    of wafers and correlation of yield with fabrication variations.
+    FRAME_ID        Facilitates tracking of wafers once the wafer has been through the saw step and the
+                    wafer ID is no longer readable on the wafer itself. This is an important piece of
+                    information for implementing an inkless binning scheme.
+    Frequency:      One per wafer tested.
+    Location:       Anywhere in the data stream after the corresponding WIR.
+                    Sent after testing each wafer.
+
+    Possible Use:   Wafer Summary Sheet         Datalog
+                    Wafer Map
+    """
+    rec_typ = 2
+    rec_sub = 20
+    field_names = (
+        ('HEAD_NUM', 'U1'),
+        ('SITE_GRP', 'U1'),
+        ('FINISH_T', 'U4'),
+        ('PART_CNT', 'U4'),
+        ('RTST_CNT', 'U4'),
+        ('ABRT_CNT', 'U4'),
+        ('GOOD_CNT', 'U4'),
+        ('FUNC_CNT', 'U4'),
+        ('WAFER_ID', 'Cn'),
+        ('FABWF_ID', 'Cn'),
+        ('FRAME_ID', 'Cn'),
+        ('MASK_ID', 'Cn'),
+        ('USR_DESC', 'Cn'),
+        ('EXC_DESC', 'Cn')
+    )
+
+    def __init__(self, HEAD_NUM, FINISH_T, PART_CNT, SITE_GRP=255, RTST_CNT=4294967295, ABRT_CNT=4294967295,
+                 GOOD_CNT=4294967295, FUNC_CNT=4294967295, WAFER_ID="", FABWF_ID="", MASK_ID="", FRAME_ID="",
+                 USR_DESC="", EXC_DESC=""):
+        self.field_values = locals()
+
+
+class WCR(Record):
+    """
+    Function: Contains the configuration information for the wafers tested by the job plan. The
+                WCR provides the dimensions and orientation information for all wafers and dice
+                in the lot. This record is used only when testing at wafer probe time.
+
+    Data Fields:
+    Field Name      Data Type       Field Description                       Missing/Invalid Data Flag
+    =================================================================================================
+    REC_LEN         U*2             Bytes of data following header
+    REC_TYP         U*1             Record type (2)
+    REC_SUB         U*1             Record sub-type (30)
+
+    WAFR_SIZ        R*4             Diameter of wafer in WF_UNITS           0
+    DIE_HT          R*4             Height of die in WF_UNITS               0
+    DIE_WID         R*4             Width of die in WF_UNITS                0
+    WF_UNITS        U*1             Units for wafer and die dimensions      0
+    WF_FLAT         C*1             Orientation of wafer flat               space
+    CENTER_X        I*2             X coordinate of center die on wafer     -32768
+    CENTER_Y        I*2             Y coordinate of center die on wafer     -32768
+    POS_X           C*1             Positive X direction of wafer           space
+    POS_Y           C*1             Positive Y direction of wafer           space
+    =================================================================================================
+    Notes on Specific Fields:
+    WF_UNITS        Has these valid values: 0 = Unknown units
+                        1 = Units are in inches
+                        2 = Units are in centimeters
+                        3 = Units are in millimeters
+                        4 = Units are in mils
+    WF_FLAT         Has these valid values: U = Up
+                        D = Down
+                        L = Left
+                        R = Right
+                        space = Unknown
+    CENTER_X,
+    CENTER_Y        Use the value -32768 to indicate that the field is invalid.
+    POS_X           Has these valid values: L = Left
+                        R = Right
+                        space = Unknown
+    POS_Y           Has these valid values: U = Up
+                        D = Down
+                        space = Unknown
+    Frequency:      One per STDF file (used only if wafer testing).
+    Location:       Anywhere in the data stream after the initial sequence (see page 14), and before the
+                    MRR.
+
+    Possible Use:   Wafer Map
+    """
+    rec_typ = 2
+    rec_sub = 30
+    field_names = (
+        ('WAFR_SIZ', 'R4'),
+        ('DIE_HT', 'R4'),
+        ('DIE_WID', 'R4'),
+        ('WF_UNITS', 'U1'),
+        ('WF_FLAT', 'C1'),
+        ('CENTER_X', 'I2'),
+        ('CENTER_Y', 'I2'),
+        ('POS_X', 'C1'),
+        ('POS_Y', 'C1')
+    )
+    cache_encoding = True
+
+    def __init__(self, WAFR_SIZ=0, DIE_HT=0, DIE_WID=0, WF_UNITS=0, WF_FLAT=" ", CENTER_X=-32768,
+                 CENTER_Y=-32768, POS_X=" ", POS_Y=" "):
+        self.field_values = locals()
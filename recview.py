@@ -0,0 +1,374 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Read-back records whose fields are decoded when they are first looked at.
+#
+#     from stdfwriter.recview import read_views
+#
+#     for ptr in read_views("lot.stdf", types=("PTR",)):
+#         if ptr.SITE_NUM == 3:
+#             results.append(ptr.RESULT)
+#
+# A view keeps the record body (a memoryview of the mmap'ed file, or bytes) and the class of
+# its record type from recheaders, whose field_names, kx_counts, kx_sizes and constructor
+# defaults describe the layout. Nothing is decoded when a view is made. The leading fixed-size
+# fields (TEST_NUM .. RESULT of a PTR) are at the same offset in every record and are unpacked
+# straight from the body on access. The offsets of the fields after them depend on the lengths
+# of the variable fields before: they are found, up to the field asked for, the first time one of
+# those fields is accessed. A decoded field is kept in the view, so it is decoded once.
+#
+# A field past the end of a shorter record (optional fields left out) reads as the default of
+# the record class constructor, None if it has none. Arrays read as lists (N*1 arrays as the bytes
+# of the packed nibbles, as the record classes take them), C*n and S*n as str, B*n and D*n as
+# bytes, V*n as a list of (code, value) pairs without the pad fields. Views of the
+# record types left out of types are not made at all, so scanning for a few record types costs
+# little more than the walk over the record headers.
+
+
+import functools
+import mmap
+import os
+import struct
+
+from . import recheaders
+from .dtcodes import UF_FORMATS, VN_FORMATS, pack_len_map
+from .reader import HEADER, TruncatedRecordError, read_records
+
+
+_FIXED_FORMATS = {"C1": "c", "B1": "B", "N1": "B", "U1": "B", "U2": "H", "U4": "I", "U8": "Q", "I1": "b",
+                  "I2": "h", "I4": "i", "I8": "q", "R4": "f", "R8": "d"}
+_FIXED = {typ: struct.Struct("=" + fmt) for typ, fmt in _FIXED_FORMATS.items()}
+_ARRAY_FORMATS = {"kx" + typ: fmt for typ, fmt in _FIXED_FORMATS.items() if typ != "C1"}
+_U2 = _FIXED["U2"]
+_VN_STRUCTS = {code: struct.Struct("=" + fmt) for code, fmt in VN_FORMATS.items()}
+
+
+def _defaults(cls):
+    code = cls.__init__.__code__
+    values = cls.__init__.__defaults__ or ()
+    params = code.co_varnames[:code.co_argcount]
+    return dict(zip(params[len(params) - len(values):], values))
+
+
+class _Layout:
+    """Field layout of a record class, shared by all views of its records.
+
+    Attributes:
+        names(tuple): field names, in record order
+        types(tuple): their data types
+        index(dict): field name -> position
+        defaults(tuple): value of each field missing from the record
+        counts(tuple): for each kx and V*n field, the name of the field holding its element
+                       count (the kx_counts entry, else the last *_CNT field before it)
+        sizes(tuple): for each kxUf and kxCf field, the name of the field holding its element size
+        static(list): offsets of the fields up to the first one after a variable-length field
+    """
+
+    def __init__(self, cls):
+        fields = cls.field_names or ()
+        defaults = _defaults(cls) if cls.field_names else {}
+        self.names = tuple(name for name, _ in fields)
+        self.types = tuple(typ for _, typ in fields)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.defaults = tuple(defaults.get(name) for name in self.names)
+        counts = []
+        count_field = None
+        for name, typ in fields:
+            counts.append(cls.kx_counts.get(name, count_field) if typ.startswith("kx") or typ == "Vn" else None)
+            if name.endswith("_CNT"):
+                count_field = name
+        self.counts = tuple(counts)
+        self.sizes = tuple(cls.kx_sizes.get(name) for name in self.names)
+        self.static = [0]
+        for typ in self.types:
+            if typ not in pack_len_map:
+                break
+            self.static.append(self.static[-1] + pack_len_map[typ])
+
+
+class _StaticField:
+    """Field at the same offset in every record of its type: unpacked on each access."""
+
+    def __init__(self, name, unpack, offset, end, default):
+        self.__name__ = name
+        self.unpack = unpack
+        self.offset = offset
+        self.end = end
+        self.default = default
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        if len(view.body) < self.end:
+            return self.default
+        return self.unpack(view.body, self.offset)[0]
+
+
+class _LazyField:
+    """Field whose offset depends on the fields before it: decoded once, then kept in the view."""
+
+    def __init__(self, name, position):
+        self.__name__ = name
+        self.position = position
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        values = view._values
+        if values is None:
+            values = view._values = {}
+        elif self.position in values:
+            return values[self.position]
+        value = values[self.position] = view._decode(self.position)
+        return value
+
+
+class RecordView:
+    """Read-back record decoding its fields on first access.
+
+    The fields are attributes named as in the record class (view.SITE_NUM), and can also be looked
+    up as view["SITE_NUM"].
+
+    Attributes:
+        body: the record body, header left out
+        record_class: the recheaders class of the record type (None for an unknown type)
+        rec_typ, rec_sub: REC_TYP and REC_SUB
+        rec_len: length of the body
+        field_values(dict): every field, all decoded
+
+    Methods:
+        to_record: the record as an instance of its record class
+        encode: the record bytes, header included, as read
+        write_record: write the record bytes to a file
+    """
+
+    __slots__ = ("body", "_offsets", "_values")
+    record_class = None
+    rec_typ = 0
+    rec_sub = 0
+    _layout = None
+
+    def __init__(self, body):
+        self.body = body
+        self._offsets = None
+        self._values = None
+
+    @property
+    def rec_len(self):
+        return len(self.body)
+
+    def __getitem__(self, name):
+        if name not in self._layout.index:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __repr__(self):
+        return "<{} of {} bytes>".format(type(self).__name__, len(self.body))
+
+    @property
+    def field_values(self):
+        return {name: getattr(self, name) for name in self._layout.names}
+
+    def to_record(self):
+        rec = self.record_class.__new__(self.record_class)
+        rec.field_values = self.field_values
+        return rec
+
+    def encode(self):
+        return HEADER.pack(len(self.body), self.rec_typ, self.rec_sub) + bytes(self.body)
+
+    def write_record(self, inf):
+        inf.write(self.encode())
+
+    def _offset(self, position):
+        """Offset of a field in the body, None if the record ends before it."""
+        offsets = self._offsets
+        if offsets is None:
+            offsets = self._offsets = list(self._layout.static)
+        end = len(self.body)
+        while len(offsets) <= position:
+            offset = offsets[-1]
+            offsets.append(end if offset >= end else offset + self._size(len(offsets) - 1, offset))
+        offset = offsets[position]
+        return offset if offset < end else None
+
+    def _count(self, position):
+        return int(getattr(self, self._layout.counts[position]))
+
+    def _size(self, position, offset):
+        typ = self._layout.types[position]
+        body = self.body
+        if typ in pack_len_map:
+            return pack_len_map[typ]
+        if typ == "Cn" or typ == "Bn":
+            return 1 + body[offset]
+        if typ == "Sn":
+            return 2 + _U2.unpack_from(body, offset)[0]
+        if typ == "Dn":
+            return 2 + (_U2.unpack_from(body, offset)[0] + 7) // 8
+        if typ == "Vn":
+            return _walk_vn(body, offset, self._count(position))[0] - offset
+        n = self._count(position)
+        if typ == "kxN1":
+            return (n + 1) // 2
+        if typ == "kxCn":
+            return _walk_strings(body, offset, n, 1)[0] - offset
+        if typ == "kxSn":
+            return _walk_strings(body, offset, n, 2)[0] - offset
+        if typ in ("kxUf", "kxCf"):
+            return n * int(getattr(self, self._layout.sizes[position]))
+        return n * pack_len_map[typ[2:]]
+
+    def _decode(self, position):
+        offset = self._offset(position)
+        layout = self._layout
+        if offset is None:
+            return layout.defaults[position]
+        typ = layout.types[position]
+        body = self.body
+        if typ in _FIXED:
+            value = _FIXED[typ].unpack_from(body, offset)[0]
+            return value.decode("ascii", "replace") if typ == "C1" else value
+        if typ == "Cn":
+            return bytes(body[offset + 1:offset + 1 + body[offset]]).decode("ascii", "replace")
+        if typ == "Bn":
+            return bytes(body[offset + 1:offset + 1 + body[offset]])
+        if typ == "Sn":
+            return bytes(body[offset + 2:offset + 2 + _U2.unpack_from(body, offset)[0]]).decode("ascii", "replace")
+        if typ == "Dn":
+            return bytes(body[offset + 2:offset + 2 + (_U2.unpack_from(body, offset)[0] + 7) // 8])
+        if typ == "Vn":
+            return _walk_vn(body, offset, self._count(position))[1]
+        n = self._count(position)
+        if typ == "kxN1":
+            return list(body[offset:offset + (n + 1) // 2])
+        if typ == "kxCn":
+            return _walk_strings(body, offset, n, 1)[1]
+        if typ == "kxSn":
+            return _walk_strings(body, offset, n, 2)[1]
+        if typ == "kxCf":
+            size = int(getattr(self, layout.sizes[position]))
+            return [bytes(body[offset + i * size:offset + (i + 1) * size]).decode("ascii", "replace").rstrip(" ")
+                    for i in range(n)]
+        if n <= 0:
+            return []
+        fmt = UF_FORMATS[int(getattr(self, layout.sizes[position]))] if typ == "kxUf" else _ARRAY_FORMATS[typ]
+        return list(struct.unpack_from("={}{}".format(n, fmt), body, offset))
+
+
+def _walk_strings(body, offset, n, len_bytes):
+    """End offset and values of n C*n (len_bytes 1) or S*n (len_bytes 2) strings."""
+    values = []
+    for _ in range(n):
+        length = body[offset] if len_bytes == 1 else _U2.unpack_from(body, offset)[0]
+        offset += len_bytes
+        values.append(bytes(body[offset:offset + length]).decode("ascii", "replace"))
+        offset += length
+    return offset, values
+
+
+def _walk_vn(body, offset, n):
+    """End offset and (code, value) pairs of n V*n fields, pad fields included in n."""
+    items = []
+    for _ in range(n):
+        code = body[offset]
+        offset += 1
+        if code in _VN_STRUCTS:
+            unpack = _VN_STRUCTS[code]
+            items.append((code, unpack.unpack_from(body, offset)[0]))
+            offset += unpack.size
+        elif code == 10 or code == 11:
+            data = bytes(body[offset + 1:offset + 1 + body[offset]])
+            items.append((code, data.decode("ascii", "replace") if code == 10 else data))
+            offset += 1 + len(data)
+        elif code == 12:
+            length = (_U2.unpack_from(body, offset)[0] + 7) // 8
+            items.append((code, bytes(body[offset + 2:offset + 2 + length])))
+            offset += 2 + length
+        elif code != 0:
+            raise ValueError("unknown V*n data type code {}".format(code))
+    return offset, items
+
+
+@functools.lru_cache(maxsize=None)
+def view_class(rec_typ, rec_sub):
+    """RecordView subclass for the records of a type, made on first use."""
+    name = recheaders.record_names.get((rec_typ, rec_sub))
+    cls = getattr(recheaders, name) if name is not None else None
+    attrs = {"__slots__": (), "record_class": cls, "rec_typ": rec_typ, "rec_sub": rec_sub}
+    if cls is None:
+        layout = _Layout(recheaders.Record)
+        name = "Record_{}_{}".format(rec_typ, rec_sub)
+    else:
+        layout = _Layout(cls)
+    attrs["_layout"] = layout
+    static = layout.static
+    for position, (field, typ) in enumerate(zip(layout.names, layout.types)):
+        if position + 1 < len(static) and typ != "C1":
+            attrs[field] = _StaticField(field, _FIXED[typ].unpack_from, static[position], static[position + 1],
+                                        layout.defaults[position])
+        else:
+            attrs[field] = _LazyField(field, position)
+    return type(name + "View", (RecordView,), attrs)
+
+
+def _type_keys(types):
+    keys = set()
+    for typ in types:
+        if isinstance(typ, str):
+            typ = getattr(recheaders, typ)
+        keys.add(typ if isinstance(typ, tuple) else (typ.rec_typ, typ.rec_sub))
+    return keys
+
+
+def read_views(source, types=None):
+    """Yield a RecordView for each record of an STDF file.
+
+    Args:
+        source: file path (read through a mmap, the views hold memoryviews of it), the file
+                contents as a bytes-like object, or a file opened in binary mode
+        types: record types to make views of, as names ("PTR"), classes or (REC_TYP, REC_SUB);
+               the other records are skipped (None: all records)
+
+    Raises:
+        TruncatedRecordError: if the file ends in the middle of a record
+    """
+    keys = _type_keys(types) if types is not None else None
+    if hasattr(source, "read"):
+        for rec_typ, rec_sub, body in read_records(source):
+            if keys is None or (rec_typ, rec_sub) in keys:
+                yield view_class(rec_typ, rec_sub)(body)
+        return
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as inf:
+            if os.fstat(inf.fileno()).st_size == 0:
+                return
+            source = mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ)
+    buf = memoryview(source)
+    size = len(buf)
+    unpack = HEADER.unpack_from
+    classes = {}
+    offset = 0
+    while offset + 4 <= size:
+        rec_len, rec_typ, rec_sub = unpack(buf, offset)
+        end = offset + 4 + rec_len
+        if end > size:
+            raise TruncatedRecordError(offset)
+        if keys is None or (rec_typ, rec_sub) in keys:
+            cls = classes.get((rec_typ, rec_sub))
+            if cls is None:
+                cls = classes[(rec_typ, rec_sub)] = view_class(rec_typ, rec_sub)
+            yield cls(buf[offset + 4:end])
+        offset = end
+    if offset != size:
+        raise TruncatedRecordError(offset)
@@ -0,0 +1,250 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Summary records (TSR, HBR, SBR, PCR) recomputed for an existing STDF file, in parallel.
+#
+#     from stdfwriter import resummarize
+#
+#     summary = resummarize.summarize("lot.stdf", processes=8)    # a SummaryAccumulator
+#     resummarize.rewrite("lot.stdf", "lot_fixed.stdf")           # summaries replaced
+#
+#     python -m stdfwriter.resummarize lot.stdf lot_fixed.stdf -j 8
+#
+# The file is cut into chunks of about chunk_bytes at record boundaries. Finding a boundary only
+# needs the REC_LEN of each record before it, so this process walks the record lengths alone and
+# hands each chunk to the process pool as soon as its end is found; a chunk is not ended between
+# the records of a split MPR or FTR, which are counted once. The workers read their chunk
+# from a mmap of the file and feed the part and test records to a SummaryAccumulator of their
+# own (per test: executions, failures, alarms, and the count, sum, sum of squares, min and max of
+# the PTR results; per bin and site: the part counts). The accumulators come back in file order
+# and are merged into one, which gives the same counts as a single pass over the file; only
+# TST_SUMS and TST_SQRS may differ in the last bits, the sums being added in another order.
+#
+# rewrite() copies the file leaving out its summary records, and puts the recomputed ones just
+# before the MRR (at the end of a file without an MRR). The workers also return the offsets of the
+# summary records and MRR of their chunk, so the copy is a few large writes from the mmap.
+
+
+import argparse
+import concurrent.futures
+import itertools
+import mmap
+import os
+import struct
+import sys
+
+from .reader import HEADER, TruncatedRecordError
+from .summary import SPLIT_MIN_LEN, SummaryAccumulator
+
+
+CHUNK_BYTES = 32 << 20
+
+SUMMARY_KEYS = frozenset([(10, 30), (1, 40), (1, 50), (1, 30)])  # TSR, HBR, SBR, PCR
+
+_COUNTED_KEYS = frozenset([(5, 10), (5, 20), (15, 10), (15, 15), (15, 20)])  # PIR, PRR, PTR, MPR, FTR
+_MRR_KEY = (1, 20)
+_SPLIT_CODES = frozenset([15 | 15 << 8, 15 | 20 << 8])  # MPR, FTR: REC_TYP and REC_SUB as one U2
+
+_REC_LEN = struct.Struct("H")
+_LEN_CODE = struct.Struct("HH")
+
+
+def _map(path):
+    with open(path, "rb") as inf:
+        if os.fstat(inf.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _torn_record(buf, start):
+    """Offset of the record running past the end of the file, searched from start."""
+    offset = start
+    while offset + 4 + _REC_LEN.unpack_from(buf, offset)[0] <= len(buf):
+        offset += 4 + _REC_LEN.unpack_from(buf, offset)[0]
+    return offset
+
+
+def _continued(buf, offset):
+    """Whether the record at offset may be followed by more records of a split MPR or FTR."""
+    length, code = _LEN_CODE.unpack_from(buf, offset)
+    return length >= SPLIT_MIN_LEN and code in _SPLIT_CODES
+
+
+def chunks(buf, chunk_bytes=CHUNK_BYTES):
+    """Yield (start, stop) byte ranges of whole records, each at least chunk_bytes long but the last.
+
+    Raises:
+        TruncatedRecordError: if the file ends in the middle of a record (after the chunks before
+                              it have been yielded)
+    """
+    size = len(buf)
+    rec_len = _REC_LEN.unpack_from
+    start = offset = 0
+    while offset + 4 <= size:
+        limit = min(start + chunk_bytes, size - 3)
+        while offset < limit:  # only the chain of record lengths is walked here
+            last = offset
+            offset += 4 + rec_len(buf, offset)[0]
+        while offset + 4 <= size and _continued(buf, last):  # the records of a split MPR or FTR stay together
+            last = offset
+            offset += 4 + rec_len(buf, offset)[0]
+        if offset > size:
+            raise TruncatedRecordError(_torn_record(buf, start))
+        yield start, offset
+        start = offset
+    if offset != size:
+        raise TruncatedRecordError(offset)
+
+
+def summarize_chunk(path, start, stop):
+    """Summary counts of the records in [start, stop) of a file.
+
+    Returns:
+        (SummaryAccumulator, [(start, end) of each summary record], [offset of each MRR])
+    """
+    acc = SummaryAccumulator()
+    feed = acc.feed
+    unpack = HEADER.unpack_from
+    cuts = []
+    mrrs = []
+    buf = _map(path)
+    try:
+        with memoryview(buf) as view:
+            offset = start
+            while offset < stop:
+                rec_len, rec_typ, rec_sub = unpack(view, offset)
+                end = offset + 4 + rec_len
+                key = (rec_typ, rec_sub)
+                if key in _COUNTED_KEYS:
+                    feed(rec_typ, rec_sub, view[offset + 4:end])
+                elif key in SUMMARY_KEYS:
+                    cuts.append((offset, end))
+                elif key == _MRR_KEY:
+                    mrrs.append(offset)
+                offset = end
+    finally:
+        if not isinstance(buf, bytes):
+            buf.close()
+    acc.mrr_seen = bool(mrrs)
+    return acc, cuts, mrrs
+
+
+def _merge(total, part):
+    # a part opened in an earlier chunk and finished in this one is no longer open
+    total.open_parts -= part.parts.keys() - part.open_parts
+    total.merge(part)
+
+
+def _scan(path, processes, chunk_bytes, mp_context):
+    total = SummaryAccumulator()
+    cuts = []
+    mrrs = []
+    buf = _map(path)
+    try:
+        ranges = chunks(buf, chunk_bytes)
+        first = list(itertools.islice(ranges, 2))
+        if processes == 1 or len(first) < 2:  # no pool for a single chunk
+            results = (summarize_chunk(path, start, stop) for start, stop in itertools.chain(first, ranges))
+            pool = None
+        else:
+            pool = concurrent.futures.ProcessPoolExecutor(processes, mp_context=mp_context)
+            futures = [pool.submit(summarize_chunk, path, start, stop)
+                       for start, stop in itertools.chain(first, ranges)]
+            results = (future.result() for future in futures)
+        try:
+            for acc, chunk_cuts, chunk_mrrs in results:
+                _merge(total, acc)
+                cuts += chunk_cuts
+                mrrs += chunk_mrrs
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    finally:
+        if not isinstance(buf, bytes):
+            buf.close()
+    return total, cuts, mrrs
+
+
+def summarize(path, processes=None, chunk_bytes=CHUNK_BYTES, mp_context=None):
+    """Summary counts of the part and test records of an STDF file.
+
+    Args:
+        path: the STDF file
+        processes: worker processes (None: one per CPU, 1: all in this process)
+        chunk_bytes: bytes of file given to a worker at a time
+        mp_context: multiprocessing context of the pool (None: the default one)
+
+    Returns:
+        SummaryAccumulator of the whole file; its records() are the summary records
+
+    Raises:
+        TruncatedRecordError: if the file ends in the middle of a record
+    """
+    return _scan(path, processes, chunk_bytes, mp_context)[0]
+
+
+def rewrite(path, out_path, per_site=True, processes=None, chunk_bytes=CHUNK_BYTES, mp_context=None):
+    """Copy an STDF file with its summary records replaced by recomputed ones.
+
+    Args:
+        path: the STDF file
+        out_path: the file written, which must not be path
+        per_site: summary records per head and site as well as for all sites
+        processes, chunk_bytes, mp_context: as for summarize()
+
+    Returns:
+        the SummaryAccumulator the summary records were made from
+    """
+    if os.path.exists(out_path) and os.path.samefile(path, out_path):
+        raise ValueError("rewrite() cannot write over the file it reads")
+    summary, cuts, mrrs = _scan(path, processes, chunk_bytes, mp_context)
+    data = b"".join([rec.encode() for rec in summary.records(per_site)])
+    mrr = mrrs[0] if mrrs else None
+    buf = _map(path)
+    try:
+        with memoryview(buf) as view, open(out_path, "wb") as out:
+            kept = 0
+            for start, end in sorted(cuts + ([(mrr, None)] if mrr is not None else []), key=lambda cut: cut[0]):
+                if start > kept:
+                    out.write(view[kept:start])
+                if end is None:  # the MRR: the summary records go before it
+                    out.write(data)
+                    end = start
+                kept = end
+            if kept < len(view):
+                out.write(view[kept:])
+            if mrr is None:
+                out.write(data)
+    finally:
+        if not isinstance(buf, bytes):
+            buf.close()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="recompute the TSR, HBR, SBR and PCR records of an STDF file")
+    parser.add_argument("path", help="STDF file")
+    parser.add_argument("out_path", help="copy of the file with the recomputed summary records")
+    parser.add_argument("-j", "--processes", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_BYTES / 1048576.0, help="MiB per chunk")
+    parser.add_argument("--totals-only", action="store_true", help="no per-site summary records")
+    args = parser.parse_args(argv)
+    summary = rewrite(args.path, args.out_path, per_site=not args.totals_only, processes=args.processes,
+                      chunk_bytes=int(args.chunk_mb * 1048576))
+    print("{}: {} parts, {} tests".format(args.out_path, sum(counts[0] for counts in summary.parts.values()),
+                                          len({key[2] for key in summary.tests})))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
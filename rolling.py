@@ -0,0 +1,193 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Rolling output: one lot written as several self-contained STDF files.
+#
+#     from stdfwriter.rolling import RollingWriter
+#
+#     with RollingWriter("lot42_{:03d}.stdf", max_bytes=2 << 30, per_wafer=True) as out:
+#         FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+#         ...
+#         MRR(FINISH_T=now).write_record(out)
+#
+# Records are written to the writer as to a single file. A new file is started at a PIR once the
+# current file holds max_bytes or more and no part is open on any site, and (with per_wafer) at
+# every WIR after the first one of a file. Each file is valid on its own:
+#     - it starts with the header records seen so far (FAR, ATR, VUR, MIR, RDR, SDR, PMR, PGR,
+#       PLR, the scan description records and WCR), replayed from their encoded bytes
+#     - a wafer still open when the file ends is closed with a WRR counting the parts of that
+#       file, and its WIR is replayed at the start of the next file
+#     - it ends with summary records (TSR, HBR, SBR, PCR) computed from its own parts and tests,
+#       and an MRR: the caller's MRR for the last file, one with the roll time for the others
+# Summary records written by the caller hold counts for the whole lot and are left out; the
+# caller's WRRs are kept as written.
+
+
+import struct
+import time
+
+from .reader import HEADER
+from .recheaders import MRR, WRR
+from .summary import SummaryAccumulator
+
+
+HEADER_KEYS = frozenset([
+    (0, 10), (0, 20), (0, 30),  # FAR, ATR, VUR
+    (1, 10), (1, 70), (1, 80),  # MIR, RDR, SDR
+    (1, 60), (1, 62), (1, 63),  # PMR, PGR, PLR
+    (1, 90), (1, 91), (1, 92), (1, 93), (1, 94),  # PSR, NMR, CNR, SSR, CDR
+    (2, 30),  # WCR
+])
+SUMMARY_KEYS = frozenset([(10, 30), (1, 40), (1, 50), (1, 30)])  # TSR, HBR, SBR, PCR
+
+_PIR_KEY = (5, 10)
+_PRR_KEY = (5, 20)
+_WIR_KEY = (2, 10)
+_WRR_KEY = (2, 20)
+_MRR_KEY = (1, 20)
+
+_PRR_FLG = struct.Struct("=BBB")  # HEAD_NUM, SITE_NUM, PART_FLG
+
+
+class RollingWriter:
+    """Output splitting a lot into self-contained files by size or wafer.
+
+    Records call write_record(out) with an instance of this class as out.
+
+    Attributes:
+        path_format: file name with one format field for the file number (1, 2, ...),
+                     e.g. "lot42_{:03d}.stdf"
+        max_bytes: start a new file at the next part boundary once a file holds this many bytes
+                   (None: no size limit)
+        per_wafer: start a new file at every WIR after the first one of a file
+        per_site: summary records per head and site as well as for all sites
+        files(list): paths of the files written so far, the current one last
+        size: bytes in the current file
+        summary: SummaryAccumulator of the current file
+
+    Methods:
+        write: take the bytes of whole or partial records
+        roll: finish the current file and start the next one
+        flush: flush the current file
+        close: finish the last file
+    """
+
+    def __init__(self, path_format, max_bytes=None, per_wafer=False, per_site=True):
+        self.path_format = path_format
+        self.max_bytes = max_bytes
+        self.per_wafer = per_wafer
+        self.per_site = per_site
+        self.files = []
+        self.size = 0
+        self.summary = SummaryAccumulator()
+        self._out = None
+        self._headers = []  # encoded header records, in stream order
+        self._wafers = {}  # head: [encoded WIR, WAFER_ID, PART_CNT, RTST_CNT, ABRT_CNT, GOOD_CNT] of open wafers
+        self._wafer_seen = False
+        self._pending = b""
+        self._open()
+
+    def _open(self):
+        path = self.path_format.format(len(self.files) + 1)
+        self._out = open(path, "wb")
+        self.files.append(path)
+        self.size = 0
+        self.summary = SummaryAccumulator()
+        self._wafer_seen = False
+        for rec in self._headers:
+            self._emit(rec)
+        for wafer in self._wafers.values():
+            self._emit(wafer[0])
+            wafer[2:] = [0, 0, 0, 0]
+
+    def _emit(self, rec):
+        self._out.write(rec)
+        self.size += len(rec)
+
+    def _finish(self, mrr=None):
+        now = int(time.time())
+        for head, wafer in sorted(self._wafers.items()):
+            self._emit(WRR(HEAD_NUM=head, FINISH_T=now, PART_CNT=wafer[2], RTST_CNT=wafer[3], ABRT_CNT=wafer[4],
+                           GOOD_CNT=wafer[5], WAFER_ID=wafer[1]).encode())
+        for rec in self.summary.records(self.per_site):
+            self._emit(rec.encode())
+        self._emit(mrr if mrr is not None else MRR(FINISH_T=now).encode())
+        self._out.close()
+        self._out = None
+
+    def roll(self):
+        """Finish the current file (closing open wafers, summary records, MRR) and start the next one."""
+        self._finish()
+        self._open()
+
+    def write(self, data):
+        buf = memoryview(self._pending + data if self._pending else data)
+        size = len(buf)
+        offset = 0
+        while offset + 4 <= size:
+            rec_len, rec_typ, rec_sub = HEADER.unpack_from(buf, offset)
+            end = offset + 4 + rec_len
+            if end > size:
+                break
+            self._record((rec_typ, rec_sub), buf[offset:end])
+            offset = end
+        self._pending = bytes(buf[offset:])
+        return len(data)
+
+    def _record(self, key, rec):
+        if self._out is None:
+            raise ValueError("record written after the MRR")
+        body = rec[4:]
+        if key in HEADER_KEYS:
+            self._headers.append(bytes(rec))
+        elif key in SUMMARY_KEYS:
+            return
+        elif key == _MRR_KEY:
+            self._finish(bytes(rec))
+            return
+        elif key == _PIR_KEY:
+            if self.max_bytes is not None and self.size >= self.max_bytes and not self.summary.open_parts:
+                self.roll()
+        elif key == _WIR_KEY and len(body) >= 1:
+            if self.per_wafer and self._wafer_seen and not self.summary.open_parts:
+                self.roll()
+            self._wafer_seen = True
+            wafer_id = bytes(body[7:7 + body[6]]).decode("ascii", "replace") if len(body) > 6 else ""
+            self._wafers[body[0]] = [bytes(rec), wafer_id, 0, 0, 0, 0]
+        elif key == _WRR_KEY and len(body) >= 1:
+            self._wafers.pop(body[0], None)
+        elif key == _PRR_KEY and len(body) >= _PRR_FLG.size:
+            head, _, part_flg = _PRR_FLG.unpack_from(body)
+            wafer = self._wafers.get(head)
+            if wafer is not None:
+                wafer[2] += 1
+                wafer[3] += bool(part_flg & 0x03)
+                wafer[4] += bool(part_flg & 0x04)
+                wafer[5] += not part_flg & 0x18
+        self.summary.feed(key[0], key[1], body)
+        self._emit(rec)
+
+    def flush(self):
+        if self._out is not None:
+            self._out.flush()
+
+    def close(self):
+        """Finish the last file; an MRR is added if the caller did not write one."""
+        if self._out is not None:
+            self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
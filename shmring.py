@@ -0,0 +1,295 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Shared-memory ring buffer carrying encoded records from several processes to one writer.
+#
+#     import multiprocessing
+#     from stdfwriter.shmring import RecordRing
+#
+#     def test_site(ring, site):
+#         with ring.producer() as out:
+#             PIR(HEAD_NUM=1, SITE_NUM=site).write_record(out)
+#             ...
+#             out.flush()                     # at the end of each part
+#
+#     ring = RecordRing(size=1 << 24, producers=4)
+#     workers = [multiprocessing.Process(target=test_site, args=(ring, site)) for site in range(4)]
+#     for worker in workers:
+#         worker.start()
+#     with open("lot.stdf", "wb") as out:
+#         FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+#         ...
+#         ring.run(out)                        # until every producer has closed
+#         MRR(FINISH_T=now).write_record(out)
+#     ring.close()
+#
+# Records are never pickled: a producer copies the bytes the record encoders return straight into
+# a slot of the shared memory, and the writer hands memoryviews of the ready slots to out.write().
+# The ring is passed to the worker processes as a Process argument (it carries the shared memory
+# name and the locks), and must be made before the workers are started.
+#
+# A producer reserves a slot of batch_bytes and fills it with the records written to it until the
+# next one does not fit, or flush() is called; the slot is then marked ready. Slots are written
+# out in the order they were reserved, so the records of one producer keep their order and those
+# of several producers are interleaved a slot at a time. A slot being filled holds back the slots
+# reserved after it: a producer that goes idle should flush first (at PRR, say). With
+# batch_bytes 0 each write() is a slot of its own.
+#
+# Shared memory layout, all positions byte counts since the ring was made:
+#     control  =QQI    head (next reservation), tail (next slot to write out), closed producers
+#     data             slots, each SLOT_ALIGN aligned: =III4x span, used bytes, state; the data
+# A slot that would run past the end of the ring is preceded by a padding slot up to the end,
+# published before waiting for room at the start (an empty ring just moves to its start).
+# The control fields and slot states are only read and changed holding the ring's lock, which
+# also orders the copies into a slot before the writer reading them; the copies themselves and
+# the writes to the output are done without it.
+
+
+import multiprocessing
+import struct
+from multiprocessing import shared_memory
+
+
+SLOT_ALIGN = 16
+
+_CONTROL = struct.Struct("=QQI")
+_SLOT = struct.Struct("=III4x")
+_DATA = 64  # start of the slots
+
+_RESERVED, _READY, _PAD = range(3)
+
+
+def _aligned(size):
+    return -(-size // SLOT_ALIGN) * SLOT_ALIGN
+
+
+class RecordRing:
+    """Ring buffer in shared memory between producer processes and one writer.
+
+    Attributes:
+        name: name of the shared memory block
+        size: bytes of the ring, slot headers included
+        producers: number of producers run() waits for
+        mp_context: multiprocessing context the locks are made with (None: the default one), None
+                    in the worker processes
+
+    Methods:
+        producer: a file-like object writing records into the ring
+        drain: write the slots ready so far to an output
+        run: write everything to an output until every producer has closed
+        close: release the shared memory (and remove it, in the process that made it)
+    """
+
+    def __init__(self, size=1 << 24, producers=1, mp_context=None):
+        self.mp_context = mp_context
+        ctx = mp_context or multiprocessing.get_context()
+        self.size = _aligned(size)
+        self.producers = producers
+        self._shm = shared_memory.SharedMemory(create=True, size=_DATA + self.size)
+        self._owner = True
+        self._lock = ctx.RLock()
+        self._not_empty = ctx.Condition(self._lock)
+        self._not_full = ctx.Condition(self._lock)
+        self._buf = self._shm.buf
+        _CONTROL.pack_into(self._buf, 0, 0, 0, 0)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __getstate__(self):
+        return (self._shm.name, self.size, self.producers, self._lock, self._not_empty, self._not_full)
+
+    def __setstate__(self, state):
+        name, self.size, self.producers, self._lock, self._not_empty, self._not_full = state
+        self._shm = shared_memory.SharedMemory(name=name)
+        self.mp_context = None
+        self._owner = False
+        self._buf = self._shm.buf
+
+    def producer(self, batch_bytes=1 << 16):
+        """File-like object for write_record(), filling slots of batch_bytes (0: a slot per write)."""
+        return RingProducer(self, batch_bytes)
+
+    def _reserve(self, size):
+        """Reserve a slot for size bytes; returns the offset of its data in the shared memory."""
+        need = _SLOT.size + _aligned(size)
+        if need > self.size:
+            raise ValueError("{} bytes do not fit in a ring of {} bytes".format(size, self.size))
+        buf = self._buf
+        with self._lock:
+            while True:
+                head, tail, closed = _CONTROL.unpack_from(buf)
+                offset = head % self.size
+                if offset + need > self.size:
+                    # pad up to the end of the ring as soon as that much is free, so the writer can
+                    # pass the padding and free the start of the ring for the slot
+                    skip = self.size - offset
+                    if head == tail:  # empty: start the slot at the beginning of the ring
+                        _CONTROL.pack_into(buf, 0, head + skip, tail + skip, closed)
+                        continue
+                    if head + skip - tail <= self.size:
+                        _SLOT.pack_into(buf, _DATA + offset, skip, 0, _PAD)
+                        _CONTROL.pack_into(buf, 0, head + skip, tail, closed)
+                        self._not_empty.notify()
+                        continue
+                elif head + need - tail <= self.size:
+                    break
+                self._not_full.wait()
+            _SLOT.pack_into(buf, _DATA + offset, need, 0, _RESERVED)
+            _CONTROL.pack_into(buf, 0, head + need, tail, closed)
+        return _DATA + offset + _SLOT.size
+
+    def _commit(self, start, used):
+        with self._lock:
+            span = _SLOT.unpack_from(self._buf, start - _SLOT.size)[0]
+            _SLOT.pack_into(self._buf, start - _SLOT.size, span, used, _READY)
+            self._not_empty.notify()
+
+    def _producer_closed(self):
+        with self._lock:
+            head, tail, closed = _CONTROL.unpack_from(self._buf)
+            _CONTROL.pack_into(self._buf, 0, head, tail, closed + 1)
+            self._not_empty.notify()
+
+    def _take(self, timeout):
+        """Extents (start, stop) of the ready slots at the tail, the tail after them, and whether
+        every producer has closed with nothing left to write."""
+        buf = self._buf
+        with self._lock:
+            while True:
+                head, tail, closed = _CONTROL.unpack_from(buf)
+                extents = []
+                end = tail
+                while end < head:
+                    offset = _DATA + end % self.size
+                    span, used, state = _SLOT.unpack_from(buf, offset)
+                    if state == _RESERVED:
+                        break
+                    if used:
+                        extents.append((offset + _SLOT.size, offset + _SLOT.size + used))
+                    end += span
+                done = end == head and closed >= self.producers
+                if end > tail or done or timeout == 0:
+                    return extents, end, done
+                if not self._not_empty.wait(timeout):
+                    timeout = 0
+
+    def drain(self, out, timeout=None):
+        """Write the slots ready at the tail to out, waiting up to timeout seconds for one.
+
+        out.write() is given memoryviews of the shared memory, released when it returns: it must
+        have written or copied the bytes by then (files, DurableWriter and DirectSink do; a
+        VectoredSink does not).
+
+        Returns:
+            bytes written, 0 on timeout or once every producer has closed
+        """
+        return self._drain(out, timeout)[0]
+
+    def _drain(self, out, timeout):
+        extents, end, done = self._take(timeout)
+        written = 0
+        for start, stop in extents:
+            with self._buf[start:stop] as chunk:
+                out.write(chunk)
+            written += stop - start
+        with self._lock:
+            head, tail, closed = _CONTROL.unpack_from(self._buf)
+            if end > tail:
+                _CONTROL.pack_into(self._buf, 0, head, end, closed)
+                self._not_full.notify_all()
+        return written, done
+
+    def run(self, out):
+        """Write to out until every producer has closed and the ring is empty; returns the bytes written."""
+        written = 0
+        done = False
+        while not done:
+            count, done = self._drain(out, None)
+            written += count
+        return written
+
+    def close(self):
+        """Release the shared memory; the process that made the ring also removes it."""
+        if self._buf is None:
+            return
+        self._buf.release()
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RingProducer:
+    """Output writing records into slots of a RecordRing.
+
+    Records call write_record(out) with an instance of this class as out; each write() must hold
+    whole records.
+
+    Attributes:
+        ring: the RecordRing
+        batch_bytes: size of the slots reserved (0: a slot per write)
+
+    Methods:
+        write: copy bytes into the current slot
+        flush: mark the current slot ready for the writer
+        close: flush, and tell the writer this producer is done
+    """
+
+    def __init__(self, ring, batch_bytes=1 << 16):
+        self.ring = ring
+        self.batch_bytes = batch_bytes
+        self._start = None  # data offset of the slot being filled
+        self._used = 0
+        self._room = 0
+
+    def write(self, data):
+        if not isinstance(data, bytes):
+            data = memoryview(data).cast("B")
+        size = len(data)
+        if self._start is not None and self._used + size > self._room:
+            self.flush()
+        if self._start is None:
+            self._room = max(min(self.batch_bytes, self.ring.size - _SLOT.size), size)
+            self._start = self.ring._reserve(self._room)
+        start = self._start + self._used
+        self.ring._buf[start:start + size] = data
+        self._used += size
+        if self._used >= self._room:
+            self.flush()
+        return size
+
+    def flush(self):
+        if self._start is not None:
+            self.ring._commit(self._start, self._used)
+            self._start = None
+            self._used = 0
+
+    def close(self):
+        if self.ring is not None:
+            self.flush()
+            self.ring._producer_closed()
+            self.ring = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,280 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Output sinks for writing records to pipes, sockets and files bypassing the page cache.
+#
+# VectoredSink keeps the buffers handed to write() in a list and sends them with one os.writev
+# (or socket.sendmsg) call per batch, so large buffers are never copied into a joined one and
+# records are not written with one system call each. The output does not need to be seekable:
+#
+#     import socket
+#     from stdfwriter.sinks import VectoredSink
+#
+#     sock = socket.socket(socket.AF_UNIX)
+#     sock.connect("/run/collector.sock")
+#     with VectoredSink(sock) as out:
+#         FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+#         ...
+#
+# The sink holds on to the objects passed to write() until they are sent; they must not be
+# changed in the meantime (record encoders pass immutable bytes).
+#
+# DirectSink writes a file with O_DIRECT, so a long sequential datalog does not fill the page cache
+# and push out what other processes have cached there:
+#
+#     with DirectSink("lot.stdf") as out:
+#         FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+#         ...
+#
+# O_DIRECT needs the memory, the file offset and the length of every write to be aligned, so
+# records are copied into a page-aligned buffer (an anonymous mmap) and written block_bytes at a
+# time. The last block is padded to the alignment and the file is then truncated to its real size.
+# Where O_DIRECT is not available (macOS uses F_NOCACHE instead, Windows has neither) or the file
+# system refuses it, the file is written normally and the pages of the blocks written are dropped
+# from the cache with posix_fadvise(POSIX_FADV_DONTNEED) once they have been written back.
+
+
+import mmap
+import os
+import socket
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def _iov_max():
+    try:
+        value = os.sysconf("SC_IOV_MAX")
+    except (AttributeError, ValueError, OSError):
+        return 1024
+    return value if value > 0 else 1024  # -1: no determinate limit
+
+
+IOV_MAX = _iov_max()
+
+
+class VectoredSink:
+    """Output wrapper batching record fragments into scatter-gather writes.
+
+    Fragments shorter than copy_threshold bytes (single encoded records) are appended to a shared
+    bytearray: copying a few dozen bytes costs less than an iovec entry, in Python and in the
+    kernel. Longer fragments, such as the buffers of bulk encoders, become iovec entries of their
+    own and are never copied.
+
+    Attributes:
+        target: a socket, an object with fileno() (file, pipe) or a file descriptor
+        batch_bytes: send once this many bytes are waiting
+        copy_threshold: fragments at least this long are sent without copying
+        bytes_written: bytes sent so far
+        calls: writev/sendmsg calls made so far
+
+    Methods:
+        write: queue bytes, sending the batch when it is full
+        flush: send everything queued
+        close: flush and close the target
+    """
+
+    def __init__(self, target, batch_bytes=1 << 18, copy_threshold=4096):
+        self.target = target
+        self.batch_bytes = batch_bytes
+        self.copy_threshold = copy_threshold
+        self.bytes_written = 0
+        self.calls = 0
+        self._iov = []
+        self._small = bytearray()
+        self._queued = 0
+        if isinstance(target, socket.socket):
+            self._send = target.sendmsg
+        else:
+            fd = target if isinstance(target, int) else target.fileno()
+            if hasattr(os, "writev"):
+                self._send = lambda iov: os.writev(fd, iov)
+            else:  # no writev (Windows): one write per buffer
+                self._send = lambda iov: os.write(fd, iov[0])
+
+    def write(self, data):
+        if not isinstance(data, (bytes, bytearray)):
+            data = memoryview(data).cast("B")  # sizes in bytes, not in items of another format
+        size = len(data)
+        if size < self.copy_threshold:
+            self._small += data
+        else:
+            if self._small:
+                self._iov.append(self._small)
+                self._small = bytearray()
+            self._iov.append(data)
+        self._queued += size
+        if self._queued >= self.batch_bytes:
+            self.flush()
+        return size
+
+    def flush(self):
+        iov = self._iov
+        if self._small:
+            iov.append(self._small)
+            self._small = bytearray()
+        first = 0
+        while first < len(iov):
+            chunk = iov[first:first + IOV_MAX]
+            sent = self._send(chunk)
+            self.calls += 1
+            self.bytes_written += sent
+            if sent == sum(map(len, chunk)):
+                first += len(chunk)
+                continue
+            # skip the buffers sent whole, keep the unsent part of a partially sent one
+            for buf in chunk:
+                if sent < len(buf):
+                    iov[first] = memoryview(buf)[sent:]
+                    break
+                sent -= len(buf)
+                first += 1
+        self._iov = []
+        self._queued = 0
+
+    def close(self):
+        self.flush()
+        if isinstance(self.target, int):
+            os.close(self.target)
+        else:
+            self.target.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+DIRECT_ALIGNMENT = 4096  # logical block size of current disks, and the page size: always enough
+
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+
+def _pwrite(fd, data, offset):
+    if hasattr(os, "pwrite"):
+        return os.pwrite(fd, data, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.write(fd, data)
+
+
+class DirectSink:
+    """Output file written in aligned blocks without going through the page cache.
+
+    Attributes:
+        path: the file, created or truncated
+        block_bytes: bytes per write, a multiple of alignment
+        alignment: alignment of the writes
+        direct: whether the file is written with O_DIRECT (or F_NOCACHE); False when falling back
+                to posix_fadvise
+        size: bytes written to the sink so far
+        writes: write calls made so far
+
+    Methods:
+        write: copy bytes into the block buffer, writing the block when it is full
+        flush: write the full blocks and the partial last one (written again once it fills up)
+        close: write the rest and truncate the file to its size
+    """
+
+    def __init__(self, path, block_bytes=1 << 20, alignment=DIRECT_ALIGNMENT):
+        if block_bytes % alignment:
+            raise ValueError("block_bytes must be a multiple of the alignment {}".format(alignment))
+        self.path = path
+        self.block_bytes = block_bytes
+        self.alignment = alignment
+        self.size = 0
+        self.writes = 0
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+        self.direct = False
+        self._fd = None
+        if hasattr(os, "O_DIRECT"):
+            try:
+                self._fd = os.open(path, flags | os.O_DIRECT, 0o666)
+                self.direct = True
+            except OSError:  # EINVAL: not supported by this file system
+                pass
+        if self._fd is None:
+            self._fd = os.open(path, flags, 0o666)
+            if fcntl is not None and hasattr(fcntl, "F_NOCACHE"):
+                fcntl.fcntl(self._fd, fcntl.F_NOCACHE, 1)
+                self.direct = True
+        self._buf = mmap.mmap(-1, block_bytes)  # page aligned
+        self._view = memoryview(self._buf)
+        self._fill = 0
+        self._offset = 0  # file offset of the block in the buffer
+        self._dropped = 0  # end of the file range already dropped from the page cache
+
+    def _write_block(self, length):
+        view = self._view[:length]
+        written = 0
+        while written < length:
+            written += _pwrite(self._fd, view[written:], self._offset + written)
+            self.writes += 1
+        view.release()
+
+    def _advise(self):
+        if self.direct or not hasattr(os, "posix_fadvise"):
+            return
+        # pages are only dropped once clean: drop the blocks before the one just written, which
+        # have had the time of a block to be written back
+        end = self._offset - self.block_bytes
+        if end > self._dropped:
+            os.posix_fadvise(self._fd, self._dropped, end - self._dropped, os.POSIX_FADV_DONTNEED)
+            self._dropped = end
+
+    def write(self, data):
+        data = memoryview(data).cast("B")
+        size = len(data)
+        pos = 0
+        while pos < size:
+            take = min(size - pos, self.block_bytes - self._fill)
+            self._view[self._fill:self._fill + take] = data[pos:pos + take]
+            self._fill += take
+            pos += take
+            if self._fill == self.block_bytes:
+                self._write_block(self.block_bytes)
+                self._offset += self.block_bytes
+                self._fill = 0
+                self._advise()
+        self.size += size
+        return size
+
+    def flush(self):
+        """Write what the buffer holds, padded, then cut the file back to the bytes written."""
+        if self._fill:
+            padded = -(-self._fill // self.alignment) * self.alignment
+            self._view[self._fill:padded] = bytes(padded - self._fill)
+            self._write_block(padded)
+            os.ftruncate(self._fd, self.size)
+
+    def close(self):
+        if self._fd is None:
+            return
+        try:
+            self.flush()
+            if not self.direct and hasattr(os, "posix_fadvise"):
+                _fdatasync(self._fd)
+                os.posix_fadvise(self._fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+            self._view.release()
+            self._buf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
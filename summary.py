@@ -0,0 +1,324 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Summary records (TSR, HBR, SBR, PCR) accumulated from the part and test records of a file.
+#
+# SummaryAccumulator is fed the records as they are written (or read back) and keeps per head and
+# site counts: parts, hardware and software bins, and per test executions, failures, alarms and
+# the PTR result min/max/sums. records() turns the counts into summary records, per site and
+# for all sites (HEAD_NUM 255). The state can be saved as JSON-friendly data (to_dict/from_dict)
+# and accumulators over parts of a lot can be merged. An MPR or FTR split into several records
+# (too many pins for one record) is counted once.
+
+
+import math
+import struct
+
+from .recheaders import HBR, PCR, REC_LEN_MAX, SBR, TSR
+from .validate import R4_MAX
+
+
+_PIR_KEY = (5, 10)
+_PRR_KEY = (5, 20)
+_PTR_KEY = (15, 10)
+_MPR_KEY = (15, 15)
+_FTR_KEY = (15, 20)
+_MRR_KEY = (1, 20)
+_TEST_TYPES = {_PTR_KEY: "P", _MPR_KEY: "M", _FTR_KEY: "F"}
+
+# MPRs and FTRs have no CONT_FLG. Record.split fills every MPR or FTR of a split but the last to
+# within two array elements of REC_LEN_MAX, and gives each record the next elements of the index
+# arrays (RTN_INDX, PGM_INDX), where another execution of the test starts the same list again. A
+# record that long followed by a record of the same type, test, head and site whose first indexes
+# differ from those of the first record is taken as a split result, counted once. An MPR without
+# RTN_INDX (RTN_ICNT 0) cannot be told from another execution and is counted per record.
+SPLIT_MIN_LEN = REC_LEN_MAX - 16
+
+_PRR = struct.Struct("=BBBHHH")  # HEAD_NUM, SITE_NUM, PART_FLG, NUM_TEST, HARD_BIN, SOFT_BIN
+_TEST = struct.Struct("=IBBB")  # TEST_NUM, HEAD_NUM, SITE_NUM, TEST_FLG
+_PTR = struct.Struct("=IBBBBf")  # ... PARM_FLG, RESULT
+_COUNTS = struct.Struct("=HH")  # MPR RTN_ICNT, RSLT_CNT at 8; FTR RTN_ICNT, PGM_ICNT at 34
+_INDX = struct.Struct("=H")
+
+ALL_HEADS = 255  # HEAD_NUM of the summary records for all sites
+
+# TSR OPT_FLAG: bits 3, 6 and 7 are reserved and must be 1, TEST_TIM (bit 2) is never known
+_OPT_RESERVED = 0xC8
+_OPT_NO_TIME = 0x04
+_OPT_NO_STATS = 0x33  # TEST_MIN, TEST_MAX, TST_SUMS, TST_SQRS invalid
+
+
+def _first_indexes(key, body):
+    """(first RTN_INDX, first PGM_INDX) of an MPR or FTR, None for an array left empty; None if both are."""
+    rtn = pgm = None
+    if key == _MPR_KEY:
+        if len(body) < 12:
+            return None
+        icnt, rcnt = _COUNTS.unpack_from(body, 8)
+        pos = 12 + (icnt + 1) // 2 + 4 * rcnt
+        for _ in range(2):  # TEST_TXT, ALARM_ID
+            if pos >= len(body):
+                return None
+            pos += 1 + body[pos]
+        pos += 20  # OPT_FLAG to INCR_IN
+        if icnt and pos + 2 <= len(body):
+            rtn = _INDX.unpack_from(body, pos)[0]
+    else:
+        if len(body) < 38:
+            return None
+        icnt, pcnt = _COUNTS.unpack_from(body, 34)
+        if icnt and len(body) >= 40:
+            rtn = _INDX.unpack_from(body, 38)[0]
+        pos = 38 + 2 * icnt + (icnt + 1) // 2
+        if pcnt and pos + 2 <= len(body):
+            pgm = _INDX.unpack_from(body, pos)[0]
+    if rtn is None and pgm is None:
+        return None
+    return rtn, pgm
+
+
+def _pass_fail(part_flg):
+    if part_flg & 0x10:
+        return " "
+    return "F" if part_flg & 0x08 else "P"
+
+
+class SummaryAccumulator:
+    """Running summary counts of a lot.
+
+    Attributes:
+        parts(dict): (head, site) -> [PART_CNT, RTST_CNT, ABRT_CNT, GOOD_CNT]
+        hbins(dict): (head, site, HARD_BIN) -> [count, pass/fail character]
+        sbins(dict): (head, site, SOFT_BIN) -> [count, pass/fail character]
+        tests(dict): (head, site, TEST_NUM) -> [TEST_TYP, EXEC_CNT, FAIL_CNT, ALRM_CNT,
+                     TEST_MIN, TEST_MAX, TST_SUMS, TST_SQRS, TEST_NAM]
+        open_parts(set): (head, site) of PIRs fed without their PRR
+        mrr_seen: whether an MRR went past feed()
+
+    Methods:
+        feed: count one record given as header fields and body bytes
+        add_part, add_test: count a part or test result given as values
+        merge: add the counts of another accumulator
+        records: the summary records
+        to_dict, from_dict: state as JSON-friendly data
+    """
+
+    def __init__(self):
+        self.parts = {}
+        self.hbins = {}
+        self.sbins = {}
+        self.tests = {}
+        self.open_parts = set()
+        self.mrr_seen = False
+        # (REC_TYP, REC_SUB, TEST_NUM, HEAD_NUM, SITE_NUM, first RTN_INDX, first PGM_INDX) of the
+        # result whose last record fed was a full length MPR or FTR, indexes of its first record
+        self._split = None
+
+    def feed(self, rec_typ, rec_sub, body):
+        """Count a PRR, PTR, MPR or FTR and track PIR/PRR pairs; other records are ignored.
+
+        Returns:
+            True for the records after the first one of a split MPR or FTR, which are not counted
+        """
+        key = (rec_typ, rec_sub)
+        split, self._split = self._split, None
+        if key == _PRR_KEY:
+            if len(body) >= _PRR.size:
+                head, site, part_flg, _, hard_bin, soft_bin = _PRR.unpack_from(body)
+                self.add_part(head, site, part_flg, hard_bin, soft_bin)
+                self.open_parts.discard((head, site))
+        elif key == _PIR_KEY:
+            if len(body) >= 2:
+                self.open_parts.add((body[0], body[1]))
+        elif key == _PTR_KEY:
+            if len(body) >= _PTR.size:
+                test_num, head, site, test_flg, _, result = _PTR.unpack_from(body)
+                name = ""
+                if (head, site, test_num) not in self.tests and len(body) > _PTR.size:
+                    name = bytes(body[_PTR.size + 1:_PTR.size + 1 + body[_PTR.size]]).decode("ascii", "replace")
+                self.add_test("P", test_num, head, site, test_flg, result, name)
+        elif key in _TEST_TYPES:
+            if len(body) >= _TEST.size:
+                test_num, head, site, test_flg = _TEST.unpack_from(body)
+                result = (rec_typ, rec_sub, test_num, head, site)
+                if split is not None and split[:5] == result:
+                    first = _first_indexes(key, body)
+                    if first is not None and first != split[5:]:
+                        if len(body) >= SPLIT_MIN_LEN:
+                            self._split = split
+                        return True
+                if len(body) >= SPLIT_MIN_LEN:
+                    first = _first_indexes(key, body)
+                    if first is not None:
+                        self._split = result + first
+                self.add_test(_TEST_TYPES[key], test_num, head, site, test_flg)
+        elif key == _MRR_KEY:
+            self.mrr_seen = True
+
+    def add_part(self, head, site, part_flg, hard_bin, soft_bin=65535):
+        counts = self.parts.get((head, site))
+        if counts is None:
+            counts = self.parts[(head, site)] = [0, 0, 0, 0]
+        counts[0] += 1
+        if part_flg & 0x03:
+            counts[1] += 1
+        if part_flg & 0x04:
+            counts[2] += 1
+        pass_fail = _pass_fail(part_flg)
+        if pass_fail == "P":
+            counts[3] += 1
+        _add_bin(self.hbins, (head, site, hard_bin), pass_fail)
+        if soft_bin != 65535:
+            _add_bin(self.sbins, (head, site, soft_bin), pass_fail)
+
+    def add_test(self, test_typ, test_num, head, site, test_flg, result=None, name=""):
+        """Count one execution of a test.
+
+        Args:
+            test_typ: "P", "M" or "F"
+            test_flg: the TEST_FLG of the result; bit 4 (not executed) results are not counted
+            result: the PTR RESULT, added to the statistics unless TEST_FLG bit 1 marks it invalid
+            name: TEST_NAM, kept from the first result of the test that has one
+        """
+        if test_flg & 0x10:
+            return
+        entry = self.tests.get((head, site, test_num))
+        if entry is None:
+            entry = self.tests[(head, site, test_num)] = [test_typ, 0, 0, 0, None, None, 0.0, 0.0, name]
+        elif name and not entry[8]:
+            entry[8] = name
+        entry[1] += 1
+        if test_flg & 0x80:
+            entry[2] += 1
+        if test_flg & 0x01:
+            entry[3] += 1
+        if result is not None and not test_flg & 0x02 and math.isfinite(result):
+            entry[4] = result if entry[4] is None else min(entry[4], result)
+            entry[5] = result if entry[5] is None else max(entry[5], result)
+            entry[6] += result
+            entry[7] += result * result
+
+    def merge(self, other):
+        """Add the counts of another accumulator to this one.
+
+        Returns:
+            self
+        """
+        for mine, theirs, merge in ((self.parts, other.parts, _merge_counts), (self.hbins, other.hbins, _merge_bin),
+                                    (self.sbins, other.sbins, _merge_bin), (self.tests, other.tests, _merge_test)):
+            for key, entry in theirs.items():
+                if key in mine:
+                    merge(mine[key], entry)
+                else:
+                    mine[key] = list(entry)
+        self.open_parts |= other.open_parts
+        self.mrr_seen = self.mrr_seen or other.mrr_seen
+        return self
+
+    def records(self, per_site=True):
+        """Summary records for the counts so far.
+
+        Args:
+            per_site: also return the records of each head and site, not only the totals for all
+                      sites (HEAD_NUM 255)
+
+        Returns:
+            list of TSR, HBR, SBR and PCR records, in that order
+        """
+        recs = []
+        for key, entry in sorted(_totals(self.tests, per_site, _merge_test).items()):
+            test_typ, exec_cnt, fail_cnt, alrm_cnt, test_min, test_max, sums, sqrs, name = entry
+            if test_min is None or not all(abs(v) <= R4_MAX for v in (test_min, test_max, sums, sqrs)):
+                opt_flag = _OPT_RESERVED | _OPT_NO_TIME | _OPT_NO_STATS
+                test_min = test_max = sums = sqrs = 0
+            else:
+                opt_flag = _OPT_RESERVED | _OPT_NO_TIME
+            recs.append(TSR(HEAD_NUM=key[0], SITE_NUM=key[1], TEST_NUM=key[2], OPT_FLAG=opt_flag, TEST_TYP=test_typ,
+                            EXEC_CNT=exec_cnt, FAIL_CNT=fail_cnt, ALRM_CNT=alrm_cnt, TEST_NAM=name, TEST_TIM=0,
+                            TEST_MIN=test_min, TEST_MAX=test_max, TST_SUMS=sums, TST_SQRS=sqrs))
+        for cls, bins in ((HBR, self.hbins), (SBR, self.sbins)):
+            for (head, site, num), (count, pass_fail) in sorted(_totals(bins, per_site, _merge_bin).items()):
+                recs.append(cls(head, site, num, count, pass_fail))
+        for (head, site), counts in sorted(_totals(self.parts, per_site, _merge_counts).items()):
+            recs.append(PCR(head, site, *counts))
+        return recs
+
+    def to_dict(self):
+        return {
+            "parts": [list(key) + counts for key, counts in self.parts.items()],
+            "hbins": [list(key) + entry for key, entry in self.hbins.items()],
+            "sbins": [list(key) + entry for key, entry in self.sbins.items()],
+            "tests": [list(key) + entry for key, entry in self.tests.items()],
+            "open_parts": [list(key) for key in self.open_parts],
+            "mrr_seen": self.mrr_seen,
+            "split": None if self._split is None else list(self._split),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        acc = cls()
+        acc.parts = {tuple(row[:2]): row[2:] for row in state["parts"]}
+        acc.hbins = {tuple(row[:3]): row[3:] for row in state["hbins"]}
+        acc.sbins = {tuple(row[:3]): row[3:] for row in state["sbins"]}
+        acc.tests = {tuple(row[:3]): row[3:] for row in state["tests"]}
+        acc.open_parts = {tuple(key) for key in state["open_parts"]}
+        acc.mrr_seen = state["mrr_seen"]
+        split = state.get("split")  # not in the checkpoints of older versions
+        acc._split = None if split is None else tuple(split)
+        return acc
+
+
+def _add_bin(bins, key, pass_fail):
+    entry = bins.get(key)
+    if entry is None:
+        bins[key] = [1, pass_fail]
+    else:
+        entry[0] += 1
+        if entry[1] == " ":
+            entry[1] = pass_fail
+
+
+def _merge_counts(mine, theirs):
+    for i, count in enumerate(theirs):
+        mine[i] += count
+
+
+def _merge_bin(mine, theirs):
+    mine[0] += theirs[0]
+    if mine[1] == " ":
+        mine[1] = theirs[1]
+
+
+def _merge_test(mine, theirs):
+    for i in (1, 2, 3, 6, 7):
+        mine[i] += theirs[i]
+    if theirs[4] is not None:
+        mine[4] = theirs[4] if mine[4] is None else min(mine[4], theirs[4])
+        mine[5] = theirs[5] if mine[5] is None else max(mine[5], theirs[5])
+    if not mine[8]:
+        mine[8] = theirs[8]
+
+
+def _totals(table, per_site, merge):
+    """Entries keyed by (head, site, ...) plus their sum over all sites under (255, 0, ...)."""
+    out = dict(table) if per_site else {}
+    totals = {}
+    for key, entry in table.items():
+        total_key = (ALL_HEADS, 0) + key[2:]
+        total = totals.get(total_key)
+        if total is None:
+            totals[total_key] = list(entry)
+        else:
+            merge(total, entry)
+    out.update(totals)
+    return out
@@ -1,5 +1,26 @@
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
 from .recheaders import *
+from . import bench_alloc, bulk, columnar, dtcodes, durable, filters, hashing, headercache, instrument, order, pinmap, \
+    policy, reader, recview, resummarize, shmring, sinks, summary, validate
+from .rolling import RollingWriter
+from .reader import TruncatedRecordError, read_records
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class STDFWriterTest(unittest.TestCase):
@@ -99,5 +120,1136 @@ class STDFWriterTest(unittest.TestCase):
         self.inf.close()
 
 
+class InstrumentTest(unittest.TestCase):
+
+    def write_records(self, inf):
+        FAR(CPU_TYPE=2, STDF_VER=4).write_record(inf)
+        for i in range(3):
+            PTR(TEST_NUM=i, HEAD_NUM=1, SITE_NUM=0, TEST_FLG=0, PARM_FLG=0, RESULT=0.5, TEST_TXT="t").write_record(inf)
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def test_counters(self):
+        plain = io.BytesIO()
+        self.write_records(plain)
+        instrument.enable()
+        timed = io.BytesIO()
+        self.write_records(timed)
+        snap = instrument.snapshot()
+        self.assertEqual(timed.getvalue(), plain.getvalue())
+        self.assertEqual(snap["records"]["PTR"]["count"], 3)
+        self.assertEqual(snap["records"]["FAR"]["bytes"], 6)
+        self.assertEqual(snap["totals"]["bytes"], len(plain.getvalue()))
+        self.assertEqual(snap["encoders"]["Cn"]["count"], 3)  # fields left at their default are not encoded
+        self.assertIn("records=4", instrument.format_snapshot(snap))
+
+    def test_split_record_counted_once(self):
+        plain = DTR("x" * 600).encode() + GDR(GEN_DATA=[(5, i) for i in range(30000)]).encode()
+        instrument.enable()
+        timed = DTR("x" * 600).encode() + GDR(GEN_DATA=[(5, i) for i in range(30000)]).encode()
+        snap = instrument.snapshot()
+        self.assertEqual(timed, plain)
+        self.assertEqual([snap["records"][name]["count"] for name in ("DTR", "GDR")], [1, 1])
+        self.assertEqual(snap["totals"]["bytes"], len(plain))
+
+    def test_disable_restores_originals(self):
+        instrument.enable()
+        instrument.disable()
+        self.assertNotIn("write_record", PTR.__dict__)
+        self.assertNotIn("__wrapped__", vars(PTR.__init__))
+
+
+class AllocationBenchmarkTest(unittest.TestCase):
+
+    def test_measure_and_thresholds(self):
+        results = {"PIR": bench_alloc.measure(bench_alloc.SAMPLES["PIR"], n=200)}
+        self.assertGreater(results["PIR"]["construct_bytes"], 0)
+        self.assertEqual(bench_alloc.check_thresholds(results), [])
+        failures = bench_alloc.check_thresholds(results, max_construct_bytes=1)
+        self.assertEqual(len(failures), 1)
+        self.assertTrue(failures[0].startswith("PIR: construct_bytes"))
+
+    def test_write_lot(self):
+        lot = bench_alloc.write_lot(io.BytesIO(), parts=20, tests=2, sites=4)
+        self.assertEqual(lot["records"], 5 + 20 * 4 + 6)
+
+
+class ValidationTest(unittest.TestCase):
+
+    def setUp(self):
+        validate.set_mode("strict")
+
+    def tearDown(self):
+        validate.set_mode("off")
+
+    def test_nothing_written_on_error(self):
+        inf = io.BytesIO()
+        for rec in (PTR(TEST_NUM=1, HEAD_NUM=1, SITE_NUM=300, TEST_FLG=0, PARM_FLG=0, RESULT=0.5),
+                    PTR(TEST_NUM=1, HEAD_NUM=1, SITE_NUM=0, TEST_FLG=0, PARM_FLG=0, RESULT=0.5, UNITS="x" * 256),
+                    PGR(GRP_INDX=32768, INDX_CNT=3, PMR_INDX=[1, 2]),
+                    MIR(1, 2, 3, "LOT", "", "", "", "", MODE_COD="PP")):
+            with self.assertRaises(validate.ValidationError):
+                rec.write_record(inf)
+        self.assertEqual(inf.getvalue(), b"")
+
+    def test_valid_records_pass(self):
+        for name, factory in bench_alloc.SAMPLES.items():
+            factory().encode()
+
+    def test_off_mode(self):
+        validate.set_mode("off")
+        self.assertIsNone(Record.validate)
+        with self.assertRaises(validate.ValidationError):
+            validate.check_record(PIR(HEAD_NUM=1, SITE_NUM=-1))
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_check_columns(self):
+        validate.check_columns(HBR, {"HBIN_NUM": np.arange(100), "HBIN_NAM": np.array(["PASS", "FAIL"] * 50)}, 100)
+        with self.assertRaises(validate.ValidationError):
+            validate.check_columns(HBR, {"HBIN_NUM": np.arange(70000)})
+        with self.assertRaises(validate.ValidationError):
+            validate.check_columns(HBR, {"HBIN_NAM": np.array(["x" * 256])})
+
+
+class RecordOrderTest(unittest.TestCase):
+
+    def write_lot(self, inf, records=()):
+        for rec in (FAR(CPU_TYPE=2, STDF_VER=4), ATR(MOD_TIM=0, CMD_LINE="filter"),
+                    MIR(1, 2, 3, "LOT", "", "", "", ""), SDR(HEAD_NUM=1, SITE_GRP=1, SITE_CNT=1, SITE_NUM=[0]),
+                    WIR(HEAD_NUM=1, START_T=0)) + tuple(records):
+            rec.write_record(inf)
+
+    def write_part(self, inf, site=0):
+        PIR(HEAD_NUM=1, SITE_NUM=site).write_record(inf)
+        PTR(TEST_NUM=1, HEAD_NUM=1, SITE_NUM=site, TEST_FLG=0, PARM_FLG=0, RESULT=0.5).write_record(inf)
+        PRR(HEAD_NUM=1, SITE_NUM=site, PART_FLG=0, NUM_TEST=1, HARD_BIN=1).write_record(inf)
+
+    def test_valid_file(self):
+        inf = io.BytesIO()
+        self.write_lot(inf)
+        self.write_part(inf, 0)
+        self.write_part(inf, 1)
+        WRR(HEAD_NUM=1, FINISH_T=0, PART_CNT=2).write_record(inf)
+        MRR(FINISH_T=0).write_record(inf)
+        inf.seek(0)
+        self.assertEqual(order.check_file(inf), [])
+
+    def test_violations(self):
+        inf = io.BytesIO()
+        self.write_lot(inf, [ATR(MOD_TIM=0, CMD_LINE="late"), PIR(HEAD_NUM=1, SITE_NUM=0),
+                             PIR(HEAD_NUM=1, SITE_NUM=0), PTR(1, 1, 5, 0, 0, 0.5),
+                             PRR(HEAD_NUM=1, SITE_NUM=2, PART_FLG=0, NUM_TEST=1, HARD_BIN=1)])
+        SDR(HEAD_NUM=1, SITE_GRP=1, SITE_CNT=1, SITE_NUM=[0]).write_record(inf)
+        inf.seek(0)
+        messages = [v.message for v in order.check_file(inf)]
+        self.assertEqual(messages, [
+            "ATR not between the FAR and the MIR",
+            "PIR for head 1 site 0 while a part is open there",
+            "test result for head 1 site 5 outside a PIR/PRR pair",
+            "PRR for head 1 site 2 without a PIR",
+            "SDR after the initial sequence",
+            "the last record is not an MRR",
+        ])
+
+    def test_strict_writer(self):
+        inf = io.BytesIO()
+        out = order.OrderCheckingWriter(inf, strict=True)
+        self.write_lot(out)
+        size = len(inf.getvalue())
+        with self.assertRaises(order.RecordOrderError):
+            PRR(HEAD_NUM=1, SITE_NUM=0, PART_FLG=0, NUM_TEST=1, HARD_BIN=1).write_record(out)
+        self.assertEqual(len(inf.getvalue()), size)
+
+
+class LazyLoadTest(unittest.TestCase):
+
+    def test_registry(self):
+        from . import recheaders
+        classes = recheaders.load_all()
+        self.assertEqual(len(classes), len(recheaders.record_names))
+        for (rec_typ, rec_sub), cls in classes.items():
+            self.assertEqual((cls.rec_typ, cls.rec_sub), (rec_typ, rec_sub))
+            self.assertIs(getattr(recheaders, cls.__name__), cls)
+            self.assertTrue(issubclass(cls, Record))
+        with self.assertRaises(AttributeError):
+            recheaders.XYZ
+
+    def test_lazy_import(self):
+        package = __name__.rpartition(".")[0]
+        code = "\n".join([
+            "import sys",
+            "import {}.recheaders as recheaders".format(package),
+            "loaded = lambda: sorted(name.rpartition('.')[2] for name in sys.modules if '.rec_' in name)",
+            "print(loaded())",
+            "recheaders.PTR",
+            "print(loaded())",
+        ])
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        out = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True).stdout
+        self.assertEqual(out.splitlines(), ["[]", "['rec_test']"])
+
+
+class BulkTest(unittest.TestCase):
+
+    def test_columns_match_records(self):
+        cols = {"HEAD_NUM": 255, "SITE_NUM": 0, "HBIN_NUM": [1, 2, 3], "HBIN_CNT": [10, 0, 70000],
+                "HBIN_PF": ["P", "F", "F"], "HBIN_NAM": ["pass", "", "open short"]}
+        expected = b"".join(HBR(255, 0, num, cnt, pf, nam).encode() for num, cnt, pf, nam in
+                            zip(cols["HBIN_NUM"], cols["HBIN_CNT"], cols["HBIN_PF"], cols["HBIN_NAM"]))
+        self.assertEqual(bulk.encode_bulk(HBR, cols), expected)
+        inf = io.BytesIO()
+        self.assertEqual(bulk.write_bulk(inf, HBR, cols), 3)
+        self.assertEqual(inf.getvalue(), expected)
+
+    def test_tuples_and_fallback(self):
+        rows = [(1, 0, 0, 3, 1), (1, 1, 8, 3, 5, 5, 2, -4, 7, "id", "txt", b"\x01\x02")]
+        self.assertEqual(bulk.encode_bulk(PRR, rows), b"".join(PRR(*row).encode() for row in rows))
+        # kx fields take the per-record path
+        cols = {"GRP_INDX": [1, 2], "INDX_CNT": [2, 1], "PMR_INDX": [[1, 2], [3]]}
+        self.assertEqual(bulk.encode_bulk(PGR, cols), PGR(1, 2, PMR_INDX=[1, 2]).encode() + PGR(2, 1, PMR_INDX=[3]).encode())
+        with self.assertRaises(TypeError):
+            bulk.encode_bulk(HBR, {"HEAD_NUM": [1]})
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_text_widths(self):
+        rows = {"HEAD_NUM": 1, "SITE_NUM": [0, 1, 2], "PART_FLG": 0, "NUM_TEST": 3, "HARD_BIN": 1,
+                "PART_FIX": [b"\x01\x00", b"", b"\x00\x00\x00"]}
+        self.assertEqual(bulk.encode_bulk(PRR, rows), b"".join(
+            PRR(1, site, 0, 3, 1, PART_FIX=fix).encode() for site, fix in zip(rows["SITE_NUM"], rows["PART_FIX"])))
+        cols = {"HEAD_NUM": 255, "SITE_NUM": 0, "HBIN_NUM": [1, 2], "HBIN_CNT": 1, "HBIN_NAM": "x"}
+        for pf in (["P", ""], ["P", "FF"], ""):
+            with self.assertRaises(validate.ValidationError):
+                bulk.encode_bulk(HBR, dict(cols, HBIN_PF=pf))
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_structured_array(self):
+        rows = np.zeros(3, dtype=[("PMR_INDX", "u2"), ("CHAN_NAM", "U8"), ("SITE_NUM", "u1")])
+        rows["PMR_INDX"] = [1, 2, 3]
+        rows["CHAN_NAM"] = ["a", "bb", ""]
+        self.assertEqual(bulk.encode_bulk(PMR, rows), b"".join(
+            PMR(PMR_INDX=int(r["PMR_INDX"]), CHAN_NAM=str(r["CHAN_NAM"]), SITE_NUM=0).encode() for r in rows))
+        validate.set_mode("strict")
+        try:
+            with self.assertRaises(validate.ValidationError):
+                bulk.encode_bulk(PMR, {"PMR_INDX": np.array([1, 70000])})
+        finally:
+            validate.set_mode("off")
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_mpr_sites(self):
+        rng = np.random.default_rng(1)
+        results = rng.normal(size=(4, 7)).astype(np.float32)
+        states = rng.integers(0, 16, size=(4, 7))
+        indx = list(range(10, 17))
+        expected = b"".join(MPR(3, 1, site, 0x80 * (site == 2), 0, 7, 7, RTN_STAT=bulk._pack_nibbles(states[site].tolist()),
+                                RTN_RSLT=results[site].tolist(), RTN_INDX=indx, TEST_TXT="vout", UNITS="V").encode()
+                            for site in range(4))
+        data = bulk.encode_mpr(3, results, states, indx, test_flg=[0, 0, 0x80, 0], TEST_TXT="vout", UNITS="V")
+        self.assertEqual(data, expected)
+        self.assertEqual(bulk.encode_mpr(3, results[:2, :2], site_nums=[5, 6]),
+                         b"".join(MPR(3, 1, site, 0, 0, 0, 2, RTN_RSLT=results[i, :2].tolist(), RTN_INDX=[]).encode()
+                                  for i, site in enumerate((5, 6))))
+        wide = np.zeros((2, 20000), dtype=np.float32)  # too long for one record: split per site
+        self.assertEqual(bulk.encode_mpr(1, wide), b"".join(MPR(1, 1, site, 0, 0, 0, 20000, RTN_RSLT=wide[site],
+                                                                     RTN_INDX=[]).encode() for site in range(2)))
+        validate.set_mode("strict")
+        try:
+            with self.assertRaises(validate.ValidationError):
+                bulk.encode_mpr(3, results, states + 16, indx)
+        finally:
+            validate.set_mode("off")
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class ColumnarReaderTest(unittest.TestCase):
+
+    def write_file(self):
+        inf = io.BytesIO()
+        FAR(CPU_TYPE=2, STDF_VER=4).write_record(inf)
+        MIR(1, 2, 3, "LOT", "", "", "", "").write_record(inf)
+        for part in range(3):
+            for site in (0, 1):
+                PIR(HEAD_NUM=1, SITE_NUM=site).write_record(inf)
+            for site in (1, 0):
+                PTR(10, 1, site, 0, 0, part + site / 10, TEST_TXT="vdd").write_record(inf)
+                PTR(20, 1, site, 0x80, 0, -1.5).write_record(inf)
+                MPR(TEST_NUM=30, HEAD_NUM=1, SITE_NUM=site, TEST_FLG=0, PARM_FLG=0, RTN_ICNT=3, RSLT_CNT=2,
+                    RTN_STAT=[0x21, 0x3], RTN_RSLT=[part, site], RTN_INDX=[1, 2, 3]).write_record(inf)
+            for site in (0, 1):
+                PRR(HEAD_NUM=1, SITE_NUM=site, PART_FLG=0, NUM_TEST=3, HARD_BIN=1).write_record(inf)
+        MRR(FINISH_T=0).write_record(inf)
+        return inf.getvalue()
+
+    def test_ptr_columns(self):
+        data = self.write_file()
+        index = columnar.build_index(data)
+        self.assertEqual(len(index), 2 + 3 * 10 + 1)
+        ptr = columnar.read_ptr_columns(data, index)
+        self.assertEqual(sorted(ptr), [10, 20])
+        np.testing.assert_allclose(ptr[10]["RESULT"], [0.1, 0, 1.1, 1, 2.1, 2], rtol=1e-6)
+        self.assertEqual(ptr[10]["SITE_NUM"].tolist(), [1, 0, 1, 0, 1, 0])
+        self.assertEqual(ptr[10]["PART"].tolist(), [1, 0, 3, 2, 5, 4])
+        self.assertEqual(ptr[20]["TEST_FLG"].tolist(), [0x80] * 6)
+        self.assertEqual(list(columnar.read_ptr_columns(data, index, tests=[20])), [20])
+
+    def test_mpr_columns(self):
+        mpr = columnar.read_mpr_columns(self.write_file())
+        self.assertEqual(mpr[30]["RESULT"].tolist(), [0, 1, 0, 0, 1, 1, 1, 0, 2, 1, 2, 0])
+        self.assertEqual(mpr[30]["RSLT_INDX"].tolist(), [0, 1] * 6)
+        self.assertEqual(mpr[30]["PART"].tolist(), [1, 1, 0, 0, 3, 3, 2, 2, 5, 5, 4, 4])
+
+    def test_truncated(self):
+        data = self.write_file()
+        with self.assertRaises(TruncatedRecordError) as cm:
+            columnar.build_index(data[:-3])
+        self.assertEqual(cm.exception.offset, columnar.build_index(data)["offset"][-1])  # the MRR
+
+
+class DurableWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "lot.stdf")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write_parts(self, out, parts, first=0):
+        for part in range(first, first + parts):
+            site = part % 2
+            PIR(HEAD_NUM=1, SITE_NUM=site).write_record(out)
+            PTR(100, 1, site, 0x80 if part % 3 == 0 else 0, 0, part, TEST_TXT="idd").write_record(out)
+            PRR(HEAD_NUM=1, SITE_NUM=site, PART_FLG=0x08 if part % 3 == 0 else 0, NUM_TEST=1,
+                HARD_BIN=2 if part % 3 == 0 else 1, SOFT_BIN=20 if part % 3 == 0 else 10).write_record(out)
+
+    def test_summary_accumulator(self):
+        acc = summary.SummaryAccumulator()
+        for part in range(6):
+            acc.add_part(1, part % 2, 0x08 if part % 3 == 0 else 0, 2 if part % 3 == 0 else 1)
+            acc.add_test("P", 100, 1, part % 2, 0x80 if part % 3 == 0 else 0, float(part), "idd")
+        copy = summary.SummaryAccumulator.from_dict(json.loads(json.dumps(acc.to_dict())))
+        self.assertEqual(copy.to_dict(), acc.to_dict())
+        copy.merge(acc)
+        pcr = [rec for rec in copy.records() if isinstance(rec, PCR)]
+        self.assertEqual([(r.field_values["HEAD_NUM"], r.field_values["PART_CNT"], r.field_values["GOOD_CNT"])
+                          for r in pcr], [(1, 6, 4), (1, 6, 4), (255, 12, 8)])
+        tsr = [rec.field_values for rec in acc.records(per_site=False) if isinstance(rec, TSR)]
+        self.assertEqual(len(tsr), 1)
+        self.assertEqual((tsr[0]["EXEC_CNT"], tsr[0]["FAIL_CNT"], tsr[0]["TEST_MIN"], tsr[0]["TEST_MAX"],
+                          tsr[0]["TST_SUMS"], tsr[0]["TEST_NAM"]), (6, 2, 0, 5, 15, "idd"))
+
+    def test_recover_torn_file(self):
+        out = durable.DurableWriter(self.path, sync_records=10, sync_interval=60, checkpoint_interval=0)
+        FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+        MIR(1, 2, 3, "LOT", "", "", "", "").write_record(out)
+        self.write_parts(out, 20)
+        PIR(HEAD_NUM=1, SITE_NUM=0).write_record(out)
+        out.commit()
+        PTR(100, 1, 0, 0, 0, 1.0).write_record(out)  # never committed: lost in the crash
+        os.close(out._fd)
+        with open(self.path, "ab") as torn:
+            torn.write(PTR(100, 1, 0, 0, 0, 1.0).encode()[:7])
+
+        report = durable.recover(self.path, finish_t=5)
+        self.assertEqual((report.trimmed, report.closed_parts, report.finished), (7, 1, True))
+        self.assertLess(report.replayed, 20 * 3)  # the records before the checkpoint are not read again
+        self.assertFalse(os.path.exists(self.path + durable.CHECKPOINT_SUFFIX))
+        with open(self.path, "rb") as inf:
+            self.assertEqual(order.check_file(inf), [])
+            inf.seek(0)
+            pcr = [body for typ, sub, body in read_records(inf) if (typ, sub) == (1, 30)]
+        self.assertEqual(pcr[-1][:8], PCR(255, 0, 21, 0).encode()[4:12])  # 20 parts and the closed one
+        self.assertEqual(durable.recover(self.path).finished, False)
+
+    def test_split_result_counted_once(self):
+        pins = 12000
+        results = [MPR(7, 1, 0, flg, 0, pins, pins, RTN_STAT=[0] * (pins // 2), RTN_RSLT=[0.5] * pins,
+                       RTN_INDX=list(range(pins))) for flg in (0x80, 0)]
+        self.assertEqual(len(list(read_records(io.BytesIO(results[0].encode())))), 2)
+        with durable.DurableWriter(self.path) as out:
+            FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+            for rec in results:
+                PIR(HEAD_NUM=1, SITE_NUM=0).write_record(out)
+                rec.write_record(out)
+                PRR(HEAD_NUM=1, SITE_NUM=0, PART_FLG=0, NUM_TEST=1, HARD_BIN=1).write_record(out)
+        self.assertEqual(out.summary.tests[(1, 0, 7)][1:3], [2, 1])
+        acc = resummarize.summarize(self.path, processes=1, chunk_bytes=1000)
+        self.assertEqual(acc.tests[(1, 0, 7)][1:3], [2, 1])
+        datalog = policy.DatalogPolicy(io.BytesIO(), failures=True)  # the passing MPR is left out, all of it
+        with open(self.path, "rb") as inf:
+            datalog.write(inf.read())
+        self.assertEqual((datalog.logged, datalog.suppressed), (1, 1))
+        self.assertEqual(datalog.summary.tests[(1, 0, 7)][1:3], [2, 1])
+        kept = [sub for _, sub, _ in read_records(io.BytesIO(datalog.out.getvalue()))]
+        self.assertEqual(kept.count(15), 2)
+
+    def test_full_length_results_counted_apart(self):
+        pins = 10074  # one record just under REC_LEN_MAX
+        data = b"".join(MPR(7, 1, 0, flg, 0, pins, pins, RTN_STAT=[0] * (pins // 2), RTN_RSLT=[0.5] * pins,
+                            RTN_INDX=list(range(pins))).encode() for flg in (0, 0x80))
+        records = list(read_records(io.BytesIO(data)))
+        self.assertEqual(len(records), 2)
+        self.assertGreaterEqual(len(records[0][2]), summary.SPLIT_MIN_LEN)
+        acc = summary.SummaryAccumulator()
+        self.assertEqual([acc.feed(*rec) for rec in records], [None, None])
+        self.assertEqual(acc.tests[(1, 0, 7)][1:3], [2, 1])
+        datalog = policy.DatalogPolicy(io.BytesIO(), failures=True)  # the failing second execution is written
+        datalog.write(data)
+        self.assertEqual((datalog.logged, datalog.suppressed, datalog.out.getvalue()), (2, 0, data))
+
+        pins = 12000
+        split = list(read_records(io.BytesIO(MPR(7, 1, 0, 0, 0, pins, pins, RTN_STAT=[0] * (pins // 2),
+                                                 RTN_RSLT=[0.5] * pins, RTN_INDX=list(range(pins))).encode())))
+        acc = summary.SummaryAccumulator()
+        acc.feed(*split[0])
+        acc = summary.SummaryAccumulator.from_dict(json.loads(json.dumps(acc.to_dict())))  # a checkpoint in between
+        self.assertTrue(acc.feed(*split[1]))
+        self.assertEqual(acc.tests[(1, 0, 7)][1], 1)
+
+    def test_append_and_finish(self):
+        with durable.DurableWriter(self.path, sync_records=4) as out:
+            FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+            MIR(1, 2, 3, "LOT", "", "", "", "").write_record(out)
+            self.write_parts(out, 3)
+        out = durable.DurableWriter(self.path)
+        self.assertEqual(out.recovery.trimmed, 0)
+        self.write_parts(out, 3, first=3)
+        out.finish(FINISH_T=9)
+        with open(self.path, "rb") as inf:
+            self.assertEqual(order.check_file(inf), [])
+            inf.seek(0)
+            hbr = [body for typ, sub, body in read_records(inf) if (typ, sub) == (1, 40)]
+        self.assertEqual(hbr[-2:], [HBR(255, 0, 1, 4, "P").encode()[4:], HBR(255, 0, 2, 2, "F").encode()[4:]])
+        size = os.path.getsize(self.path)
+        with self.assertRaises(ValueError):
+            durable.DurableWriter(self.path)  # finished: nothing goes after the MRR
+        self.assertEqual(os.path.getsize(self.path), size)
+
+
+class VectoredSinkTest(unittest.TestCase):
+
+    def records(self):
+        recs = [PTR(i, 1, 0, 0, 0, 0.5, TEST_TXT="test").encode() for i in range(100)]
+        return recs + [bytes(range(256)) * 40] + recs
+
+    def test_pipe(self):
+        r, w = os.pipe()
+        with os.fdopen(r, "rb") as inf:
+            with sinks.VectoredSink(w, batch_bytes=4096) as out:
+                for rec in self.records():
+                    out.write(rec)
+            self.assertEqual(inf.read(), b"".join(self.records()))
+        self.assertEqual(out.bytes_written, len(b"".join(self.records())))
+        self.assertLess(out.calls, 10)
+
+    def test_socket_partial_sends(self):
+        a, b = socket.socketpair()
+        out = sinks.VectoredSink(a)
+        send = out._send
+        out._send = lambda iov: send(iov[:2]) if len(iov) > 1 else send([bytes(iov[0])[:1000]])  # short sends
+        for rec in self.records():
+            PTR(1, 1, 0, 0, 0, 0.5).write_record(out)
+            out.write(rec)
+        out.close()
+        with b:
+            received = b"".join(iter(lambda: b.recv(1 << 16), b""))
+        self.assertEqual(received, b"".join(PTR(1, 1, 0, 0, 0, 0.5).encode() + rec for rec in self.records()))
+
+    def test_item_sizes_and_iov_max(self):
+        r, w = os.pipe()
+        values = memoryview(struct.pack("=4d", 0.5, 1.5, 2.5, 3.5)).cast("d")  # items of 8 bytes
+        with os.fdopen(r, "rb") as inf:
+            with sinks.VectoredSink(w) as out:
+                self.assertEqual(out.write(values), 32)
+                self.assertEqual(out._queued, 32)
+            self.assertEqual(inf.read(), values.tobytes())
+        sysconf = getattr(os, "sysconf", None)
+        os.sysconf = lambda name: -1  # no determinate limit
+        try:
+            self.assertEqual(sinks._iov_max(), 1024)
+        finally:
+            if sysconf is None:
+                del os.sysconf
+            else:
+                os.sysconf = sysconf
+
+
+class CnCacheTest(unittest.TestCase):
+
+    def tearDown(self):
+        dtcodes.set_cn_cache_size(dtcodes.CN_CACHE_SIZE)
+
+    def test_cache(self):
+        dtcodes.set_cn_cache_size(8)
+        for _ in range(3):
+            PTR(1, 1, 0, 0, 0, 0.5, TEST_TXT="vdd", UNITS="A").encode()
+        info = dtcodes.cn_cache_info()
+        self.assertEqual((info.misses, info.maxsize, info.currsize), (2, 8, 2))  # "vdd" and "A"
+        self.assertGreater(info.hits, 0)
+        self.assertEqual(DTR("hello").encode()[4:], b"\x05hello")
+        with self.assertRaises(UnicodeEncodeError):
+            DTR("hé").encode()
+        with self.assertRaises(struct.error):
+            PTR(1, 1, 0, 0, 0, 0.5, UNITS="x" * 256).encode()
+        dtcodes.set_cn_cache_size(0)
+        DTR("hello").encode()
+        self.assertEqual(dtcodes.cn_cache_info().currsize, 0)
+
+
+class GDRTest(unittest.TestCase):
+
+    def test_spec_example(self):
+        # STDF V4 specification, GDR example: the pad field before the I*2 is added automatically
+        gdr = GDR(GEN_DATA=[(10, "AB"), (1, 255), (5, 510)])
+        self.assertEqual(gdr.encode(), struct.pack("=HBBHBB2sBBBBh", 12, 50, 10, 4, 10, 2, b"AB", 1, 255, 0, 5, 510))
+        self.assertEqual(gdr.field_values["FLD_CNT"], 4)
+        self.assertEqual(GDR(FLD_CNT=3, GEN_DATA={10: "AB", 1: 255, 5: 510}).encode(), gdr.encode())
+
+    def test_repeated_codes_and_arrays(self):
+        values = [0.5, 1.5, -2.0]
+        pairs = GDR(GEN_DATA=[(1, 7)] + [(7, v) for v in values] + [(1, 8), (2, 3), (2, 4)])
+        self.assertEqual(pairs.field_values["FLD_CNT"], 1 + 2 * 3 + 1 + 2 + 2)
+        self.assertEqual(len(pairs.encode()), 4 + pairs.rec_len)
+        if np is not None:
+            arrays = GDR(GEN_DATA=[(1, 7), np.array(values, dtype="f4"), (1, 8), (2, np.array([3, 4]))])
+            self.assertEqual(arrays.encode(), pairs.encode())
+            odd = GDR(GEN_DATA=[(10, "a"), np.array(values, dtype="f4")])  # first code on an odd offset, no pad
+            self.assertEqual(odd.field_values["FLD_CNT"], 6)
+            self.assertEqual(odd.encode()[9:], struct.pack("=Bf", 7, values[0]) +
+                             b"".join(struct.pack("=BBf", 0, 7, v) for v in values[1:]))
+
+    def _check_alignment(self, data):
+        """Check every number of an encoded GDR is on an even offset; returns the fields but pads."""
+        fields = []
+        pos = 6  # after the header and FLD_CNT
+        while pos < len(data):
+            code = data[pos]
+            if code == 0:
+                pos += 1
+                continue
+            if code == 10:
+                size = data[pos + 1] + 1
+            else:
+                size = struct.calcsize(dtcodes.VN_FORMATS[code])
+                if code in dtcodes.VN_ALIGNED:
+                    self.assertEqual((pos + 1) % 2, 0)
+                fields.append(struct.unpack_from("=" + dtcodes.VN_FORMATS[code], data, pos + 1)[0])
+            pos += 1 + size
+        self.assertEqual(pos, len(data))
+        return fields
+
+    @unittest.skipIf(np is None, "NumPy is not installed")
+    def test_array_alignment(self):
+        for fields in ([(10, "a"), np.array([1, 2, 3], dtype="f4")], [np.array([1, 2, 3], dtype="i2")],
+                       [(1, 1), np.arange(5, dtype="f8"), np.arange(3, dtype="i1"), (10, "ab"), np.array([7, 8], "u4")]):
+            gdr = GDR(GEN_DATA=fields)
+            data = gdr.encode()
+            self.assertEqual(len(data), 4 + gdr.rec_len)
+            numbers = [v for item in fields for v in (item.tolist() if hasattr(item, "dtype") else
+                                                      [] if item[0] == 10 else [item[1]])]
+            self.assertEqual(self._check_alignment(data), numbers)
+        recs = GDR(GEN_DATA=[(10, "a"), np.arange(100, dtype="f4")]).split(max_len=100)
+        self.assertGreater(len(recs), 1)
+        for rec in recs[:-1]:
+            self.assertGreater(len(rec.encode()) - 4, 100 - 6)  # filled up to within one padded R*4
+        self.assertEqual(sum(len(self._check_alignment(rec.encode())) for rec in recs), 100)
+
+    def test_validation(self):
+        validate.set_mode("strict")
+        try:
+            with self.assertRaises(validate.ValidationError):
+                GDR(GEN_DATA=[(10, "x"), (2, 70000)]).encode()
+            if np is not None:
+                with self.assertRaises(validate.ValidationError):
+                    GDR(GEN_DATA=[(5, np.array([1, 70000]))]).encode()
+        finally:
+            validate.set_mode("off")
+        with self.assertRaises(ValueError):
+            GDR(GEN_DATA=[(9, 1)])
+
+
+class ScanRecordTest(unittest.TestCase):
+
+    def decode(self, cls, body):
+        """Field values of a record body, by its field_names (the kx types used by the scan records)."""
+        fv = {}
+        pos = 0
+        for name, typ in cls.field_names:
+            if typ in pack_len_map:
+                fmt = "c" if typ == "C1" else struct.Struct({1: "B", 2: "H", 4: "I", 8: "Q"}[pack_len_map[typ]]).format
+                fv[name] = struct.unpack_from(fmt, body, pos)[0]
+                pos += pack_len_map[typ]
+            elif typ == "Cn":
+                fv[name] = body[pos + 1:pos + 1 + body[pos]].decode()
+                pos += 1 + body[pos]
+            elif typ in ("Dn", "Sn"):
+                n = struct.unpack_from("H", body, pos)[0]
+                n = (n + 7) // 8 if typ == "Dn" else n
+                fv[name] = body[pos + 2:pos + 2 + n]
+                pos += 2 + n
+            else:
+                n = fv[cls.kx_counts[name]]
+                if typ == "kxCn":
+                    fv[name] = []
+                    for _ in range(n):
+                        fv[name].append(body[pos + 1:pos + 1 + body[pos]].decode())
+                        pos += 1 + body[pos]
+                    continue
+                size = fv[cls.kx_sizes[name]] if name in cls.kx_sizes else pack_len_map[typ[2:]]
+                if typ == "kxCf":
+                    fv[name] = [body[pos + i * size:pos + (i + 1) * size].decode() for i in range(n)]
+                else:
+                    fv[name] = list(struct.unpack_from("{}{}".format(n, dtcodes.UF_FORMATS.get(size, "x")), body, pos))
+                pos += n * size
+        self.assertEqual(pos, len(body))
+        return fv
+
+    def test_str_array_inputs(self):
+        import array
+        fields = dict(TEST_NUM=7, HEAD_NUM=1, SITE_NUM=2, CYC_SIZE=2, UTX_SIZE=3, MASK_MAP=[0xFF], LIM_INDX=[4],
+                      LIM_SPEC=[9], COND_LST=["VDD=0.9"], USER_TXT=["a", "bcd"])
+        ref = STR(CYC_OFST=[1, 2, 65535], BIT_POS=[3, 4, 5], EXP_DATA=[0, 1, 1], **fields).encode()
+        self.assertEqual(STR(CYC_OFST=array.array("H", [1, 2, 65535]), BIT_POS=[3, 4, 5], EXP_DATA=b"\0\1\1",
+                             **fields).encode(), ref)
+        if np is not None:
+            self.assertEqual(STR(CYC_OFST=np.array([1, 2, 65535]), BIT_POS=np.arange(3, 6),
+                                 EXP_DATA=np.array([0, 1, 1], dtype=np.uint8), **fields).encode(), ref)
+        (typ, sub, body), = read_records(io.BytesIO(ref))
+        fv = self.decode(STR, body)
+        self.assertEqual((typ, sub), (15, 30))
+        self.assertEqual((fv["CYCO_CNT"], fv["CYC_OFST"], fv["BIT_POS"], fv["TOTL_CNT"]), (3, [1, 2, 65535], [3, 4, 5], 3))
+        self.assertEqual((fv["USER_TXT"], fv["COND_LST"], fv["MASK_MAP"]), (["a  ", "bcd"], ["VDD=0.9"], b"\xff"))
+
+    def test_str_continuation(self):
+        n = 40000
+        cycles = list(range(0, 3 * n, 3))
+        rec = STR(TEST_NUM=7, HEAD_NUM=1, SITE_NUM=2, TEST_TXT="scan", MASK_MAP=[1], COND_LST=["c"], COND_CNT=1,
+                  CYC_OFST=cycles, BIT_POS=[i % 1000 for i in range(n)], EXP_DATA=[i % 2 for i in range(n)])
+        records = [self.decode(STR, body) for _, _, body in read_records(io.BytesIO(rec.encode()))]
+        self.assertGreater(len(records), 1)
+        self.assertEqual([r["CONT_FLG"] for r in records], [1] * (len(records) - 1) + [0])
+        self.assertEqual(sum((r["CYC_OFST"] for r in records), []), cycles)
+        self.assertEqual(sum(r["BPOS_CNT"] for r in records), n)
+        self.assertEqual({(r["TEST_NUM"], r["SITE_NUM"], r["TEST_TXT"], r["TOTL_CNT"]) for r in records},
+                         {(7, 2, "scan", n)})
+        self.assertEqual([r["COND_LST"] for r in records[:2]], [["c"], []])
+        self.assertEqual([r["MASK_MAP"] for r in records[:2]], [b"\x01", b""])
+        validate.set_mode("strict")
+        try:
+            self.assertEqual(rec.encode(), b"".join(r.encode() for r in rec.split()))
+        finally:
+            validate.set_mode("off")
+
+    def test_psr_continuation(self):
+        n = 3000
+        rec = PSR(PSR_INDX=1, PAT_BGN=list(range(n)), PAT_END=list(range(1, n + 1)),
+                  PAT_FILE=["pattern_file_{:05}.stil".format(i) for i in range(n)])
+        records = [self.decode(PSR, body) for _, _, body in read_records(io.BytesIO(rec.encode()))]
+        self.assertEqual(len(records), 3)  # 44 bytes per pattern set
+        self.assertEqual([r["TOTP_CNT"] for r in records], [n] * 3)
+        self.assertEqual(sum(r["LOCP_CNT"] for r in records), n)
+        self.assertEqual(sum((r["PAT_FILE"] for r in records), []), rec.field_values["PAT_FILE"])
+
+    def test_order(self):
+        inf = io.BytesIO()
+        for rec in (FAR(CPU_TYPE=2, STDF_VER=4), VUR(), MIR(1, 2, 3, "LOT", "", "", "", ""),
+                    CDR(CDR_INDX=1, CHN_LEN=8, SIN_PIN=1, SOUT_PIN=2, CELL_LST=["a", "b"]),
+                    PIR(HEAD_NUM=1, SITE_NUM=2), STR(TEST_NUM=1, HEAD_NUM=1, SITE_NUM=2),
+                    PRR(HEAD_NUM=1, SITE_NUM=2, PART_FLG=0, NUM_TEST=1, HARD_BIN=1),
+                    STR(TEST_NUM=1, HEAD_NUM=1, SITE_NUM=2), MRR(FINISH_T=0)):
+            rec.write_record(inf)
+        inf.seek(0)
+        violations = order.check_file(inf)
+        self.assertEqual([(v.index, v.record) for v in violations], [(7, "STR")])
+
+
+class RecordSplitTest(unittest.TestCase):
+
+    def test_mpr(self):
+        n = 30001
+        rec = MPR(TEST_NUM=5, HEAD_NUM=1, SITE_NUM=0, TEST_FLG=0, PARM_FLG=0, RTN_ICNT=n, RSLT_CNT=n,
+                  RTN_STAT=[0x21] * ((n + 1) // 2), RTN_RSLT=[float(i) for i in range(n)], RTN_INDX=list(range(n)),
+                  UNITS="V")
+        records = list(read_records(io.BytesIO(rec.encode())))
+        self.assertEqual(len(records), 3)
+        results, indexes = [], []
+        for i, (_, _, body) in enumerate(records):
+            icnt, rcnt = struct.unpack_from("HH", body, 8)
+            if i < len(records) - 1:
+                self.assertEqual(icnt % 2, 0)  # nibble pairs stay together
+                self.assertGreater(len(body), REC_LEN_MAX - 16)  # filled up to the last pair that fits
+            rslt = 12 + (icnt + 1) // 2
+            results += struct.unpack_from("{}f".format(rcnt), body, rslt)
+            indx = rslt + 4 * rcnt + 2 + 1 + 3 + 16
+            indexes += struct.unpack_from("{}H".format(icnt), body, indx)
+            self.assertEqual(body[indx + 2 * icnt:indx + 2 * icnt + 2], b"\x01V")
+        self.assertEqual((results, indexes), ([float(i) for i in range(n)], list(range(n))))
+
+    def test_plr_and_gdr(self):
+        plr = PLR(GRP_CNT=6000, GRP_INDX=list(range(6000)), GRP_MODE=[0] * 6000, GRP_RADX=[0] * 6000,
+                  PGM_CHAR=["01"] * 6000, RTN_CHAR=["HL"] * 6000, PGM_CHAL=[""] * 6000, RTN_CHAL=[""] * 6000)
+        counts = [struct.unpack_from("H", body)[0] for _, _, body in read_records(io.BytesIO(plr.encode()))]
+        self.assertEqual((len(counts), sum(counts)), (2, 6000))
+        fields = [(10, "trim")] + [(5, i) for i in range(30000)]
+        if np is not None:
+            fields.append(np.arange(20000, dtype=np.float32))
+        recs = GDR(GEN_DATA=fields).split()
+        self.assertGreater(len(recs), 1)
+        data = b"".join(rec.encode() for rec in recs)
+        self.assertEqual(data, GDR(GEN_DATA=fields).encode())
+        for _, _, body in read_records(io.BytesIO(data)):
+            self.assertLessEqual(len(body), REC_LEN_MAX)
+        self.assertEqual(sum(len(GDR(GEN_DATA=[item]).split()) for item in fields[:3]), 3)
+
+    def test_dtr_and_unsplittable(self):
+        text = "".join(chr(65 + i % 26) for i in range(600))
+        bodies = [body for _, _, body in read_records(io.BytesIO(DTR(text).encode()))]
+        self.assertEqual([len(body) for body in bodies], [256, 256, 91])
+        self.assertEqual("".join(bytes(body[1:]).decode() for body in bodies), text)
+        inf = io.BytesIO()
+        for mode in ("off", "strict"):
+            validate.set_mode(mode)
+            try:
+                with self.assertRaises(RecordTooLongError):
+                    PGR(GRP_INDX=32768, INDX_CNT=40000, PMR_INDX=list(range(40000))).write_record(inf)
+            finally:
+                validate.set_mode("off")
+        self.assertEqual(inf.getvalue(), b"")
+
+
+class RollingWriterTest(unittest.TestCase):
+
+    def write_lot(self, out):
+        for rec in (FAR(CPU_TYPE=2, STDF_VER=4), MIR(1, 2, 3, "LOT", "", "", "", ""),
+                    SDR(HEAD_NUM=1, SITE_GRP=1, SITE_CNT=2, SITE_NUM=[0, 1]),
+                    PMR(PMR_INDX=1, CHAN_NAM="ch1", PHY_NAM="VDD", LOG_NAM="VDD")):
+            rec.write_record(out)
+        for wafer in range(2):
+            WIR(HEAD_NUM=1, START_T=0, WAFER_ID="W{}".format(wafer)).write_record(out)
+            for touchdown in range(5):
+                for site in (0, 1):
+                    PIR(HEAD_NUM=1, SITE_NUM=site).write_record(out)
+                for site in (0, 1):
+                    PTR(TEST_NUM=1, HEAD_NUM=1, SITE_NUM=site, TEST_FLG=0, PARM_FLG=0, RESULT=0.5).write_record(out)
+                    PRR(HEAD_NUM=1, SITE_NUM=site, PART_FLG=0, NUM_TEST=1, HARD_BIN=1).write_record(out)
+            WRR(HEAD_NUM=1, FINISH_T=0, PART_CNT=10, WAFER_ID="W{}".format(wafer)).write_record(out)
+        HBR(HEAD_NUM=255, SITE_NUM=0, HBIN_NUM=1, HBIN_CNT=20, HBIN_PF="P").write_record(out)
+        MRR(FINISH_T=123).write_record(out)
+
+    def read(self, path):
+        with open(path, "rb") as inf:
+            return [(record_names[(typ, sub)], body) for typ, sub, body in read_records(inf)]
+
+    def test_roll_by_size_and_wafer(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for options, n_files in (({"max_bytes": 300}, 6), ({"per_wafer": True}, 2)):
+                fmt = os.path.join(tmp, "lot_{}_" + str(n_files) + ".stdf")
+                with RollingWriter(fmt, **options) as out:
+                    self.write_lot(out)
+                self.assertEqual(len(out.files), n_files)
+                parts = 0
+                for path in out.files:
+                    with open(path, "rb") as inf:
+                        self.assertEqual(order.check_file(inf), [])
+                    records = self.read(path)
+                    self.assertEqual([name for name, _ in records[:4]], ["FAR", "MIR", "SDR", "PMR"])
+                    names = [name for name, _ in records]
+                    parts += names.count("PRR")
+                    pcr = [body for name, body in records if name == "PCR" and body[0] == 255]
+                    self.assertEqual(struct.unpack_from("I", pcr[0], 2)[0], names.count("PRR"))
+                    self.assertEqual(names.count("HBR"), 3)  # computed per site and for all sites
+                self.assertEqual(parts, 20)
+                self.assertEqual(records[-1], ("MRR", MRR(FINISH_T=123).encode()[4:]))
+
+
+class DefaultEncodingTest(unittest.TestCase):
+
+    @staticmethod
+    def field_by_field(rec):
+        rec.cal_rec_len()
+        buf = io.BytesIO()
+        dtcodes.write_record_map["Header"](buf, rec.rec_len, rec.rec_typ, rec.rec_sub)
+        for name, typ in rec.field_names:
+            if typ.startswith("kx"):
+                dtcodes.write_record_map[typ](buf, rec.field_values[name], rec.kx_count(name))
+            else:
+                dtcodes.write_record_map[typ](buf, rec.field_values[name])
+        return buf.getvalue()
+
+    def test_matches_field_by_field(self):
+        ptr = PTR(1, 1, 0, 0, 0, 0.5, UNITS="V", LO_LIMIT=float("0"))  # a default value, not the default object
+        ptr.field_values["HI_SPEC"] = 2.0
+        recs = [MIR(SETUP_T=1, START_T=2, STAT_NUM=1, LOT_ID="L", PART_TYP="P", NODE_NAM="N", TSTR_TYP="T", JOB_NAM="J"),
+                SDR(HEAD_NUM=1, SITE_GRP=1, SITE_CNT=2, SITE_NUM=[0, 1]), PTR(1, 1, 0, 0, 0, 0.5), ptr,
+                TSR(HEAD_NUM=255, SITE_NUM=255, TEST_TYP="P", TEST_NUM=2, EXEC_CNT=5, FAIL_CNT=0, ALRM_CNT=0),
+                PRR(HEAD_NUM=1, SITE_NUM=0, PART_FLG=0, NUM_TEST=1, HARD_BIN=1)]
+        for rec in recs:
+            self.assertEqual(rec.encode(), self.field_by_field(rec), type(rec).__name__)
+        self.assertIsNotNone(PTR._segments[-1][2])  # the optional fields are one run of defaults
+
+
+class HashingWriterTest(unittest.TestCase):
+
+    def test_digest_sidecar_and_verify(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lot.stdf")
+            with hashing.HashingWriter(path, block_size=100) as out:
+                FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+                for i in range(20):
+                    PTR(TEST_NUM=i, HEAD_NUM=1, SITE_NUM=0, TEST_FLG=0, PARM_FLG=0, RESULT=0.5).write_record(out)
+                out.write(bytearray(250))  # across block boundaries
+                out.flush()
+                with open(path, "rb") as inf:
+                    self.assertEqual(out.hexdigest(), hashlib.sha256(inf.read()).hexdigest())
+            with open(path, "rb") as inf:
+                data = inf.read()
+            self.assertEqual(out.digest, hashlib.sha256(data).hexdigest())
+            with open(path + ".hash.json") as inf:
+                state = json.load(inf)
+            self.assertEqual((state["size"], len(state["blocks"])), (len(data), -(-len(data) // 100)))
+            self.assertEqual(hashing.verify(path), (True, len(data), out.digest, []))
+            with open(path, "r+b") as inf:
+                inf.seek(250)
+                inf.write(b"\xff")
+            report = hashing.verify(path)
+            self.assertFalse(report.ok)
+            self.assertEqual(report.bad_blocks, [200])
+            self.assertTrue(hashing.verify(path, start=0, stop=200).ok)
+            self.assertEqual(hashing.verify(path, start=150, stop=260), (False, len(data), None, [200]))
+
+
+class DatalogPolicyTest(unittest.TestCase):
+
+    def write_lot(self, out, use_log):
+        FAR(CPU_TYPE=2, STDF_VER=4).write_record(out)
+        MIR(SETUP_T=1, START_T=2, STAT_NUM=1, LOT_ID="L", PART_TYP="P", NODE_NAM="N", TSTR_TYP="T",
+            JOB_NAM="J").write_record(out)
+        for part in range(20):
+            PIR(HEAD_NUM=1, SITE_NUM=0).write_record(out)
+            for test in (1, 2, 3):
+                failed = test == 2 and part in (5, 7)
+                rec = PTR(test, 1, 0, 0x80 if failed else 0, 0, 0.5)
+                if use_log:
+                    out.log(rec)
+                else:
+                    rec.write_record(out)
+            PRR(HEAD_NUM=1, SITE_NUM=0, PART_FLG=0, NUM_TEST=3, HARD_BIN=1).write_record(out)
+        TSR(HEAD_NUM=255, SITE_NUM=255, TEST_TYP="P", TEST_NUM=1, EXEC_CNT=1).write_record(out)
+        MRR(FINISH_T=3).write_record(out)
+
+    def test_sampling_and_summaries(self):
+        full = io.BytesIO()
+        self.write_lot(full, False)
+        expected = summary.SummaryAccumulator()
+        for rec_typ, rec_sub, body in read_records(io.BytesIO(full.getvalue())):
+            expected.feed(rec_typ, rec_sub, body)
+        outputs = []
+        for use_log in (False, True):
+            out = policy.DatalogPolicy(io.BytesIO(), every_nth=10, failures=True)
+            self.write_lot(out, use_log)
+            # first result of each test, the results of parts 0 and 10, and the two failures
+            self.assertEqual((out.logged, out.suppressed), (8, 52))
+            outputs.append(out.out.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+        recs = [(rec_typ, rec_sub, bytes(body)) for rec_typ, rec_sub, body in read_records(io.BytesIO(outputs[0]))]
+        self.assertEqual(sum(key[:2] == (15, 10) for key in recs), 8)
+        summaries = [rec.encode() for rec in expected.records()]
+        tail = b"".join(reader.HEADER.pack(len(body), rec_typ, rec_sub) + body for rec_typ, rec_sub, body in recs[-len(summaries) - 1:-1])
+        self.assertEqual(tail, b"".join(summaries))  # the caller's TSR is left out
+        self.assertEqual(recs[-1][:2], (1, 20))
+
+    def test_rate_limit(self):
+        out = policy.DatalogPolicy(io.BytesIO(), max_rate=1)
+        self.assertEqual([out.selects(10, 1, 1, 0, 0) for _ in range(3)], [True, True, False])
+
+
+class DirectSinkTest(unittest.TestCase):
+
+    def test_blocks_tail_and_flush(self):
+        recs = [PTR(i, 1, 0, 0, 0, 0.5, TEST_TXT="t" * (i % 50)).encode() for i in range(500)]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lot.stdf")
+            with sinks.DirectSink(path, block_bytes=8192) as out:
+                for rec in recs[:100]:
+                    out.write(rec)
+                out.flush()  # a padded partial block, cut back to the records written
+                self.assertEqual(os.path.getsize(path), out.size)
+                for rec in recs[100:]:
+                    out.write(rec)
+                out.write(bytes(20000))  # spans several blocks
+            with open(path, "rb") as inf:
+                self.assertEqual(inf.read(), b"".join(recs) + bytes(20000))
+            self.assertGreater(out.writes, 1)
+        with self.assertRaises(ValueError):
+            sinks.DirectSink(path, block_bytes=5000)
+
+
+class HeaderCacheTest(unittest.TestCase):
+
+    def test_record_cache(self):
+        pmr = PMR(PMR_INDX=1, CHAN_TYP=0, CHAN_NAM="a", PHY_NAM="p", LOG_NAM="l", HEAD_NUM=1, SITE_NUM=0)
+        data = pmr.encode()
+        self.assertIs(pmr.encode(), data)
+        pmr.field_values["CHAN_NAM"] = "b"
+        self.assertEqual(pmr.encode(), PMR(1, 0, "b", "p", "l", 1, 0).encode())
+        pmr.field_values.update(CHAN_NAM="a")
+        self.assertEqual(pmr.encode(), data)
+        self.assertNotIn("field_values", PTR.__dict__)  # results are not cached
+
+    def test_cached_section(self):
+        built = []
+
+        def build():
+            built.append(1)
+            return [PMR(i, 0, "ch%d" % i, "p", "l", 1, 0) for i in range(1, 50)] + [PGR(GRP_INDX=32768, INDX_CNT=2, GRP_NAM="ALL", PMR_INDX=[1, 2])]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "prog.hdr")
+            first = headercache.cached_section(path, build, key="rev 1")
+            self.assertEqual(headercache.cached_section(path, build, key="rev 1"), first)
+            self.assertEqual(len(built), 1)
+            self.assertEqual(len(list(read_records(io.BytesIO(first)))), 50)
+            headercache.cached_section(path, build, key="rev 2")
+            self.assertEqual(len(built), 2)
+            with open(path, "r+b") as out:
+                out.seek(-1, os.SEEK_END)
+                last = out.read(1)[0]
+                out.seek(-1, os.SEEK_END)
+                out.write(bytes([last ^ 0xFF]))
+            self.assertEqual(headercache.cached_section(path, build, key="rev 2"), first)
+            self.assertEqual(len(built), 3)
+            self.assertEqual(os.listdir(tmp), ["prog.hdr"])
+
+
+class PinMapTest(unittest.TestCase):
+
+    def test_build_and_encode(self):
+        text = "PMR_INDX,CHAN_TYP,CHAN_NAM,PHY_NAM,LOG_NAM,HEAD_NUM,SITE_NUM\n" + "".join(
+            "{},0,ch{},P{},L{},1,{}\n".format(i, i, i, i, i % 4) for i in range(1, 9))
+        pins = pinmap.PinMap(csv.DictReader(io.StringIO(text)), groups={"ODD": [1, 3, 5, 7], "EVEN": [2, 4, 6, 8]},
+                      pin_list=[(1, 0, 2, "1", "H"), ("EVEN", 1, 0, "0", "L", "", "x")])
+        expected = [PMR(i, 0, "ch%d" % i, "P%d" % i, "L%d" % i, 1, i % 4) for i in range(1, 9)]
+        expected += [PGR(GRP_INDX=32768, INDX_CNT=4, GRP_NAM="ODD", PMR_INDX=[1, 3, 5, 7]),
+                     PGR(GRP_INDX=32769, INDX_CNT=4, GRP_NAM="EVEN", PMR_INDX=[2, 4, 6, 8]),
+                     PLR(GRP_CNT=2, GRP_INDX=[1, 32769], GRP_MODE=[0, 1], GRP_RADX=[2, 0], PGM_CHAR=["1", "0"],
+                         RTN_CHAR=["H", "L"], PGM_CHAL=["", ""], RTN_CHAL=["", "x"])]
+        self.assertEqual(pins.encode(), b"".join(rec.encode() for rec in expected))
+        rows = [(i, 0, "ch%d" % i, "P%d" % i, "L%d" % i, 1, i % 4) for i in range(1, 9)]
+        self.assertEqual(pinmap.PinMap(rows).encode(), b"".join(rec.encode() for rec in expected[:8]))
+
+    def test_index_checks(self):
+        rows = [(1,), (2,), (3,)]
+        for groups, pin_list in (({"G": [1, 4]}, ()), ([(100, "G", [1])], ()), ({}, [(7,)]), ({}, [("NONE",)])):
+            with self.assertRaises(validate.ValidationError):
+                pinmap.PinMap(rows, groups, pin_list)
+        with self.assertRaises(validate.ValidationError):
+            pinmap.PinMap([(1,), (1,)])
+
+
+def _ring_producer(ring, site, count):
+    with ring.producer(batch_bytes=1000) as out:
+        for i in range(count):
+            PTR(i, 1, site, 0, 0, 0.5, TEST_TXT="t" * (i % 30)).write_record(out)
+
+
+class RecordRingTest(unittest.TestCase):
+
+    def test_wraps_and_blocks_on_full(self):
+        recs = [PTR(i, 1, 0, 0, 0, 0.5, TEST_TXT="t" * (i % 70)).encode() for i in range(2000)]
+        with shmring.RecordRing(size=4096) as ring:
+            def produce():
+                with ring.producer(batch_bytes=300) as out:
+                    for rec in recs:
+                        out.write(rec)
+                    out.write(bytes(1500))  # bigger than a batch: a slot of its own
+
+            worker = threading.Thread(target=produce)
+            worker.start()
+            out = io.BytesIO()
+            ring.run(out)
+            worker.join()
+            self.assertEqual(out.getvalue(), b"".join(recs) + bytes(1500))
+            self.assertEqual(ring.drain(out, timeout=0), 0)
+            with self.assertRaises(ValueError):
+                ring.producer().write(bytes(5000))
+
+    def test_wrap_waits_for_writer(self):
+        with shmring.RecordRing(size=1024) as ring:
+            out = io.BytesIO()
+            producer = ring.producer(batch_bytes=0)
+            producer.write(b"x" * 100)
+            ring.drain(out)
+            producer.write(b"y" * 950)  # past the end of an empty ring
+            ring.drain(out)
+            producer.write(b"z" * 100)
+            worker = threading.Thread(target=producer.write, args=(b"w" * 950,))  # waits for the z slot
+            worker.start()
+            while worker.is_alive() or ring.drain(out, timeout=0):
+                ring.drain(out, timeout=0.05)
+            worker.join()
+            self.assertEqual(out.getvalue(), b"x" * 100 + b"y" * 950 + b"z" * 100 + b"w" * 950)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "needs fork")
+    def test_processes(self):
+        ctx = multiprocessing.get_context("fork")
+        with shmring.RecordRing(size=1 << 14, producers=3, mp_context=ctx) as ring:
+            workers = [ctx.Process(target=_ring_producer, args=(ring, site, 500)) for site in range(3)]
+            for worker in workers:
+                worker.start()
+            out = io.BytesIO()
+            ring.run(out)
+            for worker in workers:
+                worker.join()
+        out.seek(0)
+        tests = {0: [], 1: [], 2: []}
+        for rec_typ, rec_sub, body in read_records(out):
+            test_num, _, site = struct.unpack_from("=IBB", body)
+            tests[site].append(test_num)
+        self.assertEqual(tests, {site: list(range(500)) for site in range(3)})
+
+
+class ResummarizeTest(unittest.TestCase):
+
+    def test_rewrite_in_chunks(self):
+        recs = [FAR(CPU_TYPE=2, STDF_VER=4), MIR(SETUP_T=1, START_T=2, STAT_NUM=1, LOT_ID="L", PART_TYP="P",
+                                                  NODE_NAM="N", TSTR_TYP="T", JOB_NAM="J")]
+        for part in range(40):
+            site = part % 3
+            recs.append(PIR(HEAD_NUM=1, SITE_NUM=site))
+            recs += [PTR(test, 1, site, 0x80 if (part + test) % 11 == 0 else 0, 0, part * 0.25 - test,
+                         TEST_TXT="test {}".format(test)) for test in range(20)]
+            recs.append(PRR(HEAD_NUM=1, SITE_NUM=site, PART_FLG=0x08 if part % 5 == 0 else 0, NUM_TEST=20,
+                            HARD_BIN=1 + (part % 5 == 0), SOFT_BIN=1))
+        recs += [PCR(255, 0, 7, 0, 0, 7), HBR(255, 0, 1, 7, "P"), MRR(FINISH_T=9)]  # wrong summaries
+        data = b"".join(rec.encode() for rec in recs)
+        expected = summary.SummaryAccumulator()
+        for rec_typ, rec_sub, body in read_records(io.BytesIO(data)):
+            expected.feed(rec_typ, rec_sub, body)
+        expected_data = b"".join(rec.encode() for rec in recs[:-3] + expected.records() + recs[-1:])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lot.stdf")
+            with open(path, "wb") as out:
+                out.write(data)
+            ranges = list(resummarize.chunks(data, 1000))
+            self.assertGreater(len(ranges), 10)
+            self.assertEqual((ranges[0][0], ranges[-1][1]), (0, len(data)))
+            ctx = multiprocessing.get_context("fork") if hasattr(os, "fork") else None
+            for processes in (1, 2):
+                out_path = os.path.join(tmp, "fixed{}.stdf".format(processes))
+                acc = resummarize.rewrite(path, out_path, processes=processes, chunk_bytes=1000, mp_context=ctx)
+                self.assertEqual(acc.parts, expected.parts)
+                self.assertEqual(acc.open_parts, set())
+                with open(out_path, "rb") as inf:
+                    self.assertEqual(inf.read(), expected_data)
+            with self.assertRaises(ValueError):
+                resummarize.rewrite(path, path)
+            with open(path, "ab") as out:
+                out.write(b"\x10\x00\x05\x14")
+            with self.assertRaises(TruncatedRecordError):
+                resummarize.summarize(path, processes=1, chunk_bytes=1000)
+
+
+class RecordViewTest(unittest.TestCase):
+
+    def test_fields_and_round_trip(self):
+        recs = [FAR(CPU_TYPE=2, STDF_VER=4),
+                SDR(HEAD_NUM=1, SITE_GRP=1, SITE_CNT=3, SITE_NUM=[0, 1, 2], CARD_ID="card"),
+                PLR(GRP_CNT=2, GRP_INDX=[1, 2], GRP_MODE=[0, 0], GRP_RADX=[0, 0], PGM_CHAR=["a", "bc"],
+                    RTN_CHAR=["x", "y"]),
+                PTR(5, 1, 2, 0x80, 0, 1.5, TEST_TXT="vdd", UNITS="V", LO_LIMIT=-1.0),
+                MPR(3, 1, 0, 0, 0, 3, 3, RTN_STAT=[0x21, 0x3], RTN_RSLT=[1.0, 2.0, 3.0], RTN_INDX=[7, 8, 9]),
+                STR(7, 1, 0, CYC_OFST=[1, 70000], PMR_INDX=[3, 4], USER_TXT=["ab", "c"], UTX_SIZE=3, U1_SIZE=1,
+                    USR1=[9], COND_LST=["x=1"], LIM_INDX=[1], LIM_SPEC=[2]),
+                GDR(GEN_DATA=[(1, 5), (3, 70000), (10, "hi"), (8, 2.5), (11, b"ab"), (13, 7)])]
+        data = b"".join(rec.encode() for rec in recs)
+        views = list(recview.read_views(data))
+        for view, rec in zip(views, recs):
+            self.assertEqual(view.encode(), rec.encode())
+            self.assertEqual(view.to_record().encode(), rec.encode())
+        sdr, plr, ptr, mpr, st, gdr = views[1:]
+        self.assertEqual((sdr.SITE_NUM, sdr["CARD_ID"], sdr.LOAD_ID), ([0, 1, 2], "card", ""))
+        self.assertEqual((plr.PGM_CHAR, plr.RTN_CHAR), (["a", "bc"], ["x", "y"]))
+        self.assertEqual((ptr.SITE_NUM, ptr.RESULT, ptr.UNITS, ptr.LO_LIMIT), (2, 1.5, "V", -1.0))
+        self.assertEqual((mpr.RTN_STAT, mpr.RTN_RSLT, mpr.RTN_INDX), ([0x21, 0x3], [1.0, 2.0, 3.0], [7, 8, 9]))
+        self.assertEqual((st.CYC_OFST, st.USER_TXT, st.USR1, st.COND_LST), ([1, 70000], ["ab", "c"], [9], ["x=1"]))
+        self.assertEqual(gdr.GEN_DATA, [(1, 5), (3, 70000), (10, "hi"), (8, 2.5), (11, b"ab"), (13, 7)])
+        with self.assertRaises(KeyError):
+            ptr["NOPE"]
+
+        body = PTR(5, 1, 2, 0, 0, 0.5).encode()[4:17]  # the optional fields after TEST_TXT left out
+        view = next(recview.read_views(struct.pack("HBB", len(body), 15, 10) + body))
+        self.assertEqual((view.RESULT, view.UNITS, view.HI_LIMIT), (0.5, "", float("inf")))
+        truncated = struct.pack("HBB", 2, 15, 10) + b"\x05\x00"
+        self.assertIsNone(next(recview.read_views(truncated)).RESULT)  # a field without default
+        with self.assertRaises(TruncatedRecordError):
+            list(recview.read_views(data + b"\x10\x00"))
+
+    def test_types_and_sources(self):
+        recs = [PIR(HEAD_NUM=1, SITE_NUM=site) for site in range(3)]
+        recs += [PTR(test, 1, test % 3, 0, 0, test * 0.5) for test in range(30)]
+        data = b"".join(rec.encode() for rec in recs)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lot.stdf")
+            with open(path, "wb") as out:
+                out.write(data)
+            results = [view.RESULT for view in recview.read_views(path, types=("PTR",)) if view.SITE_NUM == 1]
+            self.assertEqual(results, [test * 0.5 for test in range(1, 30, 3)])
+            with open(path, "rb") as inf:
+                sites = [view.SITE_NUM for view in recview.read_views(inf, types=[PIR])]
+            self.assertEqual(sites, [0, 1, 2])
+        self.assertEqual(sum(1 for _ in recview.read_views(data, types=[(5, 10)])), 3)
+
+
+class FilterTest(unittest.TestCase):
+
+    def test_filter_file(self):
+        head = [FAR(CPU_TYPE=2, STDF_VER=4), ATR(MOD_TIM=1, CMD_LINE="old"),
+                MIR(SETUP_T=1, START_T=2, STAT_NUM=1, LOT_ID="L", PART_TYP="P", NODE_NAM="N", TSTR_TYP="T",
+                    JOB_NAM="J")]
+        body = []
+        for part in range(20):
+            body.append(PIR(HEAD_NUM=1, SITE_NUM=0))
+            body += [PTR(test, 1, 0, 0, 0, part + test * 0.5, TEST_TXT="t{}".format(test)) for test in range(10)]
+            body.append(DTR(TEXT_DAT="part {}".format(part)))
+            body.append(PRR(HEAD_NUM=1, SITE_NUM=0, PART_FLG=0, NUM_TEST=10, HARD_BIN=1))
+        recs = head + body + [MRR(FINISH_T=9)]
+        data = b"".join(rec.encode() for rec in recs)
+        no_dtr = b"".join(rec.encode() for rec in recs if not isinstance(rec, DTR))
+
+        def scaled(ptr):
+            ptr.field_values["RESULT"] *= 2
+            return ptr
+
+        expected = head[:2] + [ATR(MOD_TIM=5, CMD_LINE="filter")] + head[2:]
+        for rec in body:
+            if isinstance(rec, DTR) or isinstance(rec, PTR) and rec.field_values["TEST_NUM"] in (3, 4):
+                continue
+            expected.append(scaled(rec) if isinstance(rec, PTR) and rec.field_values["TEST_NUM"] == 7 else rec)
+        expected.append(recs[-1])
+        expected = b"".join(rec.encode() for rec in expected)
+        transforms = (filters.DropRecords("DTR"), filters.DropTests([3, 4]),
+                      filters.MapRecords(["PTR"], lambda ptr: scaled(ptr) if ptr.field_values["TEST_NUM"] == 7 else ptr),
+                      filters.StampATR("filter", MOD_TIM=5))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "lot.stdf")
+            with open(path, "wb") as out:
+                out.write(data)
+            report = filters.filter_file(path, os.path.join(tmp, "out.stdf"), *transforms)
+            with open(os.path.join(tmp, "out.stdf"), "rb") as inf:
+                self.assertEqual(inf.read(), expected)
+            self.assertEqual(report.records, len(recs))
+            self.assertEqual(report.size, len(expected))
+            self.assertEqual(report.changed, 20 + 200)  # the DTRs, and every PTR: MapRecords re-encodes them
+            out = io.BytesIO()  # no file descriptor: copied by writing memoryviews
+            filters.filter_file(path, out, filters.DropRecords("DTR", "GDR"))
+            self.assertEqual(out.getvalue(), no_dtr)
+            with open(path, "ab") as out:
+                out.write(b"\x10\x00")
+            with self.assertRaises(TruncatedRecordError):
+                filters.filter_file(path, os.path.join(tmp, "out.stdf"))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,299 @@
+"""
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published
+by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful,　but WITHOUT ANY WARRANTY; without even the implied warranty of　
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the　GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+
+# Field range validation, derived from each record class's field_names.
+#
+# Without validation a value that does not fit its STDF data type (a U1 of 300, a C*n longer than
+# 255 bytes) makes struct.pack raise in the middle of a record. Validation checks every field of a
+# record, and the total REC_LEN, before a single byte of it is encoded:
+#
+#     from stdfwriter import validate
+#
+#     validate.set_mode("strict")  # every encode()/write_record() is checked first
+#     validate.set_mode("off")     # the default, nothing is checked
+#
+# For each record class the checks are generated once, as straight-line Python code with one
+# block per field, so a strict-mode check costs about as much as reading the fields. In off mode
+# Record.encode only tests that Record.validate is None.
+#
+# Bulk encoders validate whole columns at once with check_columns(), using NumPy min/max when
+# the columns are arrays.
+
+
+import operator
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, columns are then checked with the builtin min/max
+    np = None
+
+from .dtcodes import UF_FORMATS, vn_items
+from .recheaders import REC_LEN_MAX, Record
+
+
+class ValidationError(ValueError):
+    """A field value does not fit its STDF data type, or the record is too long."""
+
+
+INT_RANGES = {
+    "B1": (0, 0xFF),
+    "N1": (0, 0xFF),
+    "U1": (0, 0xFF),
+    "U2": (0, 0xFFFF),
+    "U4": (0, 0xFFFFFFFF),
+    "U8": (0, 0xFFFFFFFFFFFFFFFF),
+    "I1": (-0x80, 0x7F),
+    "I2": (-0x8000, 0x7FFF),
+    "I4": (-0x80000000, 0x7FFFFFFF),
+    "I8": (-0x8000000000000000, 0x7FFFFFFFFFFFFFFF),
+}
+R4_MAX = struct.unpack("f", b"\xff\xff\x7f\x7f")[0]  # largest finite single precision value
+CN_MAX = 0xFF
+DN_MAX = 0xFFFF // 8  # bytes, the length prefix is a U2 count of bits
+SN_MAX = 0xFFFF
+
+MODES = ("off", "strict")
+
+_checkers = {}
+_mode = "off"
+
+
+def _fail(rec, name, typ, value, reason=None):
+    text = repr(value)
+    if len(text) > 40:
+        text = text[:37] + "..."
+    raise ValidationError("{}.{}={} {}".format(
+        type(rec).__name__, name, text, reason or "does not fit data type {}".format(typ)))
+
+
+def _check_array(rec, name, typ, values):
+    """Check the elements of a kx array field that will be written."""
+    n = rec.kx_count(name)
+    if n == 0:
+        return
+    item = typ[2:]
+    if item == "N1":
+        n = n // 2 + n % 2  # nibbles are written packed, two per byte
+        item = "U1"
+    try:
+        size = len(values)
+    except TypeError:
+        _fail(rec, name, typ, values, "is not an array")
+    if size < n:
+        _fail(rec, name, typ, values, "has {} elements, {} expected".format(size, n))
+    if name in rec.kx_sizes:
+        size = rec.field_values[rec.kx_sizes[name]]
+        if item == "Uf" and size not in UF_FORMATS:
+            _fail(rec, rec.kx_sizes[name], "U1", size, "is not a valid element size of {}".format(name))
+        item = "U{}".format(size) if item == "Uf" else item
+    if item in ("Cn", "Cf", "Sn"):
+        limit = {"Cn": CN_MAX, "Sn": SN_MAX}.get(item, size)
+        for v in values[:n]:
+            if not (isinstance(v, str) and len(v) <= limit and v.isascii()):
+                _fail(rec, name, typ, v, "has an element that is not an ASCII string of at most {} bytes".format(limit))
+        return
+    _check_numbers(rec, name, typ, item, values[:n])
+
+
+def _check_numbers(rec, name, typ, item, values):
+    """Check the range of array elements of STDF data type item."""
+    lo, hi = _extent(values)
+    if item in INT_RANGES:
+        lo_limit, hi_limit = INT_RANGES[item]
+        if lo < lo_limit or hi > hi_limit or not _integral(values):
+            _fail(rec, name, typ, (lo, hi), "has elements outside {}..{}".format(lo_limit, hi_limit))
+    elif item == "R4" and (-float("inf") < lo < -R4_MAX or R4_MAX < hi < float("inf")):
+        _fail(rec, name, typ, (lo, hi), "has elements too large for R4")
+
+
+def _extent(values):
+    if np is not None and isinstance(values, np.ndarray):
+        return values.min(), values.max()
+    return min(values), max(values)
+
+
+def _integral(values):
+    if np is not None and isinstance(values, np.ndarray):
+        return values.dtype.kind in "iub"
+    return all(isinstance(v, int) for v in values)
+
+
+_VN_TYPES = {0: "B1", 1: "U1", 2: "U2", 3: "U4", 4: "I1", 5: "I2", 6: "I4", 7: "R4", 8: "R8",
+             10: "Cn", 11: "Bn", 12: "Dn", 13: "N1"}
+
+
+def _check_vn(rec, name, values):
+    try:
+        items = vn_items(values)
+    except ValueError as exc:
+        _fail(rec, name, "Vn", values, str(exc))
+    for i, (code, value) in enumerate(items):
+        typ = _VN_TYPES.get(code)
+        if typ is None:
+            _fail(rec, name, "Vn", code, "has an unknown data type code")
+        if code == 0:
+            continue
+        if hasattr(value, "dtype"):
+            if typ not in INT_RANGES and typ not in ("R4", "R8"):
+                _fail(rec, "{}[{}]".format(name, i), "Vn", value, "is an array of data type {}".format(typ))
+            if len(value):
+                _check_numbers(rec, "{}[{}]".format(name, i), typ, typ, value)
+        else:
+            _check_scalar(rec, "{}[{}]".format(name, i), typ, value)
+
+
+def _check_scalar(rec, name, typ, v):
+    if typ in INT_RANGES:
+        lo, hi = INT_RANGES[typ]
+        if not (isinstance(v, int) and lo <= v <= hi):
+            _fail(rec, name, typ, v)
+    elif typ == "R4":
+        if R4_MAX < abs(float(v)) < float("inf"):
+            _fail(rec, name, typ, v)
+    elif typ == "Cn" and not (isinstance(v, str) and len(v) <= CN_MAX and v.isascii()):
+        _fail(rec, name, typ, v)
+
+
+_FIELD_CHECKS = {
+    "int": """    try:
+        ok = {lo} <= _index(v) <= {hi}
+    except TypeError:
+        ok = False
+""",
+    "R4": """    try:
+        ok = not isinstance(v, _text) and not (_R4_MAX < _abs(_float(v)) < _inf)
+    except (TypeError, ValueError):
+        ok = False
+""",
+    "R8": """    try:
+        ok = not isinstance(v, _text) and _float(v) is not None
+    except (TypeError, ValueError):
+        ok = False
+""",
+    "C1": """    ok = isinstance(v, str) and len(v) == 1 and v.isascii()
+""",
+    "Cn": """    ok = isinstance(v, str) and len(v) <= {cn_max} and v.isascii()
+""",
+    "Bn": """    ok = len(v) <= {cn_max}
+""",
+    "Dn": """    ok = len(v) <= {dn_max}
+""",
+    "Sn": """    ok = isinstance(v, str) and len(v) <= {sn_max} and v.isascii()
+""",
+}
+
+
+def compile_checker(cls):
+    """Generate the check function for a record class from its field_names.
+
+    Returns:
+        function taking a record instance, raising ValidationError on the first bad field
+    """
+    lines = ["def check(rec):", "    fv = rec.field_values"]
+    for name, typ in cls.field_names:
+        lines.append("    v = fv[{!r}]".format(name))
+        if typ.startswith("kx"):
+            lines.append("    _check_array(rec, {!r}, {!r}, v)".format(name, typ))
+            continue
+        if typ == "Vn":
+            lines.append("    _check_vn(rec, {!r}, v)".format(name))
+            continue
+        if typ in INT_RANGES:
+            lo, hi = INT_RANGES[typ]
+            block = _FIELD_CHECKS["int"].format(lo=lo, hi=hi)
+        else:
+            block = _FIELD_CHECKS[typ].format(cn_max=CN_MAX, dn_max=DN_MAX, sn_max=SN_MAX)
+        lines.extend(block.rstrip("\n").split("\n"))
+        lines.append("    if not ok:")
+        lines.append("        _fail(rec, {!r}, {!r}, v)".format(name, typ))
+    if not cls.split_fields and cls.split is Record.split:  # records that can be split are checked after splitting
+        lines.append("    rec.cal_rec_len()")
+        lines.append("    if rec.rec_len > {}:".format(REC_LEN_MAX))
+        lines.append("        _fail(rec, 'REC_LEN', 'U2', rec.rec_len, 'is longer than {} bytes')".format(REC_LEN_MAX))
+    namespace = {
+        "_fail": _fail, "_check_array": _check_array, "_check_vn": _check_vn, "_index": operator.index,
+        "_abs": abs, "_float": float, "_inf": float("inf"), "_R4_MAX": R4_MAX,
+        "_text": (str, bytes),
+    }
+    exec(compile("\n".join(lines), "<validate {}>".format(cls.__name__), "exec"), namespace)
+    return namespace["check"]
+
+
+def check_record(rec):
+    """Check all fields of rec, raising ValidationError on the first one that does not fit."""
+    checker = _checkers.get(type(rec))
+    if checker is None:
+        checker = _checkers[type(rec)] = compile_checker(type(rec))
+    checker(rec)
+
+
+def check_columns(cls, columns, n=None):
+    """Check column batches of field values for a bulk encoder before anything is encoded.
+
+    Args:
+        cls: the record class the columns will be encoded as
+        columns: dict of field name to a column (NumPy array or sequence) or a scalar shared by all rows
+        n: number of rows; when given every column must have exactly this many values
+
+    Raises:
+        ValidationError: naming the first field with a value that does not fit
+    """
+    for name, typ in cls.field_names:
+        if name not in columns:
+            continue
+        col = columns[name]
+        if isinstance(col, (str, bytes)) or not hasattr(col, "__len__"):
+            col = [col]
+        elif n is not None and len(col) != n:
+            raise ValidationError("{}.{} has {} values, {} expected".format(cls.__name__, name, len(col), n))
+        if len(col) == 0:
+            continue
+        if typ in INT_RANGES:
+            lo, hi = _extent(col)
+            if lo < INT_RANGES[typ][0] or hi > INT_RANGES[typ][1] or not _integral(col):
+                raise ValidationError("{}.{} has values in {}..{} that do not fit data type {} (integers {}..{})".format(
+                    cls.__name__, name, lo, hi, typ, *INT_RANGES[typ]))
+        elif typ == "R4":
+            lo, hi = _extent(col)
+            if -float("inf") < lo < -R4_MAX or R4_MAX < hi < float("inf"):
+                raise ValidationError("{}.{} has values too large for R4".format(cls.__name__, name))
+        elif typ in ("C1", "Cn"):
+            limit = 1 if typ == "C1" else CN_MAX
+            if np is not None and isinstance(col, np.ndarray) and col.dtype.kind in "SU":
+                longest = int(np.char.str_len(col).max())
+                # "U" arrays hold one UCS-4 code point per character
+                ascii_ok = col.dtype.kind == "S" or bool((np.ascontiguousarray(col).view(np.uint32) < 128).all())
+            else:
+                longest = max(len(v) for v in col)
+                ascii_ok = all(isinstance(v, bytes) or v.isascii() for v in col)
+            if longest > limit or not ascii_ok:
+                raise ValidationError("{}.{} has values that are not ASCII strings of at most {} bytes".format(
+                    cls.__name__, name, limit))
+
+
+def set_mode(mode):
+    """Select the validation mode for all records.
+
+    Args:
+        mode: "strict" checks every record before it is encoded, "off" checks nothing
+    """
+    global _mode
+    if mode not in MODES:
+        raise ValueError("mode must be one of {}".format(", ".join(MODES)))
+    Record.validate = check_record if mode == "strict" else None
+    _mode = mode
+
+
+def get_mode():
+    return _mode